@@ -1,14 +1,11 @@
 import networkx as nx
 import json
-from typing import List, Tuple, Optional, Set
+from typing import List, Tuple, Optional, Set, Iterable, Iterator, Union, Sequence
 from collections import defaultdict, Counter
-import matplotlib.pyplot as plt
-import warnings
-
-# Suppress matplotlib warnings:
-# - Legend warnings when no labeled artists exist
-# - Axes3D warnings (we don't use 3D plotting)
-warnings.filterwarnings('ignore', category=UserWarning, module='matplotlib')
+from classes.kg_tracing import NOOP_SPAN, current_tracer
+from classes import kg_query
+from classes.kg_triple_index import TripleIndex
+from classes.kg_changes import ChangeFeed
 
 class ScientificKnowledgeGraph:
     """
@@ -23,6 +20,29 @@ class ScientificKnowledgeGraph:
         self.graph = nx.MultiDiGraph()
         self.relation_types = set()
         self.metadata = {}  # Store additional info about nodes
+        # SPO/POS/OSP permutation indexes kept in sync with self.graph
+        self.index = TripleIndex()
+        # Rule inference engine (classes/kg_inference.py), built on first use
+        self._inference = None
+        # Incremented on every mutation; lets callers invalidate derived data
+        self.version = 0
+        # Per-relation mutation counters, for caches that depend on one relation only
+        self.relation_versions = defaultdict(int)
+        # Hierarchy indexes (classes/kg_taxonomy.py) keyed by relation
+        self._taxonomies = {}
+        # Optional query tracer (see classes/kg_tracing.py); None disables tracing
+        self.tracer = None
+        # Per-relation cardinality statistics, rebuilt lazily when version changes
+        self._stats_cache = None
+        # Centrality analytics (see classes/kg_analytics.py), created on first use
+        self._analytics = None
+        # Community partitions (classes/kg_communities.py) keyed by method: (version, partition)
+        self._communities = {}
+        # Level-of-detail samples (classes/kg_sampling.py) for the current version, keyed by budget
+        self._samples = {}
+        self._samples_version = None
+        # Recent mutations tagged with the version they produced (classes/kg_changes.py)
+        self.changes = ChangeFeed()
         
     def add_triple(self, subject: str, predicate: str, obj: str, 
                    confidence: float = 1.0, source: str = "manual"):
@@ -42,7 +62,14 @@ class ScientificKnowledgeGraph:
             confidence=confidence,
             source=source
         )
+        self.index.add(subject, predicate, obj)
+        if self._inference is not None and self.index.multiplicity(subject, predicate, obj) == 1:
+            self._inference.on_add(subject, predicate, obj)
         self.relation_types.add(predicate)
+        self.relation_versions[predicate] += 1
+        self.version += 1
+        self.changes.record(self.version, 'add_triple', subject=subject, predicate=predicate,
+                            object=obj, confidence=confidence, source=source)
         
         # Initialize metadata if needed
         for node in [subject, obj]:
@@ -53,6 +80,55 @@ class ScientificKnowledgeGraph:
                     'examples': []
                 }
     
+    def add_triples(self, triples: Iterable[Sequence]) -> int:
+        """
+        Add many triples through one batched path.
+        
+        Each item is (subject, predicate, object[, confidence[, source]]).
+        Unlike repeated add_triple calls, rule inference is propagated once
+        for the whole batch, the version is bumped once, and the change feed
+        is reset (clients resync instead of replaying every row).
+        
+        Returns:
+            Number of triples added
+        """
+        add_edge = self.graph.add_edge
+        index_add = self.index.add
+        metadata = self.metadata
+        relations = Counter()
+        new_facts = []
+        count = 0
+        for triple in triples:
+            subject, predicate, obj = triple[0], triple[1], triple[2]
+            confidence = triple[3] if len(triple) > 3 else 1.0
+            source = triple[4] if len(triple) > 4 else 'manual'
+            add_edge(subject, obj, relation=predicate, confidence=confidence, source=source)
+            index_add(subject, predicate, obj)
+            if self._inference is not None and self.index.multiplicity(subject, predicate, obj) == 1:
+                new_facts.append((subject, predicate, obj))
+            relations[predicate] += 1
+            for node in (subject, obj):
+                if node not in metadata:
+                    metadata[node] = {'type': 'concept', 'description': '', 'examples': []}
+            count += 1
+        
+        if self._inference is not None and new_facts:
+            derived = self._inference.derived
+            delta = []
+            for fact in new_facts:
+                if fact in derived:
+                    derived.remove(*fact, count=derived.multiplicity(*fact))
+                else:
+                    delta.append(fact)
+            self._inference._propagate(delta)
+        self.relation_types.update(relations)
+        for predicate in relations:
+            self.relation_versions[predicate] += 1
+        if count:
+            self.version += 1
+            self.changes.clear(self.version)
+        return count
+    
     def add_node_metadata(self, node: str, node_type: str = 'concept',
                          description: str = '', examples: List[str] = None):
         """Add descriptive metadata to a node."""
@@ -61,6 +137,39 @@ class ScientificKnowledgeGraph:
             'description': description,
             'examples': examples or []
         }
+        self.version += 1
+        self.changes.record(self.version, 'update_metadata', node=node, metadata=self.metadata[node])
+    
+    def remove_triple(self, subject: str, predicate: str, obj: str) -> int:
+        """
+        Remove all edges subject -[predicate]-> obj.
+        
+        Returns:
+            Number of edges removed
+        """
+        if (subject, predicate, obj) not in self.index:
+            return 0
+        removed = 0
+        # Only the parallel edges between subject and obj need to be inspected
+        for key, edge_data in list(self.graph.succ[subject][obj].items()):
+            if edge_data.get('relation') == predicate:
+                self.graph.remove_edge(subject, obj, key=key)
+                removed += 1
+        self.index.remove(subject, predicate, obj, count=removed)
+        if self._inference is not None and (subject, predicate, obj) not in self.index:
+            self._inference.on_remove(subject, predicate, obj)
+        self.relation_versions[predicate] += 1
+        self.version += 1
+        self.changes.record(self.version, 'remove_triple', subject=subject, predicate=predicate,
+                            object=obj, count=removed)
+        return removed
+    
+    def _span(self, name: str, **attributes):
+        """Open a tracing span, or return the shared no-op span if tracing is off."""
+        tracer = self.tracer or current_tracer()
+        if tracer is None:
+            return NOOP_SPAN
+        return tracer.start_span(name, attributes)
     
     def get_neighbors(self, node: str, relation: Optional[str] = None,
                      direction: str = 'out') -> List[str]:
@@ -75,25 +184,26 @@ class ScientificKnowledgeGraph:
         Returns:
             List of neighboring concept names
         """
-        neighbors = []
-        
-        if direction in ['out', 'both']:
-            for successor in self.graph.successors(node):
-                edges = self.graph.get_edge_data(node, successor)
-                for edge_key, edge_data in edges.items():
-                    if relation is None or edge_data.get('relation') == relation:
-                        neighbors.append(successor)
-                        break
-        
-        if direction in ['in', 'both']:
-            for predecessor in self.graph.predecessors(node):
-                edges = self.graph.get_edge_data(predecessor, node)
-                for edge_key, edge_data in edges.items():
-                    if relation is None or edge_data.get('relation') == relation:
-                        neighbors.append(predecessor)
-                        break
-        
-        return list(set(neighbors))  # Remove duplicates
+        with self._span('get_neighbors', node=node, relation=relation, direction=direction,
+                        strategy='adjacency' if relation is None else 'SPO/POS index') as span:
+            if node not in self.graph:
+                raise nx.NetworkXError(f"The node {node} is not in the digraph.")
+            neighbors = set()
+            
+            if direction in ['out', 'both']:
+                if relation is None:
+                    neighbors.update(self.graph.succ[node])
+                else:
+                    neighbors.update(self.index.spo.get(node, {}).get(relation, ()))
+            
+            if direction in ['in', 'both']:
+                if relation is None:
+                    neighbors.update(self.graph.pred[node])
+                else:
+                    neighbors.update(self.index.pos.get(relation, {}).get(node, ()))
+            
+            span.add('results', len(neighbors))
+            return list(neighbors)
     
     def find_path(self, start: str, end: str, max_length: int = 5) -> Optional[List[str]]:
         """
@@ -107,13 +217,73 @@ class ScientificKnowledgeGraph:
         Returns:
             List of concepts forming the path, or None if no path exists
         """
-        try:
-            path = nx.shortest_path(self.graph, start, end)
-            if len(path) <= max_length + 1:
-                return path
-            return None
-        except (nx.NetworkXNoPath, nx.NodeNotFound):
-            return None
+        with self._span('find_path', start=start, end=end, max_length=max_length,
+                        strategy='unweighted shortest path (networkx BFS)') as span:
+            try:
+                path = nx.shortest_path(self.graph, start, end)
+                span.add('path_length', len(path) - 1)
+                if len(path) <= max_length + 1:
+                    return path
+                return None
+            except (nx.NetworkXNoPath, nx.NodeNotFound):
+                return None
+    
+    def find_most_confident_path(self, start: str, end: str, relations: Optional[Iterable[str]] = None,
+                                 max_hops: Optional[int] = None) -> Optional[dict]:
+        """
+        Find the path whose edge confidences have the largest product.
+        
+        Args:
+            start: Starting concept
+            end: Target concept
+            relations: Only follow edges with these relations (optional)
+            max_hops: Maximum number of edges in the path (None = unlimited)
+        
+        Returns:
+            Dict with 'path', 'relations', 'confidences' (per hop), 'confidence'
+            (product) and 'hops', or None if no path exists
+        """
+        return (self.find_most_confident_paths(start, end, k=1, relations=relations,
+                                               max_hops=max_hops) or [None])[0]
+        
+    def find_most_confident_paths(self, start: str, end: str, k: int = 3,
+                                  relations: Optional[Iterable[str]] = None,
+                                  max_hops: Optional[int] = None) -> List[dict]:
+        """
+        Find up to k loopless paths in decreasing order of confidence.
+        
+        Args:
+            start: Starting concept
+            end: Target concept
+            k: Number of paths to return
+            relations: Only follow edges with these relations (optional)
+            max_hops: Maximum number of edges per path (None = unlimited)
+        
+        Returns:
+            List of path dicts as returned by find_most_confident_path()
+        
+        Raises:
+            ValueError: if k or max_hops is negative or zero
+        """
+        from classes.kg_paths import SearchStats, k_most_confident_paths
+        
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        if max_hops is not None and max_hops < 1:
+            raise ValueError("max_hops must be at least 1")
+        with self._span('find_most_confident_paths', start=start, end=end, k=k, max_hops=max_hops,
+                        strategy='Dijkstra over -log(confidence)' + (' + Yen' if k > 1 else '')) as span:
+            if start not in self.graph or end not in self.graph:
+                return []
+            stats = SearchStats()
+            paths = k_most_confident_paths(self, start, end, k,
+                                           relations=set(relations) if relations is not None else None,
+                                           max_hops=max_hops, stats=stats)
+            span.add('searches', stats.searches)
+            span.add('nodes_settled', stats.nodes_settled)
+            span.add('edges_scanned', stats.edges_scanned)
+            span.add('results', len(paths))
+            return paths
     
     def get_prerequisites(self, concept: str, depth: int = None) -> List[Tuple[str, int]]:
         """
@@ -126,62 +296,595 @@ class ScientificKnowledgeGraph:
         Returns:
             List of (prerequisite_concept, depth) tuples
         """
-        prerequisites = []
-        visited = set()
-        queue = [(concept, 0)]
-        
-        while queue:
-            current, d = queue.pop(0)
+        with self._span('get_prerequisites', concept=concept, depth=depth,
+                        strategy='BFS over incoming prerequisite_of edges (POS index)') as span:
+            prerequisites = []
+            visited = set()
+            queue = [(concept, 0)]
+            edges_scanned = 0
             
-            if current in visited:
-                continue
-            visited.add(current)
+            while queue:
+                current, d = queue.pop(0)
+                
+                if current in visited:
+                    continue
+                visited.add(current)
+                
+                if depth is not None and d >= depth:
+                    continue
+                
+                # Find concepts that are prerequisites of current
+                prereq_neighbors = self.get_neighbors(current, relation='prerequisite_of', direction='in')
+                # Only the POS index entries for (prerequisite_of, current) are visited
+                edges_scanned += len(prereq_neighbors)
+                
+                for prereq in prereq_neighbors:
+                    if prereq != concept:  # Don't include the original concept
+                        prerequisites.append((prereq, d + 1))
+                        queue.append((prereq, d + 1))
             
-            if depth is not None and d >= depth:
-                continue
-            
-            # Find concepts that are prerequisites of current
-            prereq_neighbors = self.get_neighbors(current, relation='prerequisite_of', direction='in')
-            
-            for prereq in prereq_neighbors:
-                if prereq != concept:  # Don't include the original concept
-                    prerequisites.append((prereq, d + 1))
-                    queue.append((prereq, d + 1))
-        
-        return prerequisites
+            span.add('nodes_visited', len(visited))
+            span.add('edges_scanned', edges_scanned)
+            span.add('results', len(prerequisites))
+            return prerequisites
     
     def query_by_relation(self, relation: str) -> List[Tuple[str, str]]:
         """
         Get all (subject, object) pairs connected by a specific relation.
         """
-        results = []
-        for u, v, key, data in self.graph.edges(keys=True, data=True):
-            if data.get('relation') == relation:
-                results.append((u, v))
-        return results
+        return [(u, v) for u, _, v in self.index.match(p=relation)]
+    
+    def match_triples(self, subject: Optional[str] = None, predicate: Optional[str] = None,
+                      obj: Optional[str] = None,
+                      include_derived: bool = False) -> Iterator[Tuple[str, str, str]]:
+        """
+        Yield distinct (subject, predicate, object) triples matching the bound positions.
+        
+        Any argument left as None acts as a wildcard. Served from the permutation
+        indexes, so the cost is proportional to the number of matches.
+        If include_derived is True, triples inferred by the rule engine are included.
+        """
+        if include_derived:
+            return self.inference().match(subject, predicate, obj)
+        return self.index.match(subject, predicate, obj)
+    
+    def enable_inference(self, rules=None):
+        """
+        (Re)build the rule inference engine and materialize all derived triples.
+        
+        Args:
+            rules: List of kg_inference.Rule (default: transitive is_a / part_of /
+                   prerequisite_of and part_of inherited through is_a)
+        
+        Returns:
+            The InferenceEngine, which is then kept up to date on add/remove
+        """
+        from classes.kg_inference import InferenceEngine
+        with self._span('materialize_inference', strategy='semi-naive evaluation') as span:
+            self._inference = InferenceEngine(self.index, rules)
+            span.add('derived', self._inference.derived.size)
+            span.add('rounds', self._inference.rounds)
+        return self._inference
+    
+    def inference(self):
+        """The inference engine, materialized with the default rules on first use."""
+        if self._inference is None:
+            self.enable_inference()
+        return self._inference
+    
+    def is_entailed(self, subject: str, predicate: str, obj: str) -> bool:
+        """True if the triple is stored or can be inferred by the rule engine (O(1))."""
+        return (subject, predicate, obj) in self.index or self.inference().is_derived((subject, predicate, obj))
+    
+    def get_inferred_triples(self, subject: Optional[str] = None, predicate: Optional[str] = None,
+                             obj: Optional[str] = None) -> List[dict]:
+        """Derived (not stored) triples matching the pattern, flagged with 'derived': True."""
+        return [{'subject': s, 'predicate': p, 'object': o, 'derived': True}
+                for s, p, o in self.inference().derived.match(subject, predicate, obj)]
+    
+    def relation_statistics(self) -> dict:
+        """
+        Cardinality statistics used by the query planner.
+        
+        Returns:
+            {'relations': {relation: {'count', 'subjects', 'objects'}},
+             '_total': {'count', 'subjects', 'objects'}}
+            computed once per graph version.
+        """
+        if self._stats_cache is not None and self._stats_cache[0] == self.version:
+            return self._stats_cache[1]
+        relations = {}
+        for rel, by_obj in self.index.pos.items():
+            subjects = set()
+            count = 0
+            for subjs in by_obj.values():
+                subjects.update(subjs)
+                count += len(subjs)
+            relations[rel] = {'count': count, 'subjects': len(subjects), 'objects': len(by_obj)}
+        stats = {
+            'relations': relations,
+            '_total': {
+                'count': sum(r['count'] for r in relations.values()),
+                'subjects': len(self.index.spo),
+                'objects': len(self.index.osp),
+            },
+        }
+        self._stats_cache = (self.version, stats)
+        return stats
+    
+    def explain_query(self, query: Union[str, Sequence[Sequence[str]]]) -> List[dict]:
+        """
+        Return the join order chosen for a basic graph pattern query.
+        
+        Args:
+            query: Patterns as 'subject predicate object' separated by ' . ' (variables start
+                   with '?'), or a list of [subject, predicate, object] lists
+        
+        Returns:
+            List of plan steps with the pattern and its estimated row count
+        """
+        patterns = kg_query.parse_query(query)
+        return kg_query.plan_query(self, patterns, self.relation_statistics())
+    
+    def query(self, query: Union[str, Sequence[Sequence[str]]], limit: Optional[int] = None,
+              select: Optional[List[str]] = None, include_derived: bool = False) -> dict:
+        """
+        Answer a conjunctive triple-pattern query, e.g. '?x is_a wave . ?x prerequisite_of ?y'.
+        
+        Args:
+            query: Query string or list of [subject, predicate, object] patterns
+            limit: Maximum number of distinct solutions to return (None = all)
+            select: Variables to project onto (default: all variables, in order of appearance)
+            include_derived: Also match triples inferred by the rule engine
+        
+        Returns:
+            dict with 'variables', 'results' (list of {variable: value}) and 'plan'
+        
+        Raises:
+            ValueError: if the query is malformed or selects unknown variables
+        """
+        with self._span('query', query=query if isinstance(query, str) else None, limit=limit,
+                        strategy='BGP: greedy selectivity order, index nested-loop join') as span:
+            patterns = kg_query.parse_query(query)
+            variables = []
+            for pattern in patterns:
+                for var in kg_query.pattern_variables(pattern):
+                    if var not in variables:
+                        variables.append(var)
+            if select:
+                unknown = [v for v in select if v not in variables]
+                if unknown:
+                    raise ValueError(f"Selected variables not in query: {', '.join(unknown)}")
+                variables = list(select)
+            plan = kg_query.plan_query(self, patterns, self.relation_statistics())
+            counters = {}
+            results = []
+            seen = set()
+            match = self.inference().match if include_derived else self.index.match
+            for binding in kg_query.execute_plan(self, plan, counters, match=match):
+                row = tuple(binding[v] for v in variables)
+                if row in seen:
+                    continue
+                seen.add(row)
+                results.append(dict(zip(variables, row)))
+                if limit is not None and len(results) >= limit:
+                    break
+            span.add('patterns', len(patterns))
+            span.add('edges_scanned', counters.get('triples_matched', 0))
+            span.add('bindings', counters.get('bindings', 0))
+            span.add('results', len(results))
+            return {'variables': variables, 'results': results, 'plan': plan}
+    
+    def _path_indexes(self, include_derived: bool) -> list:
+        if include_derived:
+            return [self.index, self.inference().derived]
+        return [self.index]
+    
+    def regular_path_query(self, expression: str, source: str, limit: Optional[int] = None,
+                           include_derived: bool = False) -> dict:
+        """
+        Concepts reachable from `source` along a path matching a relation regex,
+        e.g. 'prerequisite_of+/is_a*' (see classes/kg_rpq.py for the syntax).
+        
+        Args:
+            expression: Path expression over relation names
+            source: Starting concept
+            limit: Maximum number of concepts to return (None = all)
+            include_derived: Also follow triples inferred by the rule engine
+        
+        Returns:
+            dict with 'results' (list of {'concept', 'hops'}, nearest first) and
+            'truncated'; the source itself is included if the empty path matches
+        
+        Raises:
+            ValueError: if the expression is malformed
+            nx.NetworkXError: if the source concept is unknown
+        """
+        from classes.kg_rpq import EvaluationStats, compile_path, reachable
+        
+        with self._span('regular_path_query', expression=expression, source=source, limit=limit,
+                        strategy='product-graph BFS (DFA x index)') as span:
+            automaton = compile_path(expression)
+            if source not in self.graph:
+                raise nx.NetworkXError(f"The node {source} is not in the digraph.")
+            stats = EvaluationStats()
+            results, truncated = reachable(self._path_indexes(include_derived), automaton, source,
+                                           limit=limit, stats=stats)
+            span.add('automaton_states', len(automaton.transitions))
+            span.add('states_visited', stats.states_visited)
+            span.add('edges_scanned', stats.edges_scanned)
+            span.add('results', len(results))
+            return {'results': results, 'truncated': truncated}
+    
+    def regular_path_match(self, expression: str, source: str, target: str,
+                           include_derived: bool = False) -> Optional[dict]:
+        """
+        Check whether a path matching a relation regex leads from `source` to `target`.
+        
+        Returns:
+            A shortest witness as {'path', 'relations', 'hops'} (inverse steps are
+            prefixed with '^'), or None if no matching path exists
+        
+        Raises:
+            ValueError: if the expression is malformed
+            nx.NetworkXError: if either concept is unknown
+        """
+        from classes.kg_rpq import EvaluationStats, compile_path, witness
+        
+        with self._span('regular_path_match', expression=expression, source=source, target=target,
+                        strategy='product-graph BFS (DFA x index), stops at first match') as span:
+            automaton = compile_path(expression)
+            for node in (source, target):
+                if node not in self.graph:
+                    raise nx.NetworkXError(f"The node {node} is not in the digraph.")
+            stats = EvaluationStats()
+            result = witness(self._path_indexes(include_derived), automaton, source, target, stats=stats)
+            span.add('automaton_states', len(automaton.transitions))
+            span.add('states_visited', stats.states_visited)
+            span.add('edges_scanned', stats.edges_scanned)
+            return result
+    
+    def taxonomy(self, relation: str = 'is_a'):
+        """
+        Interval-labelled hierarchy index over `relation` edges (child -> parent).
+        
+        Built on first use and rebuilt lazily after edges of that relation change.
+        """
+        cached = self._taxonomies.get(relation)
+        if cached is not None and cached[0] == self.relation_versions[relation]:
+            return cached[1]
+        from classes.kg_taxonomy import TaxonomyIndex
+        with self._span('build_taxonomy', relation=relation, strategy='DFS post-order interval labels') as span:
+            pairs = [(s, o) for s, _, o in self.index.match(p=relation)]
+            index = TaxonomyIndex(pairs, relation=relation)
+            span.add('edges_scanned', len(pairs))
+            span.add('concepts', len(index.component))
+        self._taxonomies[relation] = (self.relation_versions[relation], index)
+        return index
+    
+    def is_subconcept(self, concept: str, ancestor: str, relation: str = 'is_a') -> bool:
+        """
+        True if `concept` is transitively a kind of `ancestor` (e.g. soliton is_a* wave).
+        
+        A concept counts as a subconcept of itself.
+        """
+        return self.taxonomy(relation).is_subsumed(concept, ancestor)
+    
+    def get_descendants(self, concept: str, relation: str = 'is_a',
+                        include_self: bool = False) -> List[str]:
+        """All concepts that are transitively a kind of `concept`."""
+        return self.taxonomy(relation).descendants(concept, include_self=include_self)
+    
+    def get_ancestors(self, concept: str, relation: str = 'is_a',
+                      include_self: bool = False) -> Set[str]:
+        """All concepts that `concept` is transitively a kind of."""
+        return self.taxonomy(relation).ancestors(concept, include_self=include_self)
+    
+    def lowest_common_ancestors(self, a: str, b: str, relation: str = 'is_a') -> List[str]:
+        """
+        Most specific concepts that both `a` and `b` are kinds of.
+        
+        Uses an Euler-tour/sparse-table index when the hierarchy is a forest and
+        ancestor bitsets otherwise (several LCAs are possible in that case). The
+        index is built once per version of the hierarchy.
+        
+        Returns:
+            Sorted list of LCA concepts (empty if the concepts share no ancestor)
+        """
+        with self._span('lowest_common_ancestors', a=a, b=b, relation=relation) as span:
+            lca = self.taxonomy(relation).lca_index()
+            span.set('strategy', 'Euler tour + sparse table RMQ' if lca.is_forest else 'ancestor bitsets')
+            return lca.query(a, b)
+    
+    def lowest_common_ancestors_batch(self, pairs: Sequence[Tuple[str, str]],
+                                      relation: str = 'is_a') -> List[List[str]]:
+        """LCAs for many (a, b) pairs against a single index build."""
+        with self._span('lowest_common_ancestors_batch', relation=relation) as span:
+            lca = self.taxonomy(relation).lca_index()
+            span.set('strategy', 'Euler tour + sparse table RMQ' if lca.is_forest else 'ancestor bitsets')
+            span.add('pairs', len(pairs))
+            return lca.query_many(pairs)
+    
+    def analytics(self):
+        """Centrality analytics over a sparse adjacency of this graph (created on first use)."""
+        if self._analytics is None:
+            from classes.kg_analytics import CentralityAnalytics
+            self._analytics = CentralityAnalytics(self)
+        return self._analytics
+    
+    def top_central_concepts(self, metric: str = 'pagerank', k: int = 10,
+                             relation: Optional[str] = None) -> List[dict]:
+        """
+        Rank concepts by a centrality metric.
+    
+        Args:
+            metric: 'degree', 'pagerank', 'hits_hub', 'hits_authority' or 'betweenness'
+            k: Number of concepts to return
+            relation: Only consider edges with this relation (optional)
+    
+        Returns:
+            List of {'concept', 'score'} dicts, highest score first
+    
+        Raises:
+            ValueError: if the metric or the relation is unknown
+        """
+        if relation is not None and relation not in self.relation_types:
+            raise ValueError(f"Unknown relation '{relation}'")
+        with self._span('top_central_concepts', metric=metric, k=k, relation=relation,
+                        strategy='sparse matrix (CSR)') as span:
+            analytics = self.analytics()
+            hits, misses = analytics.cache_hits, analytics.cache_misses
+            result = analytics.top(metric, k, relation)
+            span.add('cache_hits', analytics.cache_hits - hits)
+            span.add('cache_misses', analytics.cache_misses - misses)
+            return result
+    
+    def communities(self, method: str = 'louvain'):
+        """
+        Partition concepts into communities (cached until the graph changes).
+        
+        Args:
+            method: 'louvain' or 'label_propagation'
+        
+        Returns:
+            CommunityPartition with numbered communities, largest first
+        """
+        cached = self._communities.get(method)
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+        from classes.kg_communities import CommunityPartition
+        with self._span('communities', method=method, strategy=method) as span:
+            partition = CommunityPartition(self, method=method)
+            span.add('communities', len(partition))
+        self._communities[method] = (self.version, partition)
+        return partition
+    
+    def export_overview(self, expand: Optional[Sequence[int]] = None,
+                        method: str = 'louvain', max_communities: Optional[int] = None) -> dict:
+        """
+        Export a clustered overview with one super-node per community.
+        
+        Args:
+            expand: Community ids to show as individual concepts instead of super-nodes
+            method: Community detection method (see communities())
+            max_communities: Super-nodes for the largest communities; the remaining
+                ones share a single 'community:other' node (default 50)
+        
+        Returns:
+            dict with D3 'nodes' and 'links' plus community information
+        """
+        partition = self.communities(method)
+        from classes.kg_communities import DEFAULT_MAX_COMMUNITIES, overview
+        with self._span('export_overview', method=method,
+                        strategy='community super-nodes + aggregated edges') as span:
+            data = overview(self, partition, expand,
+                            max_communities=max_communities or DEFAULT_MAX_COMMUNITIES)
+            span.add('nodes', len(data['nodes']))
+            span.add('links', len(data['links']))
+            return data
+    
+    def export_sample(self, budget: int) -> dict:
+        """
+        Export a structure-preserving sample of at most `budget` nodes.
+        
+        Samples are cached per (version, budget); a handful of budgets are kept.
+        
+        Returns:
+            dict with D3 'nodes' and 'links' plus omitted/total counts
+        """
+        if self._samples_version != self.version:
+            self._samples = {}
+            self._samples_version = self.version
+        cached = self._samples.get(budget)
+        if cached is not None:
+            return cached
+        from classes.kg_sampling import sample_graph
+        with self._span('export_sample', budget=budget,
+                        strategy='PageRank hubs + random walk with restart') as span:
+            data = sample_graph(self, budget)
+            span.add('nodes', len(data['nodes']))
+            span.add('links', len(data['links']))
+        if len(self._samples) >= 16:
+            self._samples.pop(next(iter(self._samples)))
+        self._samples[budget] = data
+        return data
     
-    def get_concept_neighborhood(self, concept: str, radius: int = 1) -> Set[str]:
+    def get_triples(self, relation: Optional[str] = None, offset: int = 0,
+                    limit: Optional[int] = None,
+                    include_derived: bool = False) -> Tuple[List[dict], int]:
+        """
+        List triples, optionally filtered by relation, with pagination.
+        
+        Args:
+            relation: Only include triples with this relation (optional)
+            offset: Number of matching triples to skip
+            limit: Maximum number of triples to return (None = all)
+            include_derived: Append inferred triples after the stored ones; every
+                             item then carries a 'derived' flag
+        
+        Returns:
+            (page of triple dicts, total number of matching triples)
+        """
+        with self._span('get_triples', relation=relation, offset=offset, limit=limit,
+                        strategy='POS index' if relation else 'full edge scan') as span:
+            page = []
+            total = 0
+            end = None if limit is None else offset + limit
+            if relation:
+                # Visit only the edges carrying this relation (duplicates included)
+                edges = ((u, v, data) for u, _, v in self.index.match(p=relation)
+                         for data in self.graph.succ[u][v].values()
+                         if data.get('relation') == relation)
+            else:
+                edges = self.graph.edges(data=True)
+            for u, v, data in edges:
+                rel = data.get('relation', '')
+                if total >= offset and (end is None or total < end):
+                    page.append({
+                        'subject': u,
+                        'predicate': rel,
+                        'object': v,
+                        'confidence': data.get('confidence', 1.0),
+                        'source': data.get('source', 'manual')
+                    })
+                total += 1
+            span.add('edges_scanned', total)
+            if include_derived:
+                for item in page:
+                    item['derived'] = False
+                for s, p, o in self.inference().derived.match(p=relation or None):
+                    if total >= offset and (end is None or total < end):
+                        page.append({'subject': s, 'predicate': p, 'object': o,
+                                     'confidence': None, 'source': 'inferred', 'derived': True})
+                    total += 1
+            span.add('results', len(page))
+            return page, total
+    
+    def iter_triples(self, relation: Optional[str] = None, source: Optional[str] = None,
+                     subjects: Optional[Iterable[str]] = None) -> Iterator[dict]:
+        """
+        Yield stored triples one at a time (parallel duplicates included).
+        
+        Nothing is materialized, so memory use does not grow with the graph.
+        The graph must not be mutated while the generator is being consumed.
+        
+        Args:
+            relation: Only yield triples with this relation (uses the POS/SPO index)
+            source: Only yield triples with this provenance
+            subjects: Only yield triples whose subject is in this iterable
+        
+        Yields:
+            dicts with subject, predicate, object, confidence and source
+        """
+        if relation:
+            # Visit only the edges carrying this relation, via the index
+            if subjects is None:
+                pairs = ((u, v) for u, _, v in self.index.match(p=relation))
+            else:
+                pairs = ((u, v) for u in subjects
+                         for v in self.index.spo.get(u, {}).get(relation, ()))
+            edges = ((u, v, data) for u, v in pairs
+                     for data in self.graph.succ[u][v].values()
+                     if data.get('relation') == relation)
+        elif subjects is None:
+            edges = self.graph.edges(data=True)
+        else:
+            edges = ((u, v, data) for u in subjects if u in self.graph
+                     for v, by_key in self.graph.succ[u].items()
+                     for data in by_key.values())
+        for u, v, data in edges:
+            if source is not None and data.get('source', 'manual') != source:
+                continue
+            yield {
+                'subject': u,
+                'predicate': data.get('relation', ''),
+                'object': v,
+                'confidence': data.get('confidence', 1.0),
+                'source': data.get('source', 'manual')
+            }
+    
+    def get_concept_neighborhood(self, concept: Union[str, Iterable[str]], radius: int = 1) -> Set[str]:
         """
         Get all concepts within a certain radius.
         
         Args:
-            concept: Central concept
+            concept: Central concept, or several concepts to expand together
+                     (one multi-source BFS instead of one traversal per concept)
             radius: How many hops away to include
         
         Returns:
             Set of concept names
         """
-        neighborhood = {concept}
-        current_level = {concept}
+        sources = {concept} if isinstance(concept, str) else set(concept)
+        with self._span('get_concept_neighborhood', concept=concept if isinstance(concept, str) else None,
+                        sources=len(sources), radius=radius,
+                        strategy='level-synchronous BFS (both directions)') as span:
+            for node in sources:
+                if node not in self.graph:
+                    raise nx.NetworkXError(f"The node {node} is not in the digraph.")
+            neighborhood = set(sources)
+            current_level = set(sources)
+            edges_scanned = 0
+            expanded = 0
+            
+            for _ in range(radius):
+                next_level = set()
+                for node in current_level:
+                    next_level.update(self.graph.succ[node])
+                    next_level.update(self.graph.pred[node])
+                    edges_scanned += self.graph.degree(node)
+                    expanded += 1
+                next_level -= neighborhood
+                if not next_level:
+                    break
+                neighborhood.update(next_level)
+                current_level = next_level
+            
+            span.add('nodes_visited', expanded)
+            span.add('edges_scanned', edges_scanned)
+            span.add('results', len(neighborhood))
+            return neighborhood
+    
+    def describe_concepts(self, names: Iterable[str]) -> Tuple[List[dict], List[str]]:
+        """
+        Metadata, relation-grouped edges and degrees for many concepts at once.
         
-        for _ in range(radius):
-            next_level = set()
-            for node in current_level:
-                next_level.update(self.get_neighbors(node, direction='both'))
-            neighborhood.update(next_level)
-            current_level = next_level
+        Each concept costs one SPO and one OSP lookup, so describing a selection
+        is a single pass over the selected concepts' edges.
+        
+        Args:
+            names: Concept names (duplicates are reported once)
         
-        return neighborhood
+        Returns:
+            (list of concept dicts, list of names not in the graph)
+        """
+        with self._span('describe_concepts', strategy='SPO/OSP index') as span:
+            found, missing = [], []
+            edges_scanned = 0
+            for name in dict.fromkeys(names):
+                if name not in self.graph:
+                    missing.append(name)
+                    continue
+                outgoing = {rel: sorted(objs) for rel, objs in self.index.spo.get(name, {}).items()}
+                incoming = defaultdict(list)
+                for subj, preds in self.index.osp.get(name, {}).items():
+                    for rel in preds:
+                        incoming[rel].append(subj)
+                for subjects in incoming.values():
+                    subjects.sort()
+                out_degree = self.graph.out_degree(name)
+                in_degree = self.graph.in_degree(name)
+                edges_scanned += out_degree + in_degree
+                found.append({
+                    'name': name,
+                    'metadata': self.metadata.get(name, {}),
+                    'outgoing': outgoing,
+                    'incoming': dict(incoming),
+                    'degree': {'in': in_degree, 'out': out_degree}
+                })
+            span.add('results', len(found))
+            span.add('edges_scanned', edges_scanned)
+            return found, missing
     
     def find_loops(self, max_length: int = None, max_cycles: int = 1000, include_relations: bool = True) -> List[dict]:
         """Find directed cycles (loops) in the knowledge graph.
@@ -195,41 +898,48 @@ class ScientificKnowledgeGraph:
             List of cycles as dicts: { 'nodes': [n1, n2, ..., n1], 'relations': [r12, r23, ... , r_last_first] }
             The loop is closed by repeating the first node at the end of the list.
         """
-        # Convert to a simple DiGraph for cycle detection (ignore parallel edges)
-        G = nx.DiGraph()
-        for u, v, data in self.graph.edges(data=True):
-            # Keep one representative relation for u->v if multiple exist
-            if not G.has_edge(u, v):
-                G.add_edge(u, v, relation=data.get('relation'))
-        
-        cycles = []
-        for idx, cycle in enumerate(nx.simple_cycles(G)):
-            if max_cycles is not None and idx >= max_cycles:
-                break
-            if max_length is not None and len(cycle) > max_length:
-                continue
-            # Close the cycle: repeat the first node at the end for clearer rendering
-            closed_nodes = list(cycle) + [cycle[0]]
-            if include_relations:
-                rels = []
-                for i in range(len(cycle)):
-                    u = cycle[i]
-                    v = cycle[(i + 1) % len(cycle)]
-                    rel = None
-                    # If original multigraph had multiple edges, pick the first relation label
-                    data_uv = self.graph.get_edge_data(u, v)
-                    if data_uv:
-                        # data_uv is a dict of keys -> edge data
-                        first_key = next(iter(data_uv))
-                        rel = data_uv[first_key].get('relation')
-                    else:
-                        # Fallback to relation stored in simplified graph, if any
-                        rel = G.get_edge_data(u, v).get('relation') if G.has_edge(u, v) else None
-                    rels.append(rel)
-                cycles.append({'nodes': closed_nodes, 'relations': rels})
-            else:
-                cycles.append({'nodes': closed_nodes})
-        return cycles
+        with self._span('find_loops', max_length=max_length, max_cycles=max_cycles,
+                        strategy='networkx simple_cycles on collapsed DiGraph') as span:
+            # Convert to a simple DiGraph for cycle detection (ignore parallel edges)
+            G = nx.DiGraph()
+            for u, v, data in self.graph.edges(data=True):
+                # Keep one representative relation for u->v if multiple exist
+                if not G.has_edge(u, v):
+                    G.add_edge(u, v, relation=data.get('relation'))
+        
+            cycles = []
+            enumerated = 0
+            for idx, cycle in enumerate(nx.simple_cycles(G)):
+                if max_cycles is not None and idx >= max_cycles:
+                    break
+                enumerated += 1
+                if max_length is not None and len(cycle) > max_length:
+                    continue
+                # Close the cycle: repeat the first node at the end for clearer rendering
+                closed_nodes = list(cycle) + [cycle[0]]
+                if include_relations:
+                    rels = []
+                    for i in range(len(cycle)):
+                        u = cycle[i]
+                        v = cycle[(i + 1) % len(cycle)]
+                        rel = None
+                        # If original multigraph had multiple edges, pick the first relation label
+                        data_uv = self.graph.get_edge_data(u, v)
+                        if data_uv:
+                            # data_uv is a dict of keys -> edge data
+                            first_key = next(iter(data_uv))
+                            rel = data_uv[first_key].get('relation')
+                        else:
+                            # Fallback to relation stored in simplified graph, if any
+                            rel = G.get_edge_data(u, v).get('relation') if G.has_edge(u, v) else None
+                        rels.append(rel)
+                    cycles.append({'nodes': closed_nodes, 'relations': rels})
+                else:
+                    cycles.append({'nodes': closed_nodes})
+            span.add('edges_scanned', self.graph.number_of_edges())
+            span.add('cycles_enumerated', enumerated)
+            span.add('results', len(cycles))
+            return cycles
 
     def find_loop_similarities(self, min_node_jaccard: float = 0.5, min_relation_jaccard: float = 0.5,
                                max_length: int = None, max_cycles: int = 500) -> List[dict]:
@@ -251,38 +961,45 @@ class ScientificKnowledgeGraph:
               'relation_jaccard': float, 'len_i': int, 'len_j': int, 'loop_i': {...}, 'loop_j': {...} }
             Sorted by combined score (average of both Jaccards) descending.
         """
-        loops = self.find_loops(max_length=max_length, max_cycles=max_cycles, include_relations=True)
-        results: List[dict] = []
-        
-        def jaccard_set(a: Set, b: Set) -> float:
-            if not a and not b:
-                return 1.0
-            inter = len(a & b)
-            union = len(a | b)
-            return inter / union if union else 0.0
-        
-        for i in range(len(loops)):
-            nodes_i = set(loops[i]['nodes'][:-1])  # drop closing node
-            rels_i = set(loops[i].get('relations', []))
-            for j in range(i + 1, len(loops)):
-                nodes_j = set(loops[j]['nodes'][:-1])
-                rels_j = set(loops[j].get('relations', []))
-                node_j = jaccard_set(nodes_i, nodes_j)
-                rel_j = jaccard_set(rels_i, rels_j)
-                if node_j >= min_node_jaccard and rel_j >= min_relation_jaccard:
-                    results.append({
-                        'i': i,
-                        'j': j,
-                        'node_jaccard': round(node_j, 4),
-                        'relation_jaccard': round(rel_j, 4),
-                        'len_i': len(nodes_i),
-                        'len_j': len(nodes_j),
-                        'loop_i': loops[i],
-                        'loop_j': loops[j]
-                    })
-        # Sort by average of jaccards desc
-        results.sort(key=lambda x: (x['node_jaccard'] + x['relation_jaccard']) / 2, reverse=True)
-        return results
+        with self._span('find_loop_similarities', max_length=max_length, max_cycles=max_cycles,
+                        strategy='pairwise Jaccard over enumerated loops') as span:
+            loops = self.find_loops(max_length=max_length, max_cycles=max_cycles, include_relations=True)
+            results: List[dict] = []
+        
+            def jaccard_set(a: Set, b: Set) -> float:
+                if not a and not b:
+                    return 1.0
+                inter = len(a & b)
+                union = len(a | b)
+                return inter / union if union else 0.0
+        
+            pairs_compared = 0
+            for i in range(len(loops)):
+                nodes_i = set(loops[i]['nodes'][:-1])  # drop closing node
+                rels_i = set(loops[i].get('relations', []))
+                for j in range(i + 1, len(loops)):
+                    nodes_j = set(loops[j]['nodes'][:-1])
+                    rels_j = set(loops[j].get('relations', []))
+                    pairs_compared += 1
+                    node_j = jaccard_set(nodes_i, nodes_j)
+                    rel_j = jaccard_set(rels_i, rels_j)
+                    if node_j >= min_node_jaccard and rel_j >= min_relation_jaccard:
+                        results.append({
+                            'i': i,
+                            'j': j,
+                            'node_jaccard': round(node_j, 4),
+                            'relation_jaccard': round(rel_j, 4),
+                            'len_i': len(nodes_i),
+                            'len_j': len(nodes_j),
+                            'loop_i': loops[i],
+                            'loop_j': loops[j]
+                        })
+            # Sort by average of jaccards desc
+            results.sort(key=lambda x: (x['node_jaccard'] + x['relation_jaccard']) / 2, reverse=True)
+            span.add('loops', len(loops))
+            span.add('pairs_compared', pairs_compared)
+            span.add('results', len(results))
+            return results
     
     def save_to_json(self, filename: str):
         """Export the knowledge graph to JSON format."""
@@ -319,14 +1036,11 @@ class ScientificKnowledgeGraph:
         
         self.metadata = data.get('metadata', {})
         
-        for edge in data['edges']:
-            self.add_triple(
-                edge['source'],
-                edge['relation'],
-                edge['target'],
-                confidence=edge.get('confidence', 1.0),
-                source=edge.get('source_type', 'manual')
-            )
+        self.add_triples((edge['source'], edge['relation'], edge['target'],
+                          edge.get('confidence', 1.0), edge.get('source_type', 'manual'))
+                         for edge in data['edges'])
+        # A freshly loaded graph has no useful history for clients to replay
+        self.changes.clear(self.version)
     
     def visualize(self, concept: str = None, radius: int = 2, figsize=(12, 8)):
         """
@@ -337,149 +1051,129 @@ class ScientificKnowledgeGraph:
             radius: Size of neighborhood to shown
             figsize: Figure size
         """
-        if concept:
-            nodes_to_show = self.get_concept_neighborhood(concept, radius)
-            subgraph = self.graph.subgraph(nodes_to_show)
-        else:
-            subgraph = self.graph
-
-        # Adaptive figure size based on number of nodes
-        n_nodes = subgraph.number_of_nodes()
-        if n_nodes == 0:
-            # Empty graph - just show message
-            plt.figure(figsize=figsize)
-            plt.text(0.5, 0.5, 'Empty graph', ha='center', va='center', transform=plt.gca().transAxes)
-            return
-        
-        if n_nodes > 0:
-            w = max(figsize[0], min(24, 10 + n_nodes * 0.4))
-            h = max(figsize[1], min(18, 6 + n_nodes * 0.3))
-            plt.figure(figsize=(w, h))
-        else:
-            plt.figure(figsize=figsize)
-
-        # Create layout with increased spacing to reduce overlap
-        try:
-            if n_nodes == 1:
-                # Single node - place it in the center
-                pos = {list(subgraph.nodes())[0]: (0, 0)}
-            elif n_nodes <= 50 and n_nodes > 1:
-                # Kamada-Kawai spreads small graphs nicely
-                try:
-                    pos = nx.kamada_kawai_layout(subgraph)
-                except (ValueError, Exception) as e:
-                    # Fallback if kamada_kawai fails (e.g., disconnected components)
-                    import math
-                    sqrt_n = math.sqrt(n_nodes) if n_nodes > 0 else 1.0
-                    k = 2.0 / sqrt_n + 0.15
-                    pos = nx.spring_layout(subgraph, k=k, iterations=300, seed=42)
-            else:
-                # Tune spring layout: larger k => more spacing
-                import math
-                sqrt_n = math.sqrt(n_nodes) if n_nodes > 0 else 1.0
-                k = 2.0 / sqrt_n + 0.15
-                pos = nx.spring_layout(subgraph, k=k, iterations=300, seed=42)
-        except Exception as e:
-            # Final fallback: use default spring layout
-            print(f"Warning: Layout algorithm failed, using default spring layout: {e}")
-            pos = nx.spring_layout(subgraph, seed=42)
-
-        # Node/label sizing scales with graph size
-        node_size = max(600, 3000 - n_nodes * 30)
-        font_size = max(6, 12 - int(n_nodes * 0.1))
-
-        # Draw nodes
-        nx.draw_networkx_nodes(
-            subgraph,
-            pos,
-            node_color='lightblue',
-            node_size=node_size,
-            alpha=0.9
-        )
-
-        # Draw edges with different colors for different relations
-        edge_colors = {
-            'is_a': 'blue',
-            'part_of': 'green',
-            'prerequisite_of': 'red',
-            'related_to': 'gray',
-            'has_equation': 'purple'
-        }
-        
-        has_labeled_edges = False
-        for relation in self.relation_types:
-            edges = [(u, v) for u, v, d in subgraph.edges(data=True)
-                    if d.get('relation') == relation]
-            if edges:
-                nx.draw_networkx_edges(
-                    subgraph,
-                    pos,
-                    edges,
-                    edge_color=edge_colors.get(relation, 'gray'),
-                    arrows=True,
-                    arrowsize=16,
-                    width=max(1.0, 2.5 - n_nodes * 0.02),
-                    label=relation
-                )
-                has_labeled_edges = True
-        
-        # Draw labels
-        nx.draw_networkx_labels(
-            subgraph,
-            pos,
-            font_size=font_size,
-            bbox=dict(facecolor='white', alpha=0.7, edgecolor='none', pad=0.5)
-        )
-        
-        plt.margins(0.2)
-        
-        # Only create legend if there are labeled edges
-        # Check for labeled artists before attempting to create legend
-        if has_labeled_edges:
-            try:
-                handles, labels = plt.gca().get_legend_handles_labels()
-                if handles and labels and len(handles) > 0:
-                    plt.legend(handles, labels, loc='best', fontsize=8)
-            except (ValueError, AttributeError):
-                # No labeled artists or legend creation failed - silently skip
-                pass
-            except Exception:
-                # Other errors - silently skip
-                pass
-        plt.axis('off')
-        plt.tight_layout()
-        return plt
+        # matplotlib is only imported when a visualization is actually requested
+        from classes.kg_visualization import draw_graph
+        return draw_graph(self, concept=concept, radius=radius, figsize=figsize)
 
     def export_subgraph(self, center: Optional[str] = None, radius: int = 1,
                         relations: Optional[Set[str]] = None,
-                        direction: str = 'both') -> dict:
+                        direction: str = 'both',
+                        max_nodes: Optional[int] = None) -> dict:
         """Export a D3-friendly subgraph.
 
+        With a center, the neighborhood is gathered by a BFS that only follows
+        edges in `direction` whose relation is in `relations`, and links are
+        collected from the adjacency of the visited nodes, so the cost is
+        proportional to the neighborhood rather than the whole graph.
+
         Args:
             center: If provided, take neighborhood around this node; if None, use full graph
             radius: Neighborhood radius (ignored if center is None)
-            relations: If provided, include only edges whose relation is in this set
+            relations: If provided, include (and traverse) only edges whose relation is in this set
             direction: Direction used for neighborhood gathering ('in', 'out', 'both')
+            max_nodes: Stop the expansion once this many nodes are collected (ignored if center is None)
 
         Returns:
-            dict with 'nodes' and 'links' lists suitable for D3 rendering
+            dict with 'nodes' and 'links' lists suitable for D3 rendering; with a
+            center it also has 'truncated', True if max_nodes cut the expansion short
+
+        Raises:
+            nx.NetworkXError: if the center is not in the graph
         """
-        if center:
-            nodes_set = self.get_concept_neighborhood(center, radius)
-        else:
-            nodes_set = set(self.graph.nodes())
+        if direction not in ('in', 'out', 'both'):
+            raise ValueError("direction must be 'in', 'out' or 'both'")
+        if not center:
+            return self._export_full(relations)
+
+        with self._span('export_subgraph', center=center, radius=radius, direction=direction,
+                        strategy='frontier BFS (index lookups)' if relations is not None else 'frontier BFS') as span:
+            if center not in self.graph:
+                raise nx.NetworkXError(f"The node {center} is not in the digraph.")
+            order = [center]
+            visited = {center}
+            frontier = [center]
+            edges_scanned = 0
+            truncated = False
+            for _ in range(radius):
+                next_frontier = []
+                for node in frontier:
+                    for neighbor in self._adjacent(node, relations, direction):
+                        edges_scanned += 1
+                        if neighbor in visited:
+                            continue
+                        if max_nodes is not None and len(order) >= max_nodes:
+                            truncated = True
+                            break
+                        visited.add(neighbor)
+                        order.append(neighbor)
+                        next_frontier.append(neighbor)
+                    if truncated:
+                        break
+                if truncated or not next_frontier:
+                    break
+                frontier = next_frontier
+
+            nodes = []
+            for n in order:
+                meta = self.metadata.get(n, {})
+                nodes.append({'id': n, 'group': meta.get('type', 'concept')})
+
+            # Induced links: every edge between visited nodes starts at one of them
+            links = []
+            for u in order:
+                if relations is not None:
+                    out_by_relation = self.index.spo.get(u, {})
+                    for rel in relations:
+                        for v, count in out_by_relation.get(rel, {}).items():
+                            edges_scanned += 1
+                            if v in visited:
+                                links.extend({'source': u, 'target': v, 'relation': rel}
+                                             for _ in range(count))
+                else:
+                    for v, edges in self.graph.succ[u].items():
+                        edges_scanned += len(edges)
+                        if v in visited:
+                            for data in edges.values():
+                                links.append({'source': u, 'target': v, 'relation': data.get('relation')})
+
+            span.add('nodes_visited', len(order))
+            span.add('edges_scanned', edges_scanned)
+            span.add('links', len(links))
+            return {'nodes': nodes, 'links': links, 'truncated': truncated}
+
+    def _adjacent(self, node: str, relations: Optional[Set[str]], direction: str) -> Iterator[str]:
+        """Neighbors of `node` along edges in `direction`, restricted to `relations` if given."""
+        if direction in ('out', 'both'):
+            if relations is not None:
+                out_by_relation = self.index.spo.get(node, {})
+                for rel in relations:
+                    yield from out_by_relation.get(rel, ())
+            else:
+                yield from self.graph.succ[node]
+        if direction in ('in', 'both'):
+            if relations is not None:
+                for rel in relations:
+                    yield from self.index.pos.get(rel, {}).get(node, ())
+            else:
+                yield from self.graph.pred[node]
 
-        nodes = []
-        for n in nodes_set:
-            meta = self.metadata.get(n, {})
-            nodes.append({'id': n, 'group': meta.get('type', 'concept')})
+    def _export_full(self, relations: Optional[Set[str]] = None) -> dict:
+        with self._span('export_subgraph', strategy='full graph scan') as span:
+            nodes = []
+            for n in self.graph.nodes():
+                meta = self.metadata.get(n, {})
+                nodes.append({'id': n, 'group': meta.get('type', 'concept')})
 
-        links = []
-        for u, v, data in self.graph.edges(data=True):
-            if u in nodes_set and v in nodes_set:
+            links = []
+            edges_scanned = 0
+            for u, v, data in self.graph.edges(data=True):
+                edges_scanned += 1
                 rel = data.get('relation')
                 if relations is None or rel in relations:
                     links.append({'source': u, 'target': v, 'relation': rel})
 
-        return {'nodes': nodes, 'links': links}
+            span.add('nodes_visited', len(nodes))
+            span.add('edges_scanned', edges_scanned)
+            span.add('links', len(links))
+            return {'nodes': nodes, 'links': links}
 
@@ -0,0 +1,215 @@
+"""
+Centrality analytics on a SciPy sparse adjacency of the knowledge graph.
+
+The MultiDiGraph (optionally restricted to one relation) is turned into a
+CSR matrix whose entry (i, j) counts the edges i -> j. On top of it:
+
+- degree:      in/out/total edge counts
+- pagerank:    power iteration with dangling-node redistribution; after an
+               edit the previous vector is reused as the starting point, so
+               small changes converge in a few iterations
+- hits:        hub/authority power iteration
+- betweenness: Brandes' algorithm from a sample of source nodes (exact when
+               the graph has fewer nodes than the sample size)
+
+Results are cached by graph version. numpy/scipy are only imported when
+this module is, which the graph class does on first use.
+"""
+
+import random
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+METRICS = ('degree', 'pagerank', 'hits_hub', 'hits_authority', 'betweenness')
+
+
+class CentralityAnalytics:
+    """Version-cached centrality computations for one ScientificKnowledgeGraph."""
+
+    def __init__(self, kg):
+        self.kg = kg
+        self._cache: Dict[tuple, object] = {}
+        self._cache_version = kg.version
+        # relation -> (node order, pagerank vector) from the last computation, for warm starts
+        self._last_pagerank: Dict[Optional[str], Tuple[List[str], np.ndarray]] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.last_pagerank_iterations = 0
+
+    def _cached(self, key: tuple, compute):
+        if self._cache_version != self.kg.version:
+            self._cache.clear()
+            self._cache_version = self.kg.version
+        if key in self._cache:
+            self.cache_hits += 1
+            return self._cache[key]
+        self.cache_misses += 1
+        value = compute()
+        self._cache[key] = value
+        return value
+
+    # ---- adjacency ------------------------------------------------------
+
+    def adjacency(self, relation: Optional[str] = None) -> Tuple[List[str], sp.csr_matrix]:
+        """Node order and CSR adjacency (edge multiplicities) for all or one relation."""
+        def build():
+            nodes = list(self.kg.graph.nodes())
+            position = {n: i for i, n in enumerate(nodes)}
+            rows, cols = [], []
+            if relation is None:
+                for u, v in self.kg.graph.edges():
+                    rows.append(position[u])
+                    cols.append(position[v])
+            else:
+                for u, _, v in self.kg.index.match(p=relation):
+                    count = self.kg.index.multiplicity(u, relation, v)
+                    rows.extend([position[u]] * count)
+                    cols.extend([position[v]] * count)
+            data = np.ones(len(rows), dtype=np.float64)
+            matrix = sp.csr_matrix((data, (rows, cols)), shape=(len(nodes), len(nodes)))
+            matrix.sum_duplicates()
+            return nodes, matrix
+        return self._cached(('adjacency', relation), build)
+
+    # ---- metrics --------------------------------------------------------
+
+    def degree(self, relation: Optional[str] = None) -> Dict[str, np.ndarray]:
+        def compute():
+            _, A = self.adjacency(relation)
+            out_deg = np.asarray(A.sum(axis=1)).ravel()
+            in_deg = np.asarray(A.sum(axis=0)).ravel()
+            return {'in': in_deg, 'out': out_deg, 'total': in_deg + out_deg}
+        return self._cached(('degree', relation), compute)
+
+    def pagerank(self, relation: Optional[str] = None, alpha: float = 0.85,
+                 tol: float = 1e-10, max_iter: int = 200) -> np.ndarray:
+        def compute():
+            nodes, A = self.adjacency(relation)
+            n = len(nodes)
+            if n == 0:
+                return np.zeros(0)
+            out_deg = np.asarray(A.sum(axis=1)).ravel()
+            dangling = out_deg == 0
+            inv = np.zeros(n)
+            inv[~dangling] = 1.0 / out_deg[~dangling]
+            # Column-stochastic transpose: x_new = alpha * M @ x + ...
+            M = (sp.diags(inv) @ A).T.tocsr()
+            x = self._warm_start(relation, nodes)
+            iterations = 0
+            for iterations in range(1, max_iter + 1):
+                x_new = alpha * (M @ x + x[dangling].sum() / n) + (1.0 - alpha) / n
+                x_new /= x_new.sum()
+                delta = np.abs(x_new - x).sum()
+                x = x_new
+                if delta < n * tol:
+                    break
+            self.last_pagerank_iterations = iterations
+            self._last_pagerank[relation] = (nodes, x)
+            return x
+        return self._cached(('pagerank', relation, alpha), compute)
+
+    def _warm_start(self, relation: Optional[str], nodes: List[str]) -> np.ndarray:
+        n = len(nodes)
+        previous = self._last_pagerank.get(relation)
+        x = np.full(n, 1.0 / n)
+        if previous is not None:
+            old_nodes, old_x = previous
+            old_position = {node: i for i, node in enumerate(old_nodes)}
+            for i, node in enumerate(nodes):
+                j = old_position.get(node)
+                if j is not None:
+                    x[i] = old_x[j]
+            x /= x.sum()
+        return x
+
+    def hits_scores(self, relation: Optional[str] = None, tol: float = 1e-10,
+                    max_iter: int = 200) -> Tuple[np.ndarray, np.ndarray]:
+        """(hubs, authorities), each normalized to sum to 1."""
+        def compute():
+            nodes, A = self.adjacency(relation)
+            n = len(nodes)
+            if n == 0 or A.nnz == 0:
+                return np.zeros(n), np.zeros(n)
+            AT = A.T.tocsr()
+            hubs = np.full(n, 1.0 / n)
+            for _ in range(max_iter):
+                authorities = AT @ hubs
+                authorities /= authorities.sum() or 1.0
+                new_hubs = A @ authorities
+                new_hubs /= new_hubs.sum() or 1.0
+                delta = np.abs(new_hubs - hubs).sum()
+                hubs = new_hubs
+                if delta < n * tol:
+                    break
+            return hubs, authorities
+        return self._cached(('hits', relation), compute)
+
+    def betweenness(self, relation: Optional[str] = None, samples: int = 64,
+                    seed: int = 42) -> np.ndarray:
+        """Normalized (directed) betweenness, estimated from `samples` BFS sources."""
+        def compute():
+            nodes, A = self.adjacency(relation)
+            n = len(nodes)
+            scores = np.zeros(n)
+            if n < 3:
+                return scores
+            indptr, indices = A.indptr, A.indices
+            sources = list(range(n))
+            if samples < n:
+                sources = random.Random(seed).sample(sources, samples)
+            for s in sources:
+                # Brandes: BFS from s counting shortest paths, then back-propagate dependencies
+                sigma = [0] * n
+                dist = [-1] * n
+                preds = [[] for _ in range(n)]
+                sigma[s], dist[s] = 1, 0
+                order = [s]
+                head = 0
+                while head < len(order):
+                    v = order[head]
+                    head += 1
+                    for w in indices[indptr[v]:indptr[v + 1]]:
+                        if dist[w] < 0:
+                            dist[w] = dist[v] + 1
+                            order.append(w)
+                        if dist[w] == dist[v] + 1:
+                            sigma[w] += sigma[v]
+                            preds[w].append(v)
+                delta = [0.0] * n
+                for w in reversed(order):
+                    for v in preds[w]:
+                        delta[v] += sigma[v] / sigma[w] * (1.0 + delta[w])
+                    if w != s:
+                        scores[w] += delta[w]
+            scale = (n / len(sources)) / ((n - 1) * (n - 2))
+            return scores * scale
+        return self._cached(('betweenness', relation, samples, seed), compute)
+
+    # ---- ranking --------------------------------------------------------
+
+    def scores(self, metric: str, relation: Optional[str] = None) -> np.ndarray:
+        if metric == 'degree':
+            return self.degree(relation)['total']
+        if metric == 'pagerank':
+            return self.pagerank(relation)
+        if metric == 'hits_hub':
+            return self.hits_scores(relation)[0]
+        if metric == 'hits_authority':
+            return self.hits_scores(relation)[1]
+        if metric == 'betweenness':
+            return self.betweenness(relation)
+        raise ValueError(f"Unknown metric '{metric}' (choose from {', '.join(METRICS)})")
+
+    def top(self, metric: str = 'pagerank', k: int = 10,
+            relation: Optional[str] = None) -> List[dict]:
+        """The k highest-scoring concepts for a metric, as [{'concept', 'score'}]."""
+        nodes, _ = self.adjacency(relation)
+        values = self.scores(metric, relation)
+        if len(values) == 0 or k <= 0:
+            return []
+        k = min(k, len(values))
+        idx = np.argpartition(-values, k - 1)[:k]
+        idx = idx[np.lexsort((np.array([nodes[i] for i in idx]), -values[idx]))]
+        return [{'concept': nodes[i], 'score': round(float(values[i]), 8)} for i in idx]
@@ -0,0 +1,69 @@
+"""
+Bounded change feed for incremental client sync.
+
+Every mutation of a ScientificKnowledgeGraph is appended here tagged with
+the graph version it produced. A client that knows the version its copy was
+taken at asks for everything newer and patches its copy; once the feed has
+dropped entries the client still needs, it is told to resync instead.
+
+Each feed has a random id that changes whenever its history is reset (new
+graph, file reload), so a client holding a version number from another
+graph is told to resync rather than being handed unrelated changes.
+"""
+
+import uuid
+from collections import deque
+from typing import List, Optional, Tuple
+
+DEFAULT_MAX_CHANGES = 10000
+
+
+class ChangeFeed:
+    """The most recent `max_changes` mutations, oldest first."""
+
+    def __init__(self, max_changes: int = DEFAULT_MAX_CHANGES):
+        self._entries = deque(maxlen=max_changes)
+        # Highest version whose change has been dropped; clients older than this must resync
+        self.trimmed_version = 0
+        self.id = uuid.uuid4().hex[:12]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def record(self, version: int, op: str, **fields):
+        if len(self._entries) == self._entries.maxlen:
+            self.trimmed_version = self._entries[0]['version']
+        entry = {'version': version, 'op': op}
+        entry.update(fields)
+        self._entries.append(entry)
+
+    def since(self, version: int, current_version: int, limit: Optional[int] = None,
+              feed_id: Optional[str] = None) -> Tuple[Optional[List[dict]], bool]:
+        """
+        Changes with a version greater than `version`.
+
+        Returns:
+            (changes, more): changes is None if the history no longer reaches
+            back to `version` (or `version` is in the future), meaning the
+            client must reload; `more` is True if `limit` cut the list short
+        """
+        if feed_id is not None and feed_id != self.id:
+            return None, False
+        if version < self.trimmed_version or version > current_version:
+            return None, False
+        changes = []
+        # Entries are in version order, so scan backwards to the first one the client has
+        for entry in reversed(self._entries):
+            if entry['version'] <= version:
+                break
+            changes.append(entry)
+        changes.reverse()
+        if limit is not None and len(changes) > limit:
+            return changes[:limit], True
+        return changes, False
+
+    def clear(self, version: int):
+        """Forget all history, e.g. after the graph was replaced wholesale."""
+        self._entries.clear()
+        self.trimmed_version = version
+        self.id = uuid.uuid4().hex[:12]
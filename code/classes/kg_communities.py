@@ -0,0 +1,158 @@
+"""
+Community detection and clustered overview exports.
+
+Communities are found on the undirected projection of the graph, where the
+weight of {u, v} is the number of triples between u and v in either
+direction. Louvain (modularity optimisation) is the default; label
+propagation is available as a cheaper alternative for very large graphs.
+
+The overview export collapses each community into a single super-node and
+aggregates the triples between communities into weighted links. Only the
+largest `max_communities` communities get their own super-node; the rest
+(singletons and fragments of sparse graphs) share one "other" node, so the
+payload is bounded even when the graph falls apart into thousands of
+communities. Selected communities can be expanded back into their member
+concepts.
+"""
+
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional
+
+import networkx as nx
+
+METHODS = ('louvain', 'label_propagation')
+# Super-nodes in an overview before smaller communities are merged into OTHER_NODE_ID
+DEFAULT_MAX_COMMUNITIES = 50
+OTHER_NODE_ID = 'community:other'
+
+
+def community_node_id(community: int) -> str:
+    return f'community:{community}'
+
+
+class CommunityPartition:
+    """A partition of the graph's concepts into numbered communities.
+
+    Community 0 is the largest; ties are broken by the alphabetically first member.
+    """
+
+    def __init__(self, kg, method: str = 'louvain', seed: int = 42):
+        if method not in METHODS:
+            raise ValueError(f"Unknown community method '{method}' (choose from {', '.join(METHODS)})")
+        self.method = method
+        projection = nx.Graph()
+        projection.add_nodes_from(kg.graph.nodes())
+        for u, v in kg.graph.edges():
+            if u == v:
+                continue
+            if projection.has_edge(u, v):
+                projection[u][v]['weight'] += 1
+            else:
+                projection.add_edge(u, v, weight=1)
+
+        if projection.number_of_edges() == 0:
+            groups = [{n} for n in projection.nodes()]
+        elif method == 'louvain':
+            groups = nx.community.louvain_communities(projection, weight='weight', seed=seed)
+        else:
+            groups = list(nx.community.asyn_lpa_communities(projection, weight='weight', seed=seed))
+
+        ordered = sorted((sorted(g) for g in groups), key=lambda members: (-len(members), members[0]))
+        self.communities: List[List[str]] = ordered
+        self.membership: Dict[str, int] = {n: i for i, members in enumerate(ordered) for n in members}
+        self.modularity = (nx.community.modularity(projection, groups, weight='weight')
+                           if projection.number_of_edges() else 0.0)
+        degree = dict(projection.degree(weight='weight'))
+        # Best-connected member names the community in the collapsed view
+        self.labels: List[str] = [min(members, key=lambda n: (-degree[n], n))
+                                  for members in ordered]
+
+    def __len__(self) -> int:
+        return len(self.communities)
+
+    def summary(self, include_members: bool = False) -> List[dict]:
+        result = []
+        for i, members in enumerate(self.communities):
+            item = {'id': i, 'label': self.labels[i], 'size': len(members)}
+            if include_members:
+                item['members'] = members
+            result.append(item)
+        return result
+
+
+def overview(kg, partition: CommunityPartition, expand: Optional[Iterable[int]] = None,
+             max_communities: int = DEFAULT_MAX_COMMUNITIES) -> dict:
+    """
+    D3-friendly overview: collapsed communities as super-nodes, expanded ones as concepts.
+
+    Communities beyond the `max_communities` largest that are not expanded
+    are merged into a single OTHER_NODE_ID super-node. Links between two
+    concepts of expanded communities are kept as-is; every other link is
+    aggregated per (source, target) display node and carries a 'count', a
+    per-relation breakdown and the most frequent relation.
+    """
+    if max_communities < 1:
+        raise ValueError('max_communities must be at least 1')
+    expanded = {c for c in (expand or ()) if 0 <= c < len(partition)}
+    membership = partition.membership
+
+    def display(n: str) -> str:
+        c = membership[n]
+        if c in expanded:
+            return n
+        return community_node_id(c) if c < max_communities else OTHER_NODE_ID
+
+    nodes = []
+    internal_edges: Counter = Counter()
+    other_communities = other_size = 0
+    for c, members in enumerate(partition.communities):
+        if c in expanded:
+            for n in members:
+                meta = kg.metadata.get(n, {})
+                nodes.append({'id': n, 'group': meta.get('type', 'concept'), 'community': c})
+        elif c < max_communities:
+            nodes.append({'id': community_node_id(c), 'group': 'community', 'community': c,
+                          'label': partition.labels[c], 'size': len(members)})
+        else:
+            other_communities += 1
+            other_size += len(members)
+    if other_communities:
+        nodes.append({'id': OTHER_NODE_ID, 'group': 'community', 'community': None,
+                      'label': f'{other_communities} smaller communities', 'size': other_size,
+                      'merged_communities': other_communities})
+
+    links = []
+    aggregated: Dict[tuple, Counter] = defaultdict(Counter)
+    for u, v, data in kg.graph.edges(data=True):
+        rel = data.get('relation')
+        if membership[u] in expanded and membership[v] in expanded:
+            links.append({'source': u, 'target': v, 'relation': rel})
+            continue
+        source, target = display(u), display(v)
+        if source == target:
+            internal_edges[source] += 1
+        else:
+            aggregated[(source, target)][rel] += 1
+
+    for (source, target), relations in aggregated.items():
+        links.append({
+            'source': source,
+            'target': target,
+            'relation': relations.most_common(1)[0][0],
+            'count': sum(relations.values()),
+            'relations': dict(relations),
+        })
+    for node in nodes:
+        if node['group'] == 'community':
+            node['internal_edges'] = internal_edges[node['id']]
+
+    return {
+        'nodes': nodes,
+        'links': links,
+        'communities': len(partition),
+        'expanded': sorted(expanded),
+        'max_communities': max_communities,
+        'merged_communities': other_communities,
+        'method': partition.method,
+        'modularity': round(partition.modularity, 6),
+    }
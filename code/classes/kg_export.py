@@ -0,0 +1,79 @@
+"""
+Line-oriented triple serializations for streaming exports (and imports).
+
+Each format turns one triple dict from `ScientificKnowledgeGraph.iter_triples()`
+into one line, so an export can be written out while the triples are being
+generated:
+
+- ndjson:   {"subject": ..., "predicate": ..., "object": ..., "confidence": ..., "source": ...}
+- ntriples: <concept IRI> <relation IRI> <concept IRI> .   (confidence/source are dropped)
+- csv:      subject,predicate,object,confidence,source  (with a header row)
+
+Concept and relation names become IRIs under a base namespace, percent-encoded
+so any name is a valid IRI; `iri_to_name` reverses this for the importer.
+"""
+
+import csv
+import io
+import json
+from typing import Iterable, Iterator
+from urllib.parse import quote, unquote
+
+DEFAULT_BASE_IRI = 'http://kg.local/'
+CSV_COLUMNS = ('subject', 'predicate', 'object', 'confidence', 'source')
+
+FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'ntriples': ('application/n-triples', 'nt'),
+    'csv': ('text/csv', 'csv'),
+}
+
+
+def concept_iri(name: str, base: str = DEFAULT_BASE_IRI) -> str:
+    return f'<{base}concept/{quote(name, safe="")}>'
+
+
+def relation_iri(name: str, base: str = DEFAULT_BASE_IRI) -> str:
+    return f'<{base}relation/{quote(name, safe="")}>'
+
+
+def iri_to_name(iri: str) -> str:
+    """Local name of an IRI (the part after the last '/' or '#'), percent-decoded."""
+    cut = max(iri.rfind('/'), iri.rfind('#'))
+    return unquote(iri[cut + 1:])
+
+
+def serialize(triples: Iterable[dict], fmt: str, base: str = DEFAULT_BASE_IRI,
+              chunk_lines: int = 1000) -> Iterator[str]:
+    """
+    Yield the serialized triples in chunks of `chunk_lines` lines.
+
+    Raises:
+        ValueError: if the format is unknown
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}' (choose from {', '.join(FORMATS)})")
+    buffer = io.StringIO()
+    writer = None
+    if fmt == 'csv':
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(CSV_COLUMNS)
+    lines = 0
+    for t in triples:
+        if fmt == 'ndjson':
+            buffer.write(json.dumps(t, ensure_ascii=False))
+            buffer.write('\n')
+        elif fmt == 'ntriples':
+            buffer.write(f"{concept_iri(t['subject'], base)} {relation_iri(t['predicate'], base)} "
+                         f"{concept_iri(t['object'], base)} .\n")
+        else:
+            writer.writerow([t[column] for column in CSV_COLUMNS])
+        lines += 1
+        if lines >= chunk_lines:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            lines = 0
+    rest = buffer.getvalue()
+    if rest:
+        yield rest
@@ -0,0 +1,218 @@
+"""
+Datalog-style rule inference over the graph's triple indexes.
+
+Rules have a conjunctive body of triple patterns and a single head pattern,
+using the same '?variable' syntax as BGP queries:
+
+    transitive('is_a'):        ?x is_a ?y . ?y is_a ?z        =>  ?x is_a ?z
+    inherit('part_of'):        ?x is_a ?y . ?y part_of ?z     =>  ?x part_of ?z
+    inverse('part_of', 'has_part'):  ?x part_of ?y            =>  ?y has_part ?x
+
+Derived triples are materialized into their own TripleIndex (disjoint from the
+base facts) with semi-naive evaluation: each round only joins the facts that
+were new in the previous round against the full store. Additions are
+propagated the same way; removals use delete-and-rederive (DRed): over-delete
+everything reachable from the removed fact, then restore what still has an
+alternative derivation.
+"""
+
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from classes.kg_query import is_variable, parse_query
+from classes.kg_triple_index import TripleIndex
+
+Triple = Tuple[str, str, str]
+Pattern = Tuple[str, str, str]
+MatchFn = Callable[[Optional[str], Optional[str], Optional[str]], Iterable[Triple]]
+
+
+class Rule:
+    """A Horn rule: body patterns (conjunction) => head pattern."""
+
+    def __init__(self, name: str, body, head):
+        self.name = name
+        self.body: List[Pattern] = parse_query(body)
+        heads = parse_query(head) if isinstance(head, str) else [tuple(head)]
+        if len(heads) != 1:
+            raise ValueError(f"Rule '{name}' must have exactly one head pattern")
+        self.head: Pattern = heads[0]
+        body_vars = {t for pattern in self.body for t in pattern if is_variable(t)}
+        unbound = [t for t in self.head if is_variable(t) and t not in body_vars]
+        if unbound:
+            raise ValueError(f"Rule '{name}': head variables {unbound} do not appear in the body")
+
+    def __repr__(self):
+        body = ' . '.join(' '.join(p) for p in self.body)
+        return f"Rule({self.name}: {body} => {' '.join(self.head)})"
+
+
+def transitive(relation: str) -> Rule:
+    return Rule(f'transitive:{relation}',
+                [('?x', relation, '?y'), ('?y', relation, '?z')], ('?x', relation, '?z'))
+
+
+def inherit(relation: str, via: str = 'is_a') -> Rule:
+    """Subconcepts inherit `relation` from their parents along `via` edges."""
+    return Rule(f'inherit:{relation}:{via}',
+                [('?x', via, '?y'), ('?y', relation, '?z')], ('?x', relation, '?z'))
+
+
+def inverse(relation: str, inverse_relation: str) -> Rule:
+    return Rule(f'inverse:{relation}:{inverse_relation}',
+                [('?x', relation, '?y')], ('?y', inverse_relation, '?x'))
+
+
+DEFAULT_RULES = [
+    transitive('is_a'),
+    transitive('part_of'),
+    transitive('prerequisite_of'),
+    inherit('part_of', via='is_a'),
+]
+
+
+def _unify(pattern: Pattern, fact: Triple, binding: Dict[str, str]) -> Optional[Dict[str, str]]:
+    result = binding
+    for term, value in zip(pattern, fact):
+        if is_variable(term):
+            current = result.get(term)
+            if current is None:
+                if result is binding:
+                    result = dict(binding)
+                result[term] = value
+            elif current != value:
+                return None
+        elif term != value:
+            return None
+    return result
+
+
+def _resolve(term: str, binding: Dict[str, str]) -> Optional[str]:
+    return binding.get(term) if is_variable(term) else term
+
+
+def _solve(patterns: List[Pattern], binding: Dict[str, str], match: MatchFn) -> Iterator[Dict[str, str]]:
+    if not patterns:
+        yield binding
+        return
+    first, rest = patterns[0], patterns[1:]
+    s, p, o = (_resolve(t, binding) for t in first)
+    for fact in match(s, p, o):
+        extended = _unify(first, fact, binding)
+        if extended is not None:
+            yield from _solve(rest, extended, match)
+
+
+def _instantiate(pattern: Pattern, binding: Dict[str, str]) -> Triple:
+    return tuple(binding[t] if is_variable(t) else t for t in pattern)
+
+
+class InferenceEngine:
+    """Materializes rule consequences of a base TripleIndex and keeps them up to date."""
+
+    def __init__(self, base: TripleIndex, rules: Optional[List[Rule]] = None):
+        self.base = base
+        self.rules = list(DEFAULT_RULES if rules is None else rules)
+        self.derived = TripleIndex()
+        self.rounds = 0  # semi-naive rounds run since creation (for tracing)
+        self.materialize()
+
+    # ---- store access -------------------------------------------------
+
+    def match(self, s: Optional[str] = None, p: Optional[str] = None,
+              o: Optional[str] = None) -> Iterator[Triple]:
+        """Matching triples from base facts and derived facts (the two are disjoint)."""
+        yield from self.base.match(s, p, o)
+        yield from self.derived.match(s, p, o)
+
+    def contains(self, triple: Triple) -> bool:
+        return triple in self.base or triple in self.derived
+
+    def is_derived(self, triple: Triple) -> bool:
+        return triple in self.derived
+
+    # ---- evaluation ---------------------------------------------------
+
+    def _consequences(self, delta: List[Triple], match: MatchFn) -> Iterator[Triple]:
+        """Heads derivable with at least one body atom bound to a fact in `delta`."""
+        for rule in self.rules:
+            for i, atom in enumerate(rule.body):
+                others = rule.body[:i] + rule.body[i + 1:]
+                for fact in delta:
+                    binding = _unify(atom, fact, {})
+                    if binding is None:
+                        continue
+                    for solution in _solve(others, binding, match):
+                        yield _instantiate(rule.head, solution)
+
+    def _propagate(self, delta: List[Triple]) -> int:
+        """Semi-naive fixpoint starting from `delta`; returns the number of new derived facts."""
+        added = 0
+        while delta:
+            self.rounds += 1
+            new = []
+            # Collect the round first: the derived index must not change while it is scanned
+            for fact in list(self._consequences(delta, self.match)):
+                if fact in self.base or fact in self.derived:
+                    continue
+                self.derived.add(*fact)
+                new.append(fact)
+            added += len(new)
+            delta = new
+        return added
+
+    def materialize(self) -> int:
+        """Recompute all derived facts from scratch."""
+        self.derived.clear()
+        return self._propagate(list(self.base.match()))
+
+    def _derivable(self, fact: Triple) -> bool:
+        """True if some rule derives `fact` in one step from the current store."""
+        for rule in self.rules:
+            binding = _unify(rule.head, fact, {})
+            if binding is None:
+                continue
+            for _ in _solve(rule.body, binding, self.match):
+                return True
+        return False
+
+    # ---- incremental maintenance --------------------------------------
+
+    def on_add(self, s: str, p: str, o: str) -> int:
+        """Call after a base triple was added."""
+        fact = (s, p, o)
+        if fact in self.derived:
+            # Already known: it just moves from derived to base, no new consequences
+            self.derived.remove(s, p, o, count=self.derived.multiplicity(s, p, o))
+            return 0
+        return self._propagate([fact])
+
+    def on_remove(self, s: str, p: str, o: str) -> int:
+        """Call after the last copy of a base triple was removed (delete and rederive)."""
+        removed_fact = (s, p, o)
+
+        def match_before(ms, mp, mo):
+            yield from self.match(ms, mp, mo)
+            if (ms is None or ms == s) and (mp is None or mp == p) and (mo is None or mo == o):
+                yield removed_fact
+
+        # 1. Over-delete everything derivable through the removed fact
+        overdeleted: Set[Triple] = set()
+        frontier = [removed_fact]
+        while frontier:
+            nxt = []
+            for fact in self._consequences(frontier, match_before):
+                if fact in self.derived and fact not in overdeleted:
+                    overdeleted.add(fact)
+                    nxt.append(fact)
+            frontier = nxt
+        for fact in overdeleted:
+            self.derived.remove(*fact, count=self.derived.multiplicity(*fact))
+
+        # 2. Rederive facts that still have an alternative derivation
+        restored = []
+        for fact in list(overdeleted) + [removed_fact]:
+            if not self.contains(fact) and self._derivable(fact):
+                self.derived.add(*fact)
+                restored.append(fact)
+        self._propagate(restored)
+        return len(overdeleted) - sum(1 for f in overdeleted if f in self.derived)
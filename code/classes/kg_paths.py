@@ -0,0 +1,246 @@
+"""
+Confidence-weighted path search.
+
+A path's confidence is the product of its edge confidences, so the most
+confident path is the shortest path under edge cost -log(confidence)
+(Dijkstra with a binary heap). Between two concepts joined by several edges,
+only the most confident edge among the allowed relations is used.
+
+With a hop bound the search runs over (concept, hops) labels: a label is
+dropped when the concept was already settled with no more hops, since that
+earlier label is at least as confident and at least as short. This keeps the
+search exact under the bound without expanding every hop count.
+
+`k_most_confident_paths` ranks loopless alternatives with Yen's algorithm.
+All spur searches of one query share a collapsed adjacency and an A*
+heuristic (remaining cost to the target, see `_PathSearch`), and stop
+early once they cannot beat the candidates already queued.
+"""
+
+import heapq
+import math
+from itertools import count
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+# (concepts, [(relation, confidence) per hop], total cost)
+_Path = Tuple[List[str], List[Tuple[str, float]], float]
+
+
+class SearchStats:
+    """Work counters of one or more searches, for tracing spans."""
+
+    def __init__(self):
+        self.searches = 0
+        self.nodes_settled = 0
+        self.edges_scanned = 0
+
+
+def _edge_cost(confidence: float) -> float:
+    return -math.log(min(confidence, 1.0))
+
+
+def _best_edges(keyed_neighbors, relations: Optional[Set[str]]) -> Iterator[Tuple[str, str, float]]:
+    """(neighbor, relation, confidence) of the most confident allowed edge to each neighbor."""
+    for neighbor, keyed in keyed_neighbors.items():
+        best_relation, best_confidence = None, 0.0
+        for data in keyed.values():
+            relation = data.get('relation')
+            if relations is not None and relation not in relations:
+                continue
+            confidence = data.get('confidence', 1.0)
+            if confidence > best_confidence:
+                best_relation, best_confidence = relation, confidence
+        if best_confidence > 0.0:
+            yield neighbor, best_relation, best_confidence
+
+
+class _PathSearch:
+    """
+    Searches towards one target over a collapsed, cost-weighted adjacency.
+
+    Every concept's outgoing edges are collapsed once and reused by all spur
+    searches of a Yen run. A reverse Dijkstra from the target, advanced only
+    as far as the searches need, gives remaining costs on the unrestricted
+    graph; these stay admissible (and consistent) lower bounds once nodes or
+    edges are banned, so each spur search is an A* towards the target.
+    Reverse BFS hop counts prune labels that cannot meet the hop bound.
+    """
+
+    def __init__(self, graph, end: str, relations: Optional[Set[str]], max_hops: Optional[int],
+                 stats: Optional[SearchStats] = None):
+        self.graph = graph
+        self.end = end
+        self.relations = relations
+        self.max_hops = max_hops
+        self.stats = stats
+        self._succ: Dict[str, List[Tuple[str, str, float, float]]] = {}
+        # Reverse Dijkstra state: exact remaining costs of settled concepts
+        self.remaining: Dict[str, float] = {}
+        self._reverse_costs: Dict[str, float] = {end: 0.0}
+        self._reverse_heap = [(0.0, end)]
+        self.horizon = 0.0
+        self.remaining_hops = self._reverse_hops() if max_hops is not None else None
+
+    def successors(self, node: str) -> List[Tuple[str, str, float, float]]:
+        edges = self._succ.get(node)
+        if edges is None:
+            edges = [(target, relation, confidence, _edge_cost(confidence))
+                     for target, relation, confidence in _best_edges(self.graph.succ[node], self.relations)]
+            self._succ[node] = edges
+        return edges
+
+    def settle_until(self, node: str):
+        """Continue the reverse Dijkstra from the target until `node` is settled or nothing is left."""
+        remaining, costs, heap = self.remaining, self._reverse_costs, self._reverse_heap
+        while heap and node not in remaining:
+            cost, current = heapq.heappop(heap)
+            if current in remaining:
+                continue
+            remaining[current] = cost
+            self.horizon = cost
+            for source, _, confidence in _best_edges(self.graph.pred[current], self.relations):
+                new_cost = cost + _edge_cost(confidence)
+                if new_cost < costs.get(source, math.inf):
+                    costs[source] = new_cost
+                    heapq.heappush(heap, (new_cost, source))
+        if not heap:
+            self.horizon = math.inf
+
+    def lower_bound(self, node: str) -> float:
+        """
+        Remaining cost from `node` to the target, or a lower bound of it.
+
+        Concepts the reverse search has not settled yet are at least `horizon`
+        away, which keeps the heuristic consistent; once the reverse search is
+        exhausted they cannot reach the target at all.
+        """
+        cost = self.remaining.get(node)
+        return cost if cost is not None else self.horizon
+
+    def _reverse_hops(self) -> Dict[str, int]:
+        hops = {self.end: 0}
+        frontier = [self.end]
+        while frontier and hops[frontier[0]] < self.max_hops:
+            next_frontier = []
+            for node in frontier:
+                for source, _, _ in _best_edges(self.graph.pred[node], self.relations):
+                    if source not in hops:
+                        hops[source] = hops[node] + 1
+                        next_frontier.append(source)
+            frontier = next_frontier
+        return hops
+
+    def run(self, start: str, max_hops: Optional[int] = None, banned_nodes: Set[str] = frozenset(),
+            banned_edges: Set[Tuple[str, str]] = frozenset(), limit: float = math.inf) -> Optional[_Path]:
+        """
+        Most confident path from start to the target avoiding banned nodes/edges.
+
+        Returns None if there is none, or none with cost <= limit.
+        """
+        self.settle_until(start)
+        lower_bound, remaining_hops = self.lower_bound, self.remaining_hops
+        if start not in self.remaining:
+            return None
+        bounded = max_hops is not None
+        if bounded and remaining_hops.get(start, max_hops + 1) > max_hops:
+            return None
+        stats = self.stats
+        costs: Dict[Tuple[str, int], float] = {(start, 0): 0.0}
+        parents: Dict[Tuple[str, int], Tuple[Tuple[str, int], str, float]] = {}
+        settled: Dict[str, int] = {}  # concept -> fewest hops of a settled label
+        tie = count()
+        heap = [(lower_bound(start), 0, next(tie), 0.0, start)]
+        if stats is not None:
+            stats.searches += 1
+
+        while heap:
+            estimate, hops, _, cost, node = heapq.heappop(heap)
+            if estimate > limit:
+                return None
+            if node in settled and (not bounded or settled[node] <= hops):
+                continue
+            settled[node] = hops
+            if stats is not None:
+                stats.nodes_settled += 1
+            label = (node, hops if bounded else 0)
+            if node == self.end:
+                nodes, steps = [node], []
+                while label in parents:
+                    label, relation, confidence = parents[label]
+                    nodes.append(label[0])
+                    steps.append((relation, confidence))
+                return nodes[::-1], steps[::-1], cost
+            for target, relation, confidence, edge_cost in self.successors(node):
+                if stats is not None:
+                    stats.edges_scanned += 1
+                if target in banned_nodes or (node, target) in banned_edges:
+                    continue
+                if bounded and hops + 1 + remaining_hops.get(target, max_hops + 1) > max_hops:
+                    continue
+                if target in settled and (not bounded or settled[target] <= hops + 1):
+                    continue
+                target_label = (target, hops + 1 if bounded else 0)
+                new_cost = cost + edge_cost
+                if new_cost < costs.get(target_label, math.inf):
+                    estimate = new_cost + lower_bound(target)
+                    if estimate == math.inf:
+                        continue
+                    costs[target_label] = new_cost
+                    parents[target_label] = (label, relation, confidence)
+                    heapq.heappush(heap, (estimate, hops + 1, next(tie), new_cost, target))
+        return None
+
+
+def _to_dict(path: _Path) -> dict:
+    nodes, steps, cost = path
+    return {
+        'path': nodes,
+        'relations': [relation for relation, _ in steps],
+        'confidences': [confidence for _, confidence in steps],
+        'confidence': math.exp(-cost),
+        'hops': len(steps),
+    }
+
+
+def k_most_confident_paths(kg, start: str, end: str, k: int, relations: Optional[Set[str]] = None,
+                           max_hops: Optional[int] = None, stats: Optional[SearchStats] = None) -> List[dict]:
+    """Up to k loopless paths in decreasing order of confidence (Yen's algorithm)."""
+    search = _PathSearch(kg.graph, end, relations, max_hops, stats)
+    first = search.run(start, max_hops)
+    if first is None:
+        return []
+    found: List[_Path] = [first]
+    seen = {tuple(first[0])}
+    candidates = []
+    tie = count()
+
+    while len(found) < k:
+        nodes, steps, _ = found[-1]
+        needed = k - len(found)
+        root_cost = 0.0
+        for i in range(len(nodes) - 1):
+            root = nodes[:i + 1]
+            # Spur paths costlier than the candidates already queued could never be returned
+            limit = heapq.nsmallest(needed, candidates)[-1][0] if len(candidates) >= needed else math.inf
+            banned_edges = {(p[0][i], p[0][i + 1]) for p in found
+                            if len(p[0]) > i + 1 and p[0][:i + 1] == root}
+            spur = search.run(nodes[i], None if max_hops is None else max_hops - i,
+                              banned_nodes=set(root[:-1]), banned_edges=banned_edges,
+                              limit=limit - root_cost + 1e-12)
+            root_cost += _edge_cost(steps[i][1])
+            if spur is None:
+                continue
+            candidate_nodes = root[:-1] + spur[0]
+            key = tuple(candidate_nodes)
+            if key in seen:
+                continue
+            seen.add(key)
+            candidate_steps = steps[:i] + spur[1]
+            cost = sum(_edge_cost(confidence) for _, confidence in candidate_steps)
+            heapq.heappush(candidates, (cost, len(candidate_steps), next(tie),
+                                        (candidate_nodes, candidate_steps, cost)))
+        if not candidates:
+            break
+        found.append(heapq.heappop(candidates)[3])
+
+    return [_to_dict(path) for path in found]
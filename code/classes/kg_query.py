@@ -0,0 +1,165 @@
+"""
+Basic-graph-pattern (BGP) queries over a ScientificKnowledgeGraph.
+
+A query is a conjunction of triple patterns whose positions are either
+constants or variables (terms starting with '?'), e.g.
+
+    ?x is_a wave . ?x prerequisite_of ?y
+
+Patterns are ordered greedily by estimated cardinality, using per-relation
+statistics (triple count, distinct subjects, distinct objects) and exact node
+degrees for constant subjects/objects, preferring patterns that share a
+variable with what is already bound. The plan is then executed as an index
+nested-loop join on top of `ScientificKnowledgeGraph.match_triples`.
+"""
+
+import shlex
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+Pattern = Tuple[str, str, str]
+
+
+def is_variable(term: str) -> bool:
+    return isinstance(term, str) and term.startswith('?') and len(term) > 1
+
+
+def parse_query(query: Union[str, Sequence[Sequence[str]]]) -> List[Pattern]:
+    """Parse a query string ('s p o . s p o') or a list of [s, p, o] triples.
+
+    Raises:
+        ValueError: if the query is empty or a pattern does not have 3 terms
+    """
+    if isinstance(query, str):
+        try:
+            tokens = shlex.split(query.replace('\n', ' . '))
+        except ValueError as e:
+            raise ValueError(f"Malformed query: {e}")
+        raw, current = [], []
+        for token in tokens:
+            if token == '.':
+                if current:
+                    raw.append(current)
+                current = []
+            else:
+                current.append(token)
+        if current:
+            raw.append(current)
+    else:
+        raw = [list(p) for p in query]
+
+    patterns = []
+    for terms in raw:
+        if len(terms) != 3 or not all(isinstance(t, str) and t for t in terms):
+            raise ValueError(f"Each pattern needs exactly 3 terms (subject predicate object), got: {terms}")
+        patterns.append(tuple(terms))
+    if not patterns:
+        raise ValueError("Query must contain at least one triple pattern")
+    return patterns
+
+
+def pattern_variables(pattern: Pattern) -> List[str]:
+    return [t for t in pattern if is_variable(t)]
+
+
+def estimate_cardinality(kg, pattern: Pattern, bound: set, stats: dict) -> float:
+    """Estimated number of matches of `pattern` per binding of the variables in `bound`."""
+    s, p, o = pattern
+    s_const, p_const, o_const = not is_variable(s), not is_variable(p), not is_variable(o)
+    s_bound = s_const or s in bound
+    o_bound = o_const or o in bound
+    total = stats['_total']
+
+    if p_const:
+        rel = stats['relations'].get(p)
+        if rel is None:
+            return 0.0
+        count, n_subj, n_obj = rel['count'], rel['subjects'], rel['objects']
+    else:
+        n_rel = max(1, len(stats['relations']))
+        count = total['count']
+        n_subj = total['subjects'] if p not in bound else max(1, total['subjects'] // n_rel)
+        n_obj = total['objects'] if p not in bound else max(1, total['objects'] // n_rel)
+        if p in bound:
+            count = count / n_rel
+
+    estimates = [float(count)]
+    if s_bound and o_bound:
+        estimates.append(count / max(1, n_subj * n_obj))
+    elif s_bound:
+        estimates.append(count / max(1, n_subj))
+    elif o_bound:
+        estimates.append(count / max(1, n_obj))
+    # Exact degrees beat averages when the endpoint is a constant
+    if s_const:
+        estimates.append(float(kg.graph.out_degree(s)) if s in kg.graph else 0.0)
+    if o_const:
+        estimates.append(float(kg.graph.in_degree(o)) if o in kg.graph else 0.0)
+    return min(estimates)
+
+
+def plan_query(kg, patterns: List[Pattern], stats: dict) -> List[dict]:
+    """Order patterns greedily: connected patterns first, then lowest estimated cardinality."""
+    remaining = list(patterns)
+    bound: set = set()
+    plan = []
+    while remaining:
+        def cost(pattern):
+            variables = pattern_variables(pattern)
+            connected = not bound or not variables or any(v in bound for v in variables)
+            return (0 if connected else 1, estimate_cardinality(kg, pattern, bound, stats))
+        best = min(remaining, key=cost)
+        remaining.remove(best)
+        plan.append({
+            'pattern': list(best),
+            'estimated_rows': round(cost(best)[1], 3),
+            'bound_before': sorted(v for v in pattern_variables(best) if v in bound),
+        })
+        bound.update(pattern_variables(best))
+    return plan
+
+
+def _resolve(term: str, binding: Dict[str, str]) -> Optional[str]:
+    if is_variable(term):
+        return binding.get(term)
+    return term
+
+
+def execute_plan(kg, plan: List[dict], counters: Optional[dict] = None,
+                 match=None) -> Iterator[Dict[str, str]]:
+    """Yield variable bindings satisfying every pattern of the plan (may contain duplicates).
+
+    `match(s, p, o)` supplies candidate triples; defaults to kg.match_triples.
+    """
+    if match is None:
+        match = kg.match_triples
+    patterns = [tuple(step['pattern']) for step in plan]
+    if counters is None:
+        counters = {}
+    counters.setdefault('triples_matched', 0)
+    counters.setdefault('bindings', 0)
+
+    def solve(i: int, binding: Dict[str, str]):
+        if i == len(patterns):
+            yield binding
+            return
+        s, p, o = patterns[i]
+        for ts, tp, to in match(_resolve(s, binding), _resolve(p, binding), _resolve(o, binding)):
+            counters['triples_matched'] += 1
+            extended = binding
+            ok = True
+            for term, value in ((s, ts), (p, tp), (o, to)):
+                if not is_variable(term):
+                    continue
+                current = extended.get(term)
+                if current is None:
+                    if extended is binding:
+                        extended = dict(binding)
+                    extended[term] = value
+                elif current != value:
+                    ok = False
+                    break
+            if ok:
+                counters['bindings'] += 1
+                yield from solve(i + 1, extended)
+
+    yield from solve(0, {})
@@ -0,0 +1,364 @@
+"""
+Regular path queries (RPQs) over relation sequences.
+
+A path expression is a regular expression over relation names, in the style
+of SPARQL property paths:
+
+    prerequisite_of+/is_a*        one or more prerequisite_of, then any is_a
+    (part_of|is_a)+               any chain of part_of / is_a edges
+    ^is_a                         is_a traversed backwards (object -> subject)
+    'relation with spaces'?       quoted names, optional step
+
+Operators by precedence: postfix `*` `+` `?`, prefix `^` (inverse), sequence
+(`/` or whitespace), alternation `|`; parentheses group.
+
+The expression is compiled once into a DFA over (relation, inverse) labels
+(Thompson NFA, then subset construction, with states that cannot reach an
+accepting state removed). A query is a BFS over the product of the graph and
+the DFA: each (concept, state) pair is visited at most once, so evaluation
+costs O(|V| * |Q| + |E| * |Q|) no matter how many paths match, and the
+concepts reached in an accepting state are the answers. BFS order also makes
+the first witness path found in pairwise mode a shortest one.
+"""
+
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
+
+Label = Tuple[str, bool]  # (relation, inverse)
+
+_TOKEN = re.compile(r"\s*(?:(?P<op>[()|/*+?^])|'(?P<sq>[^']*)'|\"(?P<dq>[^\"]*)\"|(?P<name>[^\s()|/*+?^'\"]+))")
+
+
+class PathExpressionError(ValueError):
+    """A path expression could not be parsed."""
+
+
+# ----------------------------------------------------------------------------
+# Parsing: expression -> AST of ('rel', name, inverse) / ('seq', [..]) /
+# ('alt', [..]) / ('star' | 'plus' | 'opt', node)
+# ----------------------------------------------------------------------------
+
+def _tokenize(expression: str) -> List[Tuple[str, str, int]]:
+    tokens = []
+    pos = 0
+    expression = expression.rstrip()
+    while pos < len(expression):
+        match = _TOKEN.match(expression, pos)
+        if match is None or match.end() == pos:
+            raise PathExpressionError(f"Unexpected character at position {pos} in path expression")
+        if match.group('op') is not None:
+            tokens.append(('op', match.group('op'), match.start('op')))
+        else:
+            name = match.group('name') or match.group('sq') or match.group('dq')
+            if not name:
+                raise PathExpressionError(f"Empty relation name at position {match.start()} in path expression")
+            tokens.append(('name', name, match.start()))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, expression: str):
+        self.tokens = _tokenize(expression)
+        self.pos = 0
+
+    def peek(self) -> Optional[Tuple[str, str, int]]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def expect(self, value: str):
+        token = self.peek()
+        if token is None or token[:2] != ('op', value):
+            where = f"position {token[2]}" if token else "end of expression"
+            raise PathExpressionError(f"Expected '{value}' at {where}")
+        self.pos += 1
+
+    def parse(self):
+        if not self.tokens:
+            raise PathExpressionError("Path expression is empty")
+        node = self.alternation()
+        token = self.peek()
+        if token is not None:
+            raise PathExpressionError(f"Unexpected '{token[1]}' at position {token[2]}")
+        return node
+
+    def alternation(self):
+        options = [self.sequence()]
+        while self.peek() is not None and self.peek()[:2] == ('op', '|'):
+            self.pos += 1
+            options.append(self.sequence())
+        return options[0] if len(options) == 1 else ('alt', options)
+
+    def sequence(self):
+        steps = [self.postfix()]
+        while True:
+            token = self.peek()
+            if token is None:
+                break
+            if token[:2] == ('op', '/'):
+                self.pos += 1
+            elif not (token[0] == 'name' or token[1] in ('(', '^')):
+                break
+            steps.append(self.postfix())
+        return steps[0] if len(steps) == 1 else ('seq', steps)
+
+    def postfix(self):
+        node = self.primary()
+        while self.peek() is not None and self.peek()[0] == 'op' and self.peek()[1] in '*+?':
+            node = ({'*': 'star', '+': 'plus', '?': 'opt'}[self.peek()[1]], node)
+            self.pos += 1
+        return node
+
+    def primary(self):
+        token = self.peek()
+        if token is None:
+            raise PathExpressionError("Path expression ends unexpectedly")
+        kind, value, position = token
+        self.pos += 1
+        if kind == 'name':
+            return ('rel', value, False)
+        if value == '^':
+            return _invert(self.postfix())
+        if value == '(':
+            node = self.alternation()
+            self.expect(')')
+            return node
+        raise PathExpressionError(f"Unexpected '{value}' at position {position}")
+
+
+def _invert(node):
+    """The expression matching the reversed paths of `node`."""
+    kind = node[0]
+    if kind == 'rel':
+        return ('rel', node[1], not node[2])
+    if kind == 'seq':
+        return ('seq', [_invert(step) for step in reversed(node[1])])
+    if kind == 'alt':
+        return ('alt', [_invert(option) for option in node[1]])
+    return (kind, _invert(node[1]))
+
+
+# ----------------------------------------------------------------------------
+# Automaton
+# ----------------------------------------------------------------------------
+
+class _NFA:
+    """Thompson construction: each fragment has one entry and one exit state."""
+
+    def __init__(self):
+        self.epsilon: List[List[int]] = []
+        self.moves: List[List[Tuple[Label, int]]] = []
+
+    def state(self) -> int:
+        self.epsilon.append([])
+        self.moves.append([])
+        return len(self.epsilon) - 1
+
+    def build(self, node) -> Tuple[int, int]:
+        kind = node[0]
+        entry, exit_ = self.state(), self.state()
+        if kind == 'rel':
+            self.moves[entry].append(((node[1], node[2]), exit_))
+        elif kind == 'seq':
+            current = entry
+            for step in node[1]:
+                step_entry, step_exit = self.build(step)
+                self.epsilon[current].append(step_entry)
+                current = step_exit
+            self.epsilon[current].append(exit_)
+        elif kind == 'alt':
+            for option in node[1]:
+                option_entry, option_exit = self.build(option)
+                self.epsilon[entry].append(option_entry)
+                self.epsilon[option_exit].append(exit_)
+        else:
+            inner_entry, inner_exit = self.build(node[1])
+            self.epsilon[entry].append(inner_entry)
+            self.epsilon[inner_exit].append(exit_)
+            if kind in ('star', 'opt'):
+                self.epsilon[entry].append(exit_)
+            if kind in ('star', 'plus'):
+                self.epsilon[inner_exit].append(inner_entry)
+        return entry, exit_
+
+    def closure(self, states: Iterable[int]) -> FrozenSet[int]:
+        stack = list(states)
+        seen = set(stack)
+        while stack:
+            for target in self.epsilon[stack.pop()]:
+                if target not in seen:
+                    seen.add(target)
+                    stack.append(target)
+        return frozenset(seen)
+
+
+class PathAutomaton:
+    """
+    Deterministic automaton of a path expression.
+
+    Attributes:
+        expression: The source expression
+        start: Start state
+        accepting: Accepting states
+        transitions: Per state, {(relation, inverse): next state}
+    """
+
+    def __init__(self, expression: str, start: int, accepting: Set[int],
+                 transitions: List[Dict[Label, int]]):
+        self.expression = expression
+        self.start = start
+        self.accepting = accepting
+        self.transitions = transitions
+
+    @property
+    def matches_empty_path(self) -> bool:
+        return self.start in self.accepting
+
+    def describe(self) -> dict:
+        return {
+            'states': len(self.transitions),
+            'accepting': sorted(self.accepting),
+            'transitions': [
+                {'from': state, 'relation': relation, 'inverse': inverse, 'to': target}
+                for state, moves in enumerate(self.transitions)
+                for (relation, inverse), target in sorted(moves.items())
+            ],
+        }
+
+
+@lru_cache(maxsize=256)
+def compile_path(expression: str) -> PathAutomaton:
+    """
+    Compile a path expression into a PathAutomaton (cached per expression).
+
+    Raises:
+        PathExpressionError: if the expression is malformed
+    """
+    nfa = _NFA()
+    nfa_start, nfa_accept = nfa.build(_Parser(expression).parse())
+
+    # Subset construction over epsilon closures
+    start_set = nfa.closure([nfa_start])
+    ids = {start_set: 0}
+    sets = [start_set]
+    moves: List[Dict[Label, int]] = []
+    i = 0
+    while i < len(sets):
+        targets: Dict[Label, Set[int]] = {}
+        for state in sets[i]:
+            for label, target in nfa.moves[state]:
+                targets.setdefault(label, set()).add(target)
+        row = {}
+        for label, target_states in targets.items():
+            closed = nfa.closure(target_states)
+            if closed not in ids:
+                ids[closed] = len(sets)
+                sets.append(closed)
+            row[label] = ids[closed]
+        moves.append(row)
+        i += 1
+    accepting = {ids[s] for s in sets if nfa_accept in s}
+
+    # Drop states from which no accepting state is reachable
+    live = set(accepting)
+    changed = True
+    while changed:
+        changed = False
+        for state, row in enumerate(moves):
+            if state not in live and any(target in live for target in row.values()):
+                live.add(state)
+                changed = True
+    transitions = [{label: target for label, target in row.items() if target in live} if state in live else {}
+                   for state, row in enumerate(moves)]
+    return PathAutomaton(expression, 0, accepting, transitions)
+
+
+# ----------------------------------------------------------------------------
+# Evaluation
+# ----------------------------------------------------------------------------
+
+class EvaluationStats:
+    """Work counters of a product-graph search, for tracing spans."""
+
+    def __init__(self):
+        self.states_visited = 0
+        self.edges_scanned = 0
+
+
+def _step(indexes, node: str, relation: str, inverse: bool) -> Iterator[str]:
+    """Concepts one `relation` edge away from `node` (against the edge direction if inverse)."""
+    for index in indexes:
+        if inverse:
+            yield from index.pos.get(relation, {}).get(node, ())
+        else:
+            yield from index.spo.get(node, {}).get(relation, ())
+
+
+def reachable(indexes, automaton: PathAutomaton, source: str, limit: Optional[int] = None,
+              stats: Optional[EvaluationStats] = None) -> Tuple[List[dict], bool]:
+    """
+    Concepts reachable from `source` along a path matching the automaton.
+
+    Returns:
+        ([{'concept', 'hops'}] in order of shortest matching path length,
+         whether the result was cut off at `limit`)
+    """
+    accepting, transitions = automaton.accepting, automaton.transitions
+    if stats is None:
+        stats = EvaluationStats()
+    visited = {(source, automaton.start)}
+    queue = deque([(source, automaton.start, 0)])
+    results = []
+    found = set()
+    while queue:
+        node, state, hops = queue.popleft()
+        stats.states_visited += 1
+        if state in accepting and node not in found:
+            if limit is not None and len(results) >= limit:
+                return results, True
+            found.add(node)
+            results.append({'concept': node, 'hops': hops})
+        for (relation, inverse), next_state in transitions[state].items():
+            for neighbor in _step(indexes, node, relation, inverse):
+                stats.edges_scanned += 1
+                if (neighbor, next_state) not in visited:
+                    visited.add((neighbor, next_state))
+                    queue.append((neighbor, next_state, hops + 1))
+    return results, False
+
+
+def witness(indexes, automaton: PathAutomaton, source: str, target: str,
+            stats: Optional[EvaluationStats] = None) -> Optional[dict]:
+    """
+    A shortest path from `source` to `target` matching the automaton, or None.
+
+    Returns:
+        dict with 'path' (concepts), 'relations' (inverse steps prefixed with '^')
+        and 'hops'
+    """
+    accepting, transitions = automaton.accepting, automaton.transitions
+    if stats is None:
+        stats = EvaluationStats()
+    start = (source, automaton.start)
+    parents: Dict[Tuple[str, int], Optional[Tuple[Tuple[str, int], str]]] = {start: None}
+    queue = deque([start])
+    while queue:
+        current = queue.popleft()
+        node, state = current
+        stats.states_visited += 1
+        if node == target and state in accepting:
+            nodes, relations = [node], []
+            while parents[current] is not None:
+                current, step = parents[current]
+                nodes.append(current[0])
+                relations.append(step)
+            return {'path': nodes[::-1], 'relations': relations[::-1], 'hops': len(relations)}
+        for (relation, inverse), next_state in transitions[state].items():
+            for neighbor in _step(indexes, node, relation, inverse):
+                stats.edges_scanned += 1
+                key = (neighbor, next_state)
+                if key not in parents:
+                    parents[key] = (current, '^' + relation if inverse else relation)
+                    queue.append(key)
+    return None
@@ -0,0 +1,268 @@
+"""
+Interval-labelled taxonomy index over `is_a` (or any hierarchy) edges.
+
+Each concept gets a post-order number from a DFS spanning forest of the
+hierarchy (parent -> child). In a pure tree, the descendants of a concept
+are exactly the post-order range [low, post] of its subtree, so subsumption
+is a single range check and listing descendants is a slice of the
+post-order array.
+
+DAGs with multiple parents fall back to multi-interval labels: a concept's
+label is the merged union of its own tree range and the labels of all its
+children, so extra parents just carry a few more (sorted) intervals and
+checks stay a binary search over a short list. Cycles in the data are
+collapsed into strongly connected components that share one label.
+
+Lowest-common-ancestor queries use an Euler tour with a sparse-table RMQ
+when the hierarchy is a forest (O(1) per pair after O(n log n) set-up) and
+ancestor bitsets when concepts have several parents, where the answer is
+the set of minimal common ancestors.
+"""
+
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import networkx as nx
+
+Interval = Tuple[int, int]
+
+
+def _merge(intervals: List[Interval]) -> List[Interval]:
+    intervals.sort()
+    merged = []
+    for lo, hi in intervals:
+        if merged and lo <= merged[-1][1] + 1:
+            if hi > merged[-1][1]:
+                merged[-1] = (merged[-1][0], hi)
+        else:
+            merged.append((lo, hi))
+    return merged
+
+
+class TaxonomyIndex:
+    """Pre-computed subsumption labels for a child -[relation]-> parent hierarchy."""
+
+    def __init__(self, pairs: Iterable[Tuple[str, str]], relation: str = 'is_a'):
+        """
+        Args:
+            pairs: (child, parent) pairs, e.g. ('soliton', 'wave') for soliton is_a wave
+            relation: Name of the hierarchy relation (informational)
+        """
+        self.relation = relation
+        hierarchy = nx.DiGraph()
+        for child, parent in pairs:
+            hierarchy.add_edge(parent, child)
+
+        condensed = nx.condensation(hierarchy)
+        self.component: Dict[str, int] = condensed.graph['mapping']
+        self.members: Dict[int, List[str]] = {c: sorted(data['members'])
+                                              for c, data in condensed.nodes(data=True)}
+
+        # DFS spanning forest: subtree of c is the post-order range [low[c], post[c]]
+        self.post: Dict[int, int] = {}
+        low: Dict[int, int] = {}
+        order: List[int] = []
+        roots = sorted((c for c in condensed if condensed.in_degree(c) == 0),
+                       key=lambda c: self.members[c][0])
+        for root in roots:
+            low[root] = len(order)
+            stack = [(root, iter(sorted(condensed.successors(root), key=lambda c: self.members[c][0])))]
+            while stack:
+                node, children = stack[-1]
+                advanced = False
+                for child in children:
+                    if child not in low:
+                        low[child] = len(order)
+                        stack.append((child, iter(sorted(condensed.successors(child),
+                                                         key=lambda c: self.members[c][0]))))
+                        advanced = True
+                        break
+                if not advanced:
+                    stack.pop()
+                    self.post[node] = len(order)
+                    order.append(node)
+        self.order = order
+
+        # Multi-interval labels, children before parents
+        self.intervals: Dict[int, List[Interval]] = {}
+        for c in reversed(list(nx.topological_sort(condensed))):
+            spans = [(low[c], self.post[c])]
+            for child in condensed.successors(c):
+                spans.extend(self.intervals[child])
+            self.intervals[c] = _merge(spans)
+        self._parents = {c: list(condensed.predecessors(c)) for c in condensed}
+        self._children = {c: sorted(condensed.successors(c), key=lambda x: self.members[x][0])
+                          for c in condensed}
+        self.roots = roots
+        self._lca = None
+
+    def __contains__(self, concept: str) -> bool:
+        return concept in self.component
+
+    @property
+    def is_tree(self) -> bool:
+        """True if every concept has a single interval (no shared descendants)."""
+        return all(len(spans) == 1 for spans in self.intervals.values())
+
+    def label(self, concept: str) -> Optional[List[Interval]]:
+        c = self.component.get(concept)
+        return None if c is None else self.intervals[c]
+
+    def is_subsumed(self, concept: str, ancestor: str) -> bool:
+        """True if `concept` is (transitively) a kind of `ancestor`, or the same concept."""
+        c = self.component.get(concept)
+        a = self.component.get(ancestor)
+        if c is None or a is None:
+            return concept == ancestor
+        spans = self.intervals[a]
+        p = self.post[c]
+        if len(spans) == 1:
+            return spans[0][0] <= p <= spans[0][1]
+        i = bisect_right(spans, (p, float('inf'))) - 1
+        return i >= 0 and spans[i][0] <= p <= spans[i][1]
+
+    def descendants(self, concept: str, include_self: bool = False) -> List[str]:
+        """All concepts below `concept`, read off its intervals as post-order range scans."""
+        a = self.component.get(concept)
+        if a is None:
+            return []
+        result = []
+        for lo, hi in self.intervals[a]:
+            for c in self.order[lo:hi + 1]:
+                result.extend(self.members[c])
+        if not include_self:
+            result = [n for n in result if n != concept]
+        return result
+
+    def ancestors(self, concept: str, include_self: bool = False) -> Set[str]:
+        """All concepts above `concept` (walks the condensed hierarchy upwards)."""
+        c = self.component.get(concept)
+        if c is None:
+            return set()
+        seen = {c}
+        stack = [c]
+        while stack:
+            for parent in self._parents[stack.pop()]:
+                if parent not in seen:
+                    seen.add(parent)
+                    stack.append(parent)
+        result = {m for comp in seen for m in self.members[comp]}
+        if not include_self:
+            result.discard(concept)
+        return result
+
+    def lca_index(self) -> 'LCAIndex':
+        """LCA index for this hierarchy, built on first use."""
+        if self._lca is None:
+            self._lca = LCAIndex(self)
+        return self._lca
+
+
+class LCAIndex:
+    """Lowest common ancestors over a TaxonomyIndex."""
+
+    def __init__(self, taxonomy: TaxonomyIndex):
+        self.taxonomy = taxonomy
+        self.is_forest = all(len(parents) <= 1 for parents in taxonomy._parents.values())
+        if self.is_forest:
+            self._build_euler_tour()
+        else:
+            self._build_ancestor_bitsets()
+
+    # ---- forests: Euler tour + sparse table --------------------------
+
+    def _build_euler_tour(self):
+        t = self.taxonomy
+        virtual_root = -1
+        children = dict(t._children)
+        children[virtual_root] = list(t.roots)
+        euler: List[int] = []
+        depth: List[int] = []
+        first: Dict[int, int] = {}
+        stack = [(virtual_root, 0, iter(children[virtual_root]))]
+        first[virtual_root] = 0
+        euler.append(virtual_root)
+        depth.append(0)
+        while stack:
+            node, d, it = stack[-1]
+            child = next(it, None)
+            if child is None:
+                stack.pop()
+                if stack:
+                    euler.append(stack[-1][0])
+                    depth.append(stack[-1][1])
+                continue
+            first[child] = len(euler)
+            euler.append(child)
+            depth.append(d + 1)
+            stack.append((child, d + 1, iter(children[child])))
+        # table[k][i] = position of the minimum depth in euler[i : i + 2**k]
+        table = [list(range(len(euler)))]
+        k = 1
+        while (1 << k) <= len(euler):
+            prev = table[-1]
+            half = 1 << (k - 1)
+            row = []
+            for i in range(len(euler) - (1 << k) + 1):
+                a, b = prev[i], prev[i + half]
+                row.append(a if depth[a] <= depth[b] else b)
+            table.append(row)
+            k += 1
+        self._euler, self._depth, self._first, self._table = euler, depth, first, table
+
+    def _rmq(self, i: int, j: int) -> int:
+        if i > j:
+            i, j = j, i
+        k = (j - i + 1).bit_length() - 1
+        a, b = self._table[k][i], self._table[k][j - (1 << k) + 1]
+        return a if self._depth[a] <= self._depth[b] else b
+
+    # ---- DAGs: ancestor bitsets ---------------------------------------
+
+    def _build_ancestor_bitsets(self):
+        t = self.taxonomy
+        # Parents come later in post-order, so walk from the highest post number down
+        ancestors: Dict[int, int] = {}
+        for c in reversed(t.order):
+            bits = 1 << t.post[c]
+            for parent in t._parents[c]:
+                bits |= ancestors[parent]
+            ancestors[c] = bits
+        self._ancestors = ancestors
+
+    def _minimal(self, common: int) -> List[int]:
+        t = self.taxonomy
+        candidates = []
+        strict_above = 0
+        bits = common
+        while bits:
+            low = bits & -bits
+            c = t.order[low.bit_length() - 1]
+            candidates.append(c)
+            strict_above |= self._ancestors[c] & ~low
+            bits ^= low
+        return [c for c in candidates if not (strict_above >> t.post[c]) & 1]
+
+    # ---- queries ------------------------------------------------------
+
+    def _lca_components(self, a: str, b: str) -> List[int]:
+        t = self.taxonomy
+        ca, cb = t.component.get(a), t.component.get(b)
+        if ca is None or cb is None:
+            return []
+        if ca == cb:
+            return [ca]
+        if self.is_forest:
+            node = self._euler[self._rmq(self._first[ca], self._first[cb])]
+            return [] if node == -1 else [node]
+        return self._minimal(self._ancestors[ca] & self._ancestors[cb])
+
+    def query(self, a: str, b: str) -> List[str]:
+        """Most specific concepts that both `a` and `b` are (transitively) kinds of."""
+        if a == b:
+            return [a] if a in self.taxonomy else []
+        members = self.taxonomy.members
+        return sorted(m for c in self._lca_components(a, b) for m in members[c])
+
+    def query_many(self, pairs: Sequence[Tuple[str, str]]) -> List[List[str]]:
+        return [self.query(a, b) for a, b in pairs]
@@ -0,0 +1,233 @@
+"""
+Optional tracing hooks for ScientificKnowledgeGraph queries.
+
+Query methods open a span per call and attach work counters to it
+(nodes visited, edges scanned, cycles enumerated, ...). A tracer can be
+installed on a graph instance (`kg.tracer = RecordingTracer()`) or for the
+current thread only (`with tracing(tracer): ...`). When no tracer is active
+the graph hands out a shared no-op span, so the hooks cost a couple of
+attribute lookups per call.
+"""
+
+import threading
+import time
+from collections import deque, defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+
+class Span:
+    """A single traced operation with attributes and work counters."""
+
+    __slots__ = ('name', 'attributes', 'counters', 'start', 'end', '_tracer')
+
+    def __init__(self, name: str, attributes: dict, tracer: 'Tracer'):
+        self.name = name
+        self.attributes = attributes
+        self.counters: Dict[str, int] = {}
+        self.start = time.perf_counter()
+        self.end = None
+        self._tracer = tracer
+
+    @property
+    def duration(self) -> float:
+        """Elapsed seconds (up to now if the span is still open)."""
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def add(self, counter: str, amount: int = 1):
+        """Increment a work counter."""
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def set(self, key: str, value):
+        """Set an attribute on the span."""
+        self.attributes[key] = value
+
+    def finish(self):
+        if self.end is None:
+            self.end = time.perf_counter()
+            self._tracer.on_finish(self)
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'duration_ms': round(self.duration * 1000, 3),
+            'attributes': dict(self.attributes),
+            'counters': dict(self.counters),
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attributes['error'] = exc_type.__name__
+        self.finish()
+        return False
+
+
+class _NoopSpan:
+    """Span stand-in used when tracing is disabled; every method does nothing."""
+
+    __slots__ = ()
+
+    def add(self, counter: str, amount: int = 1):
+        pass
+
+    def set(self, key: str, value):
+        pass
+
+    def finish(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """Tracer interface. Subclasses override `on_finish` to consume spans."""
+
+    def start_span(self, name: str, attributes: dict) -> Span:
+        return Span(name, attributes, self)
+
+    def on_finish(self, span: Span):
+        pass
+
+
+class RecordingTracer(Tracer):
+    """Keeps the most recent finished spans in memory and aggregates them per name."""
+
+    def __init__(self, max_spans: Optional[int] = 1000):
+        self._lock = threading.Lock()
+        self.spans = deque(maxlen=max_spans)
+        self._totals = defaultdict(lambda: {'calls': 0, 'seconds': 0.0, 'counters': defaultdict(int)})
+
+    def on_finish(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+            totals = self._totals[span.name]
+            totals['calls'] += 1
+            totals['seconds'] += span.duration
+            for counter, value in span.counters.items():
+                totals['counters'][counter] += value
+
+    def summary(self) -> Dict[str, dict]:
+        """Per-span-name call counts, total time and summed counters."""
+        with self._lock:
+            return {
+                name: {
+                    'calls': t['calls'],
+                    'total_ms': round(t['seconds'] * 1000, 3),
+                    'counters': dict(t['counters']),
+                }
+                for name, t in self._totals.items()
+            }
+
+    def finished(self) -> List[dict]:
+        with self._lock:
+            return [span.to_dict() for span in self.spans]
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+            self._totals.clear()
+
+
+_active = threading.local()
+
+
+def current_tracer() -> Optional[Tracer]:
+    """Tracer installed for the current thread, if any."""
+    return getattr(_active, 'tracer', None)
+
+
+@contextmanager
+def tracing(tracer: Tracer):
+    """Install `tracer` for every graph query made by the current thread."""
+    previous = getattr(_active, 'tracer', None)
+    _active.tracer = tracer
+    try:
+        yield tracer
+    finally:
+        _active.tracer = previous
+
+
+class QueryProfiler(Tracer):
+    """Builds an execution profile for one request.
+
+    Top-level spans are kept in full; spans opened from inside another span
+    (e.g. get_neighbors calls made by get_prerequisites) only contribute a
+    call count, so work counters are not double counted. Wall time is split
+    into phases: 'pre_query' (argument parsing, lock waits and dispatch before
+    the first query span), 'traversal' (inside query spans) and
+    'serialization' (after the last span, until `stop()`).
+
+    Meant to be installed for a single thread via `tracing(profiler)`.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stopped = None
+        self.spans: List[Span] = []
+        self.nested_calls: Dict[str, int] = defaultdict(int)
+        self._open_top = None
+        self._first_start = None
+        self._last_end = None
+
+    def start_span(self, name: str, attributes: dict) -> Span:
+        span = Span(name, attributes, self)
+        if self._open_top is None:
+            self._open_top = span
+            if self._first_start is None:
+                self._first_start = span.start
+        else:
+            self.nested_calls[name] += 1
+        return span
+
+    def on_finish(self, span: Span):
+        if span is self._open_top:
+            self._open_top = None
+            self.spans.append(span)
+            self._last_end = span.end
+
+    def stop(self):
+        self.stopped = time.perf_counter()
+
+    def to_dict(self) -> dict:
+        end = self.stopped if self.stopped is not None else time.perf_counter()
+        traversal = sum(span.duration for span in self.spans)
+        if self._first_start is None:
+            pre_query, serialization = end - self.started, 0.0
+        else:
+            pre_query = self._first_start - self.started
+            serialization = end - self._last_end
+        counters: Dict[str, int] = defaultdict(int)
+        for span in self.spans:
+            for counter, value in span.counters.items():
+                counters[counter] += value
+        strategies = []
+        for span in self.spans:
+            strategy = span.attributes.get('strategy')
+            if strategy and strategy not in strategies:
+                strategies.append(strategy)
+        return {
+            'total_ms': round((end - self.started) * 1000, 3),
+            'phases_ms': {
+                'pre_query': round(pre_query * 1000, 3),
+                'traversal': round(traversal * 1000, 3),
+                'serialization': round(serialization * 1000, 3),
+            },
+            'counters': dict(counters),
+            'cache': {
+                'hits': counters.get('cache_hits', 0),
+                'misses': counters.get('cache_misses', 0),
+            },
+            'strategies': strategies,
+            'spans': [span.to_dict() for span in self.spans],
+            'nested_calls': dict(self.nested_calls),
+        }
@@ -0,0 +1,131 @@
+"""
+Hexastore-style permutation indexes for triple lookups.
+
+Three nested-dict permutations are kept in sync with the graph:
+
+    spo[s][p][o], pos[p][o][s], osp[o][s][p]  ->  multiplicity
+
+Together they answer every combination of bound (s, p, o) positions by
+walking straight to the matching entries, so a lookup costs O(result)
+and add/remove cost O(1). The leaf value counts parallel duplicate edges
+so removing one copy of a repeated triple keeps the others indexed.
+"""
+
+from typing import Dict, Iterator, Optional, Tuple
+
+Triple = Tuple[str, str, str]
+
+
+def _add(index: dict, a: str, b: str, c: str):
+    level = index.setdefault(a, {}).setdefault(b, {})
+    level[c] = level.get(c, 0) + 1
+
+
+def _remove(index: dict, a: str, b: str, c: str, count: int) -> int:
+    level1 = index.get(a)
+    if level1 is None:
+        return 0
+    level2 = level1.get(b)
+    if level2 is None or c not in level2:
+        return 0
+    current = level2[c]
+    removed = min(current, count)
+    if current > removed:
+        level2[c] = current - removed
+    else:
+        del level2[c]
+        if not level2:
+            del level1[b]
+            if not level1:
+                del index[a]
+    return removed
+
+
+class TripleIndex:
+    """SPO / POS / OSP permutation indexes over (subject, predicate, object) triples."""
+
+    def __init__(self):
+        self.spo: Dict[str, Dict[str, Dict[str, int]]] = {}
+        self.pos: Dict[str, Dict[str, Dict[str, int]]] = {}
+        self.osp: Dict[str, Dict[str, Dict[str, int]]] = {}
+        self.size = 0  # number of triples, counting duplicates
+
+    def add(self, s: str, p: str, o: str):
+        _add(self.spo, s, p, o)
+        _add(self.pos, p, o, s)
+        _add(self.osp, o, s, p)
+        self.size += 1
+
+    def remove(self, s: str, p: str, o: str, count: int = 1) -> int:
+        """Remove up to `count` copies of a triple; returns how many were removed."""
+        removed = _remove(self.spo, s, p, o, count)
+        if removed:
+            _remove(self.pos, p, o, s, removed)
+            _remove(self.osp, o, s, p, removed)
+            self.size -= removed
+        return removed
+
+    def multiplicity(self, s: str, p: str, o: str) -> int:
+        return self.spo.get(s, {}).get(p, {}).get(o, 0)
+
+    def __contains__(self, triple: Triple) -> bool:
+        s, p, o = triple
+        return self.multiplicity(s, p, o) > 0
+
+    def count(self, s: Optional[str] = None, p: Optional[str] = None, o: Optional[str] = None) -> int:
+        """Number of distinct triples matching the pattern."""
+        return sum(1 for _ in self.match(s, p, o))
+
+    def match(self, s: Optional[str] = None, p: Optional[str] = None,
+              o: Optional[str] = None) -> Iterator[Triple]:
+        """Yield distinct triples matching the bound positions (None = wildcard)."""
+        if s is not None:
+            by_p = self.spo.get(s)
+            if not by_p:
+                return
+            if p is not None:
+                objs = by_p.get(p)
+                if not objs:
+                    return
+                if o is not None:
+                    if o in objs:
+                        yield s, p, o
+                    return
+                for obj in objs:
+                    yield s, p, obj
+                return
+            if o is not None:
+                for pred in self.osp.get(o, {}).get(s, ()):
+                    yield s, pred, o
+                return
+            for pred, objs in by_p.items():
+                for obj in objs:
+                    yield s, pred, obj
+            return
+        if p is not None:
+            by_o = self.pos.get(p)
+            if not by_o:
+                return
+            if o is not None:
+                for subj in by_o.get(o, ()):
+                    yield subj, p, o
+                return
+            for obj, subjs in by_o.items():
+                for subj in subjs:
+                    yield subj, p, obj
+            return
+        if o is not None:
+            for subj, preds in self.osp.get(o, {}).items():
+                for pred in preds:
+                    yield subj, pred, o
+            return
+        for subj, by_p in self.spo.items():
+            for pred, objs in by_p.items():
+                for obj in objs:
+                    yield subj, pred, obj
+
+    def clear(self):
+        self.spo.clear()
+        self.pos.clear()
+        self.osp.clear()
+        self.size = 0
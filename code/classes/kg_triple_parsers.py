@@ -0,0 +1,192 @@
+"""
+Chunked parsers for bulk triple files (TSV, CSV, N-Triples).
+
+A file is cut into byte ranges that end on line boundaries; each range is
+parsed independently (typically in a worker process) into validated
+(subject, predicate, object, confidence, source) tuples. Repeated strings
+are interned per chunk, which also lets pickle send each distinct concept
+name back to the parent only once per chunk.
+
+Records must not span lines: CSV fields with embedded newlines are not
+supported.
+
+TSV/CSV columns are positional (subject, predicate, object[, confidence[,
+source]]) unless the first line is a header naming them, in which case any
+column order works and extra columns are ignored.
+"""
+
+import csv
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from classes.kg_export import iri_to_name
+
+Row = Tuple[str, str, str, float, str]
+
+FORMATS = ('tsv', 'csv', 'ntriples')
+EXTENSIONS = {'.tsv': 'tsv', '.tab': 'tsv', '.csv': 'csv', '.nt': 'ntriples', '.ntriples': 'ntriples'}
+COLUMNS = ('subject', 'predicate', 'object', 'confidence', 'source')
+MAX_REJECT_SAMPLES = 5
+
+_NT_TERM = r'(<[^>]*>|_:\S+|"(?:[^"\\]|\\.)*"(?:@[A-Za-z0-9-]+|\^\^<[^>]*>)?)'
+_NT_LINE = re.compile(r'^\s*' + _NT_TERM + r'\s+' + _NT_TERM + r'\s+' + _NT_TERM + r'\s*\.\s*(?:#.*)?$')
+_NT_ESCAPES = re.compile(r'\\(u[0-9A-Fa-f]{4}|U[0-9A-Fa-f]{8}|.)')
+_SIMPLE_ESCAPES = {'t': '\t', 'b': '\b', 'n': '\n', 'r': '\r', 'f': '\f', '"': '"', "'": "'", '\\': '\\'}
+
+
+def detect_format(path: str) -> str:
+    """Guess the format from the file extension."""
+    fmt = EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Cannot tell the format of '{path}' from its extension; pass it explicitly")
+    return fmt
+
+
+def read_header(path: str, fmt: str) -> Tuple[Optional[Dict[str, int]], int]:
+    """
+    Column mapping from a header line, if the file has one.
+
+    Returns:
+        (mapping of column name -> field index or None if positional,
+         byte offset where data starts)
+    """
+    if fmt == 'ntriples':
+        return None, 0
+    with open(path, 'rb') as f:
+        first = f.readline()
+    fields = _split(first.decode('utf-8', errors='replace').rstrip('\r\n'), fmt)
+    names = [field.strip().lower() for field in fields]
+    if {'subject', 'predicate', 'object'} <= set(names):
+        return {name: i for i, name in enumerate(names) if name in COLUMNS}, len(first)
+    return None, 0
+
+
+def chunk_ranges(path: str, chunk_bytes: int, start: int = 0) -> List[Tuple[int, int]]:
+    """Split [start, file size) into ranges of about `chunk_bytes` that end after a newline."""
+    size = os.path.getsize(path)
+    ranges = []
+    with open(path, 'rb') as f:
+        while start < size:
+            end = min(size, start + chunk_bytes)
+            if end < size:
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _split(line: str, fmt: str) -> List[str]:
+    if fmt == 'tsv':
+        return line.split('\t')
+    return next(csv.reader([line]))
+
+
+def _unescape(text: str) -> str:
+    def replace(match):
+        code = match.group(1)
+        if code[0] in 'uU' and len(code) > 1:
+            return chr(int(code[1:], 16))
+        return _SIMPLE_ESCAPES.get(code, code)
+    return _NT_ESCAPES.sub(replace, text)
+
+
+def _nt_value(term: str) -> str:
+    if term.startswith('<'):
+        return iri_to_name(term[1:-1])
+    if term.startswith('"'):
+        return _unescape(term[1:term.rindex('"')])
+    return term  # blank node label, kept as-is
+
+
+def parse_chunk(task: tuple) -> dict:
+    """
+    Parse one byte range of a file (picklable, for process pools).
+
+    Args:
+        task: (path, start, end, fmt, columns, default_confidence, default_source)
+
+    Returns:
+        dict with 'rows' (validated tuples), 'read', 'rejects' (reason -> count)
+        and 'samples' (up to MAX_REJECT_SAMPLES (byte offset, reason, line) tuples)
+    """
+    path, start, end, fmt, columns, default_confidence, default_source = task
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    interned: Dict[str, str] = {}
+    rows: List[Row] = []
+    rejects: Counter = Counter()
+    samples = []
+    read = 0
+    offset = start
+
+    def reject(reason: str, line: str):
+        rejects[reason] += 1
+        if len(samples) < MAX_REJECT_SAMPLES:
+            samples.append((line_offset, reason, line[:200]))
+
+    for raw in data.splitlines(keepends=True):
+        line_offset = offset
+        offset += len(raw)
+        try:
+            line = raw.decode('utf-8').rstrip('\r\n')
+        except UnicodeDecodeError:
+            read += 1
+            reject('invalid UTF-8', raw.decode('utf-8', errors='replace'))
+            continue
+        if not line.strip() or (fmt == 'ntriples' and line.lstrip().startswith('#')):
+            continue
+        read += 1
+
+        confidence, source = default_confidence, default_source
+        if fmt == 'ntriples':
+            match = _NT_LINE.match(line)
+            if match is None:
+                reject('malformed N-Triples statement', line)
+                continue
+            s, p, o = (_nt_value(term) for term in match.groups())
+        else:
+            try:
+                fields = _split(line, fmt)
+            except csv.Error:
+                reject('malformed CSV', line)
+                continue
+            if columns is None:
+                if not 3 <= len(fields) <= 5:
+                    reject('expected 3-5 fields', line)
+                    continue
+                s, p, o = fields[0], fields[1], fields[2]
+                raw_confidence = fields[3] if len(fields) > 3 else ''
+                raw_source = fields[4] if len(fields) > 4 else ''
+            else:
+                if len(fields) <= max(columns.values()):
+                    reject('missing columns', line)
+                    continue
+                s, p, o = fields[columns['subject']], fields[columns['predicate']], fields[columns['object']]
+                raw_confidence = fields[columns['confidence']] if 'confidence' in columns else ''
+                raw_source = fields[columns['source']] if 'source' in columns else ''
+            if raw_confidence.strip():
+                try:
+                    confidence = float(raw_confidence)
+                except ValueError:
+                    reject('confidence is not a number', line)
+                    continue
+            if raw_source.strip():
+                source = raw_source.strip()
+
+        s, p, o = s.strip(), p.strip(), o.strip()
+        if not s or not p or not o:
+            reject('empty subject, predicate or object', line)
+            continue
+        if not 0.0 <= confidence <= 1.0:
+            reject('confidence outside [0, 1]', line)
+            continue
+        rows.append((interned.setdefault(s, s), interned.setdefault(p, p), interned.setdefault(o, o),
+                     confidence, interned.setdefault(source, source)))
+
+    return {'rows': rows, 'read': read, 'rejects': rejects, 'samples': samples}
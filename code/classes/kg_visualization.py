@@ -0,0 +1,150 @@
+"""
+Matplotlib rendering for ScientificKnowledgeGraph.
+
+Kept separate from the graph class so that importing the class for pure
+queries never pays for importing matplotlib. The graph's `visualize()`
+imports this module on first use.
+"""
+
+import math
+import warnings
+
+import matplotlib
+import networkx as nx
+
+# Suppress matplotlib warnings:
+# - Legend warnings when no labeled artists exist
+# - Axes3D warnings (we don't use 3D plotting)
+warnings.filterwarnings('ignore', category=UserWarning, module='matplotlib')
+
+
+def use_headless_backend():
+    """Switch matplotlib to the non-interactive Agg backend (for servers)."""
+    matplotlib.use('Agg')
+
+
+def draw_graph(kg, concept: str = None, radius: int = 2, figsize=(12, 8)):
+    """
+    Draw the graph (or the neighborhood of `concept`) on a new pyplot figure.
+    
+    Args:
+        kg: ScientificKnowledgeGraph to draw
+        concept: If provided, show neighborhood around this concept
+        radius: Size of neighborhood to shown
+        figsize: Figure size
+    
+    Returns:
+        The pyplot module, with the figure as the current figure
+    """
+    import matplotlib.pyplot as plt
+
+    if concept:
+        nodes_to_show = kg.get_concept_neighborhood(concept, radius)
+        subgraph = kg.graph.subgraph(nodes_to_show)
+    else:
+        subgraph = kg.graph
+    
+    # Adaptive figure size based on number of nodes
+    n_nodes = subgraph.number_of_nodes()
+    if n_nodes == 0:
+        # Empty graph - just show message
+        plt.figure(figsize=figsize)
+        plt.text(0.5, 0.5, 'Empty graph', ha='center', va='center', transform=plt.gca().transAxes)
+        return
+    
+    if n_nodes > 0:
+        w = max(figsize[0], min(24, 10 + n_nodes * 0.4))
+        h = max(figsize[1], min(18, 6 + n_nodes * 0.3))
+        plt.figure(figsize=(w, h))
+    else:
+        plt.figure(figsize=figsize)
+    
+    # Create layout with increased spacing to reduce overlap
+    try:
+        if n_nodes == 1:
+            # Single node - place it in the center
+            pos = {list(subgraph.nodes())[0]: (0, 0)}
+        elif n_nodes <= 50 and n_nodes > 1:
+            # Kamada-Kawai spreads small graphs nicely
+            try:
+                pos = nx.kamada_kawai_layout(subgraph)
+            except (ValueError, Exception) as e:
+                # Fallback if kamada_kawai fails (e.g., disconnected components)
+                sqrt_n = math.sqrt(n_nodes) if n_nodes > 0 else 1.0
+                k = 2.0 / sqrt_n + 0.15
+                pos = nx.spring_layout(subgraph, k=k, iterations=300, seed=42)
+        else:
+            # Tune spring layout: larger k => more spacing
+            sqrt_n = math.sqrt(n_nodes) if n_nodes > 0 else 1.0
+            k = 2.0 / sqrt_n + 0.15
+            pos = nx.spring_layout(subgraph, k=k, iterations=300, seed=42)
+    except Exception as e:
+        # Final fallback: use default spring layout
+        print(f"Warning: Layout algorithm failed, using default spring layout: {e}")
+        pos = nx.spring_layout(subgraph, seed=42)
+    
+    # Node/label sizing scales with graph size
+    node_size = max(600, 3000 - n_nodes * 30)
+    font_size = max(6, 12 - int(n_nodes * 0.1))
+    
+    # Draw nodes
+    nx.draw_networkx_nodes(
+        subgraph,
+        pos,
+        node_color='lightblue',
+        node_size=node_size,
+        alpha=0.9
+    )
+    
+    # Draw edges with different colors for different relations
+    edge_colors = {
+        'is_a': 'blue',
+        'part_of': 'green',
+        'prerequisite_of': 'red',
+        'related_to': 'gray',
+        'has_equation': 'purple'
+    }
+    
+    has_labeled_edges = False
+    for relation in kg.relation_types:
+        edges = [(u, v) for u, v, d in subgraph.edges(data=True)
+                if d.get('relation') == relation]
+        if edges:
+            nx.draw_networkx_edges(
+                subgraph,
+                pos,
+                edges,
+                edge_color=edge_colors.get(relation, 'gray'),
+                arrows=True,
+                arrowsize=16,
+                width=max(1.0, 2.5 - n_nodes * 0.02),
+                label=relation
+            )
+            has_labeled_edges = True
+    
+    # Draw labels
+    nx.draw_networkx_labels(
+        subgraph,
+        pos,
+        font_size=font_size,
+        bbox=dict(facecolor='white', alpha=0.7, edgecolor='none', pad=0.5)
+    )
+    
+    plt.margins(0.2)
+    
+    # Only create legend if there are labeled edges
+    # Check for labeled artists before attempting to create legend
+    if has_labeled_edges:
+        try:
+            handles, labels = plt.gca().get_legend_handles_labels()
+            if handles and labels and len(handles) > 0:
+                plt.legend(handles, labels, loc='best', fontsize=8)
+        except (ValueError, AttributeError):
+            # No labeled artists or legend creation failed - silently skip
+            pass
+        except Exception:
+            # Other errors - silently skip
+            pass
+    plt.axis('off')
+    plt.tight_layout()
+    return plt
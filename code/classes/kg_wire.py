@@ -0,0 +1,129 @@
+"""
+Compact, dictionary-encoded wire formats for D3 graph exports.
+
+The plain export repeats concept names in every link and the relation name on
+every edge. The compact form lists each node once and turns links into
+integer triples against two small tables:
+
+    {
+      "format": "compact",
+      "nodes": ["wave", "sine_wave", ...],      # link endpoints index this list
+      "groups": ["concept", ...],               # node type table
+      "node_groups": [0, 0, ...],               # index into groups, per node
+      "relations": ["is_a", "part_of", ...],    # relation table
+      "links": [1, 0, 0,  ...]                  # flat (source, target, relation) triples
+    }
+
+Any other top-level keys of the export (counts, flags) are passed through.
+
+Two binary encodings carry the same content:
+
+- msgpack: the compact dict encoded with MessagePack (needs the optional
+  `msgpack` package)
+- binary:  b"KGB1", a little-endian uint32 header length, the JSON header
+           (everything except the links), space padding to a 4-byte boundary,
+           then the links as a little-endian int32 array, which browsers can
+           wrap in an Int32Array without copying
+"""
+
+import json
+import struct
+import sys
+from array import array
+from typing import Dict
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack = None
+    MSGPACK_AVAILABLE = False
+
+BINARY_MAGIC = b'KGB1'
+BINARY_CONTENT_TYPE = 'application/vnd.kg.graph+binary'
+MSGPACK_CONTENT_TYPE = 'application/msgpack'
+FORMATS = ('json', 'compact', 'msgpack', 'binary')
+
+
+def to_compact(export: dict) -> dict:
+    """Dictionary-encode a {'nodes': [...], 'links': [...]} export."""
+    node_index: Dict[str, int] = {}
+    nodes, node_groups = [], []
+    group_index: Dict[str, int] = {}
+    for node in export['nodes']:
+        node_index[node['id']] = len(nodes)
+        nodes.append(node['id'])
+        group = node.get('group', 'concept')
+        if group not in group_index:
+            group_index[group] = len(group_index)
+        node_groups.append(group_index[group])
+
+    relation_index: Dict[str, int] = {}
+    links = []
+    for link in export['links']:
+        relation = link.get('relation')
+        r = relation_index.get(relation)
+        if r is None:
+            r = relation_index[relation] = len(relation_index)
+        links.extend((node_index[link['source']], node_index[link['target']], r))
+
+    compact = {key: value for key, value in export.items() if key not in ('nodes', 'links')}
+    compact.update({
+        'format': 'compact',
+        'nodes': nodes,
+        'groups': list(group_index),
+        'node_groups': node_groups,
+        'relations': list(relation_index),
+        'links': links,
+    })
+    return compact
+
+
+def from_compact(compact: dict) -> dict:
+    """Inverse of to_compact (for clients and tests)."""
+    nodes, groups, relations = compact['nodes'], compact['groups'], compact['relations']
+    links = compact['links']
+    export = {key: value for key, value in compact.items()
+              if key not in ('format', 'nodes', 'groups', 'node_groups', 'relations', 'links')}
+    export['nodes'] = [{'id': n, 'group': groups[g]} for n, g in zip(nodes, compact['node_groups'])]
+    export['links'] = [{'source': nodes[links[i]], 'target': nodes[links[i + 1]],
+                        'relation': relations[links[i + 2]]}
+                       for i in range(0, len(links), 3)]
+    return export
+
+
+def encode_msgpack(compact: dict) -> bytes:
+    if not MSGPACK_AVAILABLE:
+        raise RuntimeError("MessagePack encoding requires the 'msgpack' package")
+    return msgpack.packb(compact, use_bin_type=True)
+
+
+def encode_binary(compact: dict) -> bytes:
+    header = {key: value for key, value in compact.items() if key != 'links'}
+    header['format'] = 'binary'
+    header['link_count'] = len(compact['links']) // 3
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    padding = (-(len(BINARY_MAGIC) + 4 + len(header_bytes))) % 4
+    links = array('i', compact['links'])
+    if sys.byteorder != 'little':
+        links.byteswap()
+    return b''.join([BINARY_MAGIC, struct.pack('<I', len(header_bytes)), header_bytes,
+                     b' ' * padding, links.tobytes()])
+
+
+def decode_binary(payload: bytes) -> dict:
+    """Inverse of encode_binary, returning the compact dict."""
+    if payload[:4] != BINARY_MAGIC:
+        raise ValueError('Not a KGB1 payload')
+    (header_length,) = struct.unpack_from('<I', payload, 4)
+    start = 8 + header_length
+    compact = json.loads(payload[8:start].decode('utf-8'))
+    start += (-start) % 4
+    links = array('i')
+    links.frombytes(payload[start:])
+    if sys.byteorder != 'little':
+        links.byteswap()
+    compact['links'] = links.tolist()
+    compact['format'] = 'compact'
+    del compact['link_count']
+    return compact
@@ -2,6 +2,21 @@ import axios from 'axios';
 
 const API_BASE = '/api';
 
+// Decode a format=binary graph payload (see classes/kg_wire.py) into D3 nodes/links
+const decodeBinaryGraph = (buffer) => {
+  const view = new DataView(buffer);
+  const headerLength = view.getUint32(4, true);
+  const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 8, headerLength)));
+  const offset = 8 + headerLength + ((4 - ((8 + headerLength) % 4)) % 4);
+  const links = new Int32Array(buffer, offset, header.link_count * 3);
+  const nodes = header.nodes.map((id, i) => ({ id, group: header.groups[header.node_groups[i]] }));
+  const decoded = [];
+  for (let i = 0; i < links.length; i += 3) {
+    decoded.push({ source: header.nodes[links[i]], target: header.nodes[links[i + 1]], relation: header.relations[links[i + 2]] });
+  }
+  return { ...header, nodes, links: decoded };
+};
+
 export const api = {
   // Files
   getFiles: () => axios.get(`${API_BASE}/files`).then(r => r.data),
@@ -15,10 +30,28 @@ export const api = {
   
   // Graph
   getGraph: () => axios.get(`${API_BASE}/graph`).then(r => r.data),
+  getGraphBinary: (params = '') =>
+    axios.get(`${API_BASE}/graph?format=binary&${params}`, { responseType: 'arraybuffer' }).then(r => decodeBinaryGraph(r.data)),
+  getGraphPreview: (budget = 300) => axios.get(`${API_BASE}/graph?budget=${budget}`).then(r => r.data),
+  getOverview: (expand = [], maxCommunities = 50) =>
+    axios.get(`${API_BASE}/graph?mode=overview&expand=${expand.join(',')}&max_communities=${maxCommunities}`).then(r => r.data),
+  getCommunities: (members = false) =>
+    axios.get(`${API_BASE}/communities?members=${members ? 1 : 0}`).then(r => r.data),
   getSubgraph: (params) => axios.get(`${API_BASE}/subgraph?${params}`).then(r => r.data),
   getImage: () => `${API_BASE}/image?v=${Date.now()}`,
   
+  subscribeEvents: (handlers) => {
+    const source = new EventSource(`${API_BASE}/events`);
+    Object.entries(handlers).forEach(([event, handler]) =>
+      source.addEventListener(event, (e) => handler(JSON.parse(e.data))));
+    return () => source.close();
+  },
+  getChanges: (since, feed) =>
+    axios.get(`${API_BASE}/changes?since=${since}&feed=${encodeURIComponent(feed || '')}`).then(r => r.data),
+  
   // Triples
+  getExportUrl: (format = 'ndjson', relation = '') =>
+    `${API_BASE}/export?format=${format}&relation=${encodeURIComponent(relation)}`,
   getTriples: (params) => axios.get(`${API_BASE}/triples?${params}`).then(r => r.data),
   addTriple: (subject, predicate, object) => 
     axios.post(`${API_BASE}/add_triple`, { subject, predicate, object }).then(r => r.data),
@@ -32,8 +65,20 @@ export const api = {
     axios.get(`${API_BASE}/prerequisites?concept=${encodeURIComponent(concept)}&depth=${depth}`).then(r => r.data),
   getPath: (start, end) => 
     axios.get(`${API_BASE}/path?start=${encodeURIComponent(start)}&end=${encodeURIComponent(end)}`).then(r => r.data),
+  getConfidentPaths: (start, end, k = 3, relations = '', maxHops = null) =>
+    axios.get(`${API_BASE}/path?start=${encodeURIComponent(start)}&end=${encodeURIComponent(end)}&mode=confidence&k=${k}&relations=${encodeURIComponent(relations)}${maxHops ? `&max_hops=${maxHops}` : ''}`).then(r => r.data),
   getConcept: (name) => 
     axios.get(`${API_BASE}/concept?name=${encodeURIComponent(name)}`).then(r => r.data),
+  getConcepts: (names, radius = null) =>
+    axios.post(`${API_BASE}/concepts`, radius === null ? { names } : { names, radius }).then(r => r.data),
+  batch: (operations) =>
+    axios.post(`${API_BASE}/batch`, { operations }).then(r => r.data),
+  runQuery: (query, limit = 100) =>
+    axios.post(`${API_BASE}/query`, { query, limit }).then(r => r.data),
+  regularPathQuery: (path, source, target = null, limit = 1000) =>
+    axios.post(`${API_BASE}/rpq`, target ? { path, source, target } : { path, source, limit }).then(r => r.data),
+  getCentrality: (metric = 'pagerank', top = 10, relation = '') =>
+    axios.get(`${API_BASE}/analytics/centrality?metric=${metric}&top=${top}&relation=${encodeURIComponent(relation)}`).then(r => r.data),
   updateMetadata: (node, type, description, examples) => 
     axios.post(`${API_BASE}/update_metadata`, { node, type, description, examples }).then(r => r.data),
   
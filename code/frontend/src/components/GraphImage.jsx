@@ -8,6 +8,9 @@ export default function GraphImage({ refreshTrigger }) {
     refreshImage();
   }, [refreshTrigger]);
 
+  // Pick up re-renders triggered by other tabs or users
+  useEffect(() => api.subscribeEvents({ render_completed: refreshImage }), []);
+
   const refreshImage = () => {
     setImageSrc(api.getImage());
   };
@@ -0,0 +1,106 @@
+"""
+HTTP compression helpers for the web interface.
+
+- `gzip_response()` compresses a Flask response in place when the client
+  accepts gzip and the body is large enough to be worth it.
+- `precompressed_path()` returns the `.gz` sibling of a static file, creating
+  or refreshing it first if needed, so assets are compressed once rather than
+  per request.
+- Run as a script after `npm run build` to precompress the whole build:
+
+      python kg_compression.py frontend/dist
+"""
+
+import gzip
+import os
+import re
+import sys
+from typing import Optional
+
+# Bodies below roughly one network packet gain nothing from compression
+MIN_COMPRESS_BYTES = 1400
+GZIP_LEVEL = 6
+# Static assets are compressed once, so spend more CPU on them
+STATIC_GZIP_LEVEL = 9
+
+COMPRESSIBLE_MIMETYPES = (
+    'application/json',
+    'application/javascript',
+    'application/msgpack',
+    'application/vnd.kg.graph+binary',
+    'image/svg+xml',
+    'text/',
+)
+STATIC_EXTENSIONS = ('.js', '.css', '.html', '.svg', '.json', '.map', '.txt')
+
+# Vite names build outputs like index-BkW9K0Ds.js (or .js.map): '-' and exactly 8
+# base64url characters. Requiring a digit or capital keeps hyphenated words such as
+# my-component.js or app-settings.css, whose content can change, out of the match.
+HASHED_FILENAME = re.compile(r'-(?=[A-Za-z0-9_-]{0,7}[A-Z0-9])[A-Za-z0-9_-]{8}(\.[a-z0-9]+)+$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def is_compressible(mimetype: Optional[str]) -> bool:
+    return bool(mimetype) and any(mimetype.startswith(prefix) for prefix in COMPRESSIBLE_MIMETYPES)
+
+
+def gzip_response(response, accept_encodings, min_bytes: int = MIN_COMPRESS_BYTES):
+    """Gzip `response` if the client accepts it and the body qualifies; returns the response."""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or not is_compressible(response.mimetype)
+            or 'gzip' not in accept_encodings):
+        return response
+    body = response.get_data()
+    if len(body) < min_bytes:
+        return response
+    response.set_data(gzip.compress(body, GZIP_LEVEL))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def is_hashed_asset(filename: str) -> bool:
+    return bool(HASHED_FILENAME.search(os.path.basename(filename)))
+
+
+def _compress_file(path: str, gz_path: str) -> bool:
+    with open(path, 'rb') as f:
+        data = f.read()
+    tmp_path = f'{gz_path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(gzip.compress(data, STATIC_GZIP_LEVEL, mtime=0))
+        os.replace(tmp_path, gz_path)
+        return True
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+
+def precompressed_path(path: str) -> Optional[str]:
+    """Path of an up-to-date `.gz` copy of `path`, or None if it cannot be provided."""
+    if not path.endswith(STATIC_EXTENSIONS) or not os.path.isfile(path):
+        return None
+    gz_path = path + '.gz'
+    if os.path.exists(gz_path) and os.path.getmtime(gz_path) >= os.path.getmtime(path):
+        return gz_path
+    if os.path.getsize(path) < MIN_COMPRESS_BYTES:
+        return None
+    return gz_path if _compress_file(path, gz_path) else None
+
+
+def precompress_directory(root: str) -> int:
+    """Create or refresh `.gz` copies for every compressible file under `root`."""
+    count = 0
+    for directory, _, files in os.walk(root):
+        for name in files:
+            if precompressed_path(os.path.join(directory, name)):
+                count += 1
+    return count
+
+
+if __name__ == '__main__':
+    target = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), 'frontend', 'dist')
+    print(f"✓ {precompress_directory(target)} precompressed files under {target}")
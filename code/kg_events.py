@@ -0,0 +1,126 @@
+"""
+Server-sent events (SSE) broker for the web interface.
+
+Publishers (mutation endpoints, the render worker) call `publish()`; every
+connected browser holds a `Subscription` with a bounded queue that its
+`/api/events` response streams from. A subscriber that falls too far behind
+is dropped with a final `resync` event instead of buffering without limit,
+and idle connections get a comment line every few seconds so proxies keep
+them open.
+
+Event ids are '<change-feed id>:<graph version>' where there is one, so a
+reconnecting browser's Last-Event-ID identifies both the graph and the point
+it had reached; /api/events replays what it missed, or asks it to resync if
+the graph has been replaced since.
+
+Waiting on a subscription blocks the calling thread; run the server with a
+cooperative worker (e.g. gunicorn -k gevent) so idle connections cost a
+greenlet rather than an OS thread. See DEPLOY.md.
+"""
+
+import json
+import queue
+import threading
+from typing import Iterator, Optional
+
+SSE_CONTENT_TYPE = 'text/event-stream'
+
+
+def format_event(event: str, data, event_id: Optional[str] = None) -> str:
+    """Encode one event in the text/event-stream format."""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    for line in json.dumps(data, default=str).splitlines():
+        lines.append(f'data: {line}')
+    return '\n'.join(lines) + '\n\n'
+
+
+class Subscription:
+    """One connected client's pending events."""
+
+    def __init__(self, max_pending: int):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self.closed = False
+
+    def put(self, message: str) -> bool:
+        try:
+            self._queue.put_nowait(message)
+            return True
+        except queue.Full:
+            return False
+
+    def drop(self, final_message: str):
+        """Discard everything pending and leave only `final_message` to be sent."""
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        self.put(final_message)
+        self.closed = True
+
+    def get(self, timeout: float) -> Optional[str]:
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBroker:
+    """Fan-out of published events to all current subscribers."""
+
+    def __init__(self, max_pending: int = 256, heartbeat: float = 15.0):
+        self.max_pending = max_pending
+        self.heartbeat = heartbeat
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.max_pending)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+        subscription.closed = True
+
+    def publish(self, event: str, data, event_id: Optional[str] = None) -> int:
+        """Queue an event for every subscriber; returns how many received it."""
+        message = format_event(event, data, event_id)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        delivered = 0
+        for subscription in subscribers:
+            if subscription.put(message):
+                delivered += 1
+            else:
+                # Too slow to keep up: tell it to resync and let its stream end
+                with self._lock:
+                    self._subscribers.discard(subscription)
+                subscription.drop(format_event('resync', {'reason': 'client fell behind'}))
+        return delivered
+
+    def stream(self, subscription: Subscription, retry_ms: int = 3000) -> Iterator[str]:
+        """Yield SSE text for `subscription` until it is dropped or the client disconnects."""
+        try:
+            yield f'retry: {retry_ms}\n\n'
+            while True:
+                message = subscription.get(self.heartbeat)
+                if message is None:
+                    if subscription.closed:
+                        return
+                    yield ': keep-alive\n\n'
+                    continue
+                yield message
+                if subscription.closed:
+                    return
+        finally:
+            self.unsubscribe(subscription)
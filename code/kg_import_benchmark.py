@@ -0,0 +1,90 @@
+"""
+Import-time (cold start) benchmark
+
+Measures how long it takes a fresh interpreter to import the graph class and
+the web interface, and checks that neither pulls in matplotlib. Each sample
+runs in a new subprocess so module caches don't hide the real cost.
+
+Run with:
+    python kg_import_benchmark.py --repeat 10
+    python kg_import_benchmark.py --importtime   # per-module breakdown (python -X importtime)
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+CODE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Module name -> module that must NOT be loaded as a side effect
+TARGETS = [
+    ('classes.class_scientific_kg', 'matplotlib'),
+    ('kg_web_interface', 'matplotlib'),
+]
+
+_PROBE = """
+import sys, time, json
+t0 = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t0
+print(json.dumps({{'seconds': elapsed, 'forbidden_loaded': {forbidden!r} in sys.modules}}))
+"""
+
+
+def measure(module: str, forbidden: str) -> dict:
+    """Import `module` in a fresh interpreter and report the elapsed time."""
+    result = subprocess.run(
+        [sys.executable, '-c', _PROBE.format(module=module, forbidden=forbidden)],
+        cwd=CODE_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def importtime_report(module: str, top: int = 15):
+    """Print the slowest modules reported by `python -X importtime`."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=CODE_DIR, capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        # Format: "import time: <self us> | <cumulative us> | <indented module name>"
+        self_us, cumulative_us, name = line.split(':', 1)[1].split('|')
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    rows.sort(reverse=True)
+    print(f"\nSlowest imports for {module} (cumulative us, self us):")
+    for cumulative, self_time, name in rows[:top]:
+        print(f"  {cumulative:>10} {self_time:>10}  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold import time")
+    parser.add_argument('--repeat', type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument('--importtime', action='store_true',
+                        help="Also print a python -X importtime breakdown")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("IMPORT-TIME BENCHMARK")
+    print("=" * 60)
+    failed = False
+    for module, forbidden in TARGETS:
+        samples = [measure(module, forbidden) for _ in range(args.repeat)]
+        times = sorted(s['seconds'] * 1000 for s in samples)
+        leaked = any(s['forbidden_loaded'] for s in samples)
+        failed = failed or leaked
+        print(f"{module:<30} min {times[0]:8.1f} ms   median {statistics.median(times):8.1f} ms"
+              f"   {forbidden} loaded: {'YES' if leaked else 'no'}")
+        if args.importtime:
+            importtime_report(module)
+    print("=" * 60)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
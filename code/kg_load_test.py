@@ -0,0 +1,369 @@
+"""
+Load-testing harness for the Knowledge Graph web API
+
+Replays a weighted mix of API calls against `kg_web_interface.app` from
+several concurrent workers and reports per-endpoint latency percentiles
+(p50/p95/p99) and throughput.
+
+Two modes are supported:
+- inprocess: requests go through Flask's test client (no sockets)
+- wsgi:      the app is served by a local threaded WSGI server and
+             requests go over HTTP
+
+When the harness starts the app itself, mutations are applied to a temporary
+copy of the dataset, so the files in data/ are not modified. With --url the
+requests go to a live server that saves every edit to its real dataset, so
+the 'mutate' operation is skipped there unless --allow-writes is given (each
+mutation then leaves an isolated loadtest_N concept behind, because removing
+a triple does not remove its concepts).
+
+Run with:
+    python kg_load_test.py --file wave_kg.json --workers 8 --duration 20
+    python kg_load_test.py --mode wsgi --mix neighbors=5,path=2,graph=1,mutate=1
+    python kg_load_test.py --url http://127.0.0.1:5000 --mix neighbors=1,path=1,graph=1
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from socketserver import ThreadingMixIn
+from typing import Dict, List, Optional, Tuple
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+import kg_web_interface
+from classes.class_scientific_kg import ScientificKnowledgeGraph
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+# Default operation mix (relative weights)
+DEFAULT_MIX = {
+    'neighbors': 40,
+    'path': 20,
+    'triples': 20,
+    'graph': 10,
+    'mutate': 10,
+}
+
+
+# ============= WSGI SERVER =============
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    """Threaded variant of the stdlib WSGI server."""
+    daemon_threads = True
+
+
+class _QuietHandler(WSGIRequestHandler):
+    """Request handler that does not log every request to stderr."""
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_wsgi_server(host: str = '127.0.0.1', port: int = 0):
+    """Serve the Flask app on a background thread.
+
+    Returns:
+        (server, base_url) tuple; call server.shutdown() when done
+    """
+    server = make_server(host, port, kg_web_interface.app,
+                         server_class=_ThreadingWSGIServer,
+                         handler_class=_QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+# ============= CLIENTS =============
+
+class InProcessClient:
+    """Issues requests through Flask's test client."""
+
+    def __init__(self):
+        self.client = kg_web_interface.app.test_client()
+
+    def get(self, path: str, params: dict) -> int:
+        response = self.client.get(path, query_string=params)
+        response.get_data()
+        return response.status_code
+
+    def post(self, path: str, payload: dict) -> int:
+        response = self.client.post(path, json=payload)
+        response.get_data()
+        return response.status_code
+
+
+class HTTPClient:
+    """Issues requests to a running server over HTTP."""
+
+    def __init__(self, base_url: str, timeout: float = 30.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def _send(self, req: urllib.request.Request) -> int:
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code
+
+    def get(self, path: str, params: dict) -> int:
+        url = f"{self.base_url}{path}"
+        if params:
+            url += '?' + urllib.parse.urlencode(params)
+        return self._send(urllib.request.Request(url))
+
+    def post(self, path: str, payload: dict) -> int:
+        req = urllib.request.Request(
+            f"{self.base_url}{path}",
+            data=json.dumps(payload).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        return self._send(req)
+
+
+# ============= WORKLOAD =============
+
+class Workload:
+    """Generates randomized requests for each operation in the mix."""
+
+    def __init__(self, kg: ScientificKnowledgeGraph, seed: Optional[int] = None):
+        self.concepts = sorted(kg.graph.nodes())
+        self.relations = sorted(kg.relation_types)
+        self.rng = random.Random(seed)
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def _concept(self) -> str:
+        return self.rng.choice(self.concepts)
+
+    def _next_id(self) -> int:
+        with self._lock:
+            self._counter += 1
+            return self._counter
+
+    def run(self, op: str, client) -> List[Tuple[str, float, int]]:
+        """Execute one operation and return (endpoint, seconds, status) samples."""
+        if op == 'neighbors':
+            return [_timed('/api/neighbors', client.get, '/api/neighbors',
+                           {'concept': self._concept()})]
+        if op == 'path':
+            return [_timed('/api/path', client.get, '/api/path',
+                           {'start': self._concept(), 'end': self._concept()})]
+        if op == 'triples':
+            params = {'page': self.rng.randint(1, 5), 'page_size': 20}
+            if self.relations and self.rng.random() < 0.5:
+                params['relation'] = self.rng.choice(self.relations)
+            return [_timed('/api/triples', client.get, '/api/triples', params)]
+        if op == 'graph':
+            return [_timed('/api/graph', client.get, '/api/graph', {})]
+        if op == 'mutate':
+            # Add a throw-away triple and remove it again so the graph stays stable
+            triple = {
+                'subject': f"loadtest_{self._next_id()}",
+                'predicate': 'related_to',
+                'object': self._concept(),
+            }
+            return [
+                _timed('/api/add_triple', client.post, '/api/add_triple', triple),
+                _timed('/api/remove_triple', client.post, '/api/remove_triple', triple),
+            ]
+        raise ValueError(f"Unknown operation: {op}")
+
+
+def _timed(endpoint: str, fn, *args) -> Tuple[str, float, int]:
+    t0 = time.perf_counter()
+    try:
+        status = fn(*args)
+    except Exception:
+        status = 0
+    return endpoint, time.perf_counter() - t0, status
+
+
+def parse_mix(spec: str) -> Dict[str, int]:
+    """Parse a mix spec like 'neighbors=5,path=2,graph=1'."""
+    mix = {}
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Unknown operation '{name}' (choose from {', '.join(DEFAULT_MIX)})")
+        mix[name] = int(weight) if weight else 1
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("Mix must contain at least one operation with positive weight")
+    return mix
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+# ============= RUNNER =============
+
+def setup_graph(filename: str, workdir: str) -> ScientificKnowledgeGraph:
+    """Load a dataset into the web app, pointing persistence at a temporary copy."""
+    source = os.path.join(DATA_DIR, os.path.basename(filename))
+    target = os.path.join(workdir, os.path.basename(filename))
+    shutil.copyfile(source, target)
+    kg = ScientificKnowledgeGraph()
+    kg.load_from_json(target)
+    kg_web_interface.kg = kg
+    kg_web_interface.current_file = target
+    return kg
+
+
+def run_load(make_client, workload: Workload, mix: Dict[str, int], workers: int,
+             duration: Optional[float] = None, requests: Optional[int] = None) -> dict:
+    """Run the workload with `workers` threads until duration or request budget is exhausted.
+
+    Returns:
+        dict with 'samples' (endpoint -> list of (seconds, status)) and 'elapsed'
+    """
+    ops = list(mix.keys())
+    weights = [mix[op] for op in ops]
+    samples = defaultdict(list)
+    samples_lock = threading.Lock()
+    remaining = [requests]
+    stop_at = time.perf_counter() + duration if duration else None
+
+    def take_ticket() -> bool:
+        if stop_at is not None and time.perf_counter() >= stop_at:
+            return False
+        if remaining[0] is None:
+            return True
+        with samples_lock:
+            if remaining[0] <= 0:
+                return False
+            remaining[0] -= 1
+            return True
+
+    def worker(seed: int):
+        client = make_client()
+        rng = random.Random(seed)
+        while take_ticket():
+            op = rng.choices(ops, weights=weights)[0]
+            results = workload.run(op, client)
+            with samples_lock:
+                for endpoint, seconds, status in results:
+                    samples[endpoint].append((seconds, status))
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(workers)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return {'samples': dict(samples), 'elapsed': time.perf_counter() - t0}
+
+
+def summarize(result: dict) -> List[dict]:
+    """Compute per-endpoint latency percentiles and throughput."""
+    elapsed = result['elapsed'] or 1e-9
+    rows = []
+    for endpoint in sorted(result['samples']):
+        entries = result['samples'][endpoint]
+        latencies = sorted(s for s, _ in entries)
+        errors = sum(1 for _, status in entries if status == 0 or status >= 500)
+        rows.append({
+            'endpoint': endpoint,
+            'count': len(entries),
+            'errors': errors,
+            'throughput_rps': round(len(entries) / elapsed, 2),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+            'max_ms': round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        })
+    return rows
+
+
+def print_report(rows: List[dict], elapsed: float):
+    total = sum(r['count'] for r in rows)
+    print("=" * 86)
+    print(f"{'endpoint':<22}{'count':>8}{'errors':>8}{'req/s':>10}"
+          f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    print("-" * 86)
+    for r in rows:
+        print(f"{r['endpoint']:<22}{r['count']:>8}{r['errors']:>8}{r['throughput_rps']:>10}"
+              f"{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{r['max_ms']:>10}")
+    print("-" * 86)
+    print(f"Total: {total} requests in {elapsed:.2f}s ({total / (elapsed or 1e-9):.2f} req/s)")
+    print("=" * 86)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the Knowledge Graph web API")
+    parser.add_argument('--mode', choices=['inprocess', 'wsgi'], default='inprocess',
+                        help="Drive the app in-process or through a local WSGI server")
+    parser.add_argument('--url', default=None,
+                        help="Target an already running server instead of starting one")
+    parser.add_argument('--file', default='wave_kg.json', help="Dataset in data/ to load")
+    parser.add_argument('--workers', type=int, default=4, help="Concurrent client threads")
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds to run")
+    parser.add_argument('--requests', type=int, default=None,
+                        help="Stop after this many operations (overrides --duration)")
+    parser.add_argument('--mix', default=None,
+                        help="Operation weights, e.g. neighbors=40,path=20,triples=20,graph=10,mutate=10")
+    parser.add_argument('--seed', type=int, default=None, help="Random seed")
+    parser.add_argument('--json', dest='json_out', default=None,
+                        help="Also write the summary to this JSON file")
+    parser.add_argument('--allow-writes', action='store_true',
+                        help="With --url, also run 'mutate' (edits and saves the server's dataset)")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix) if args.mix else dict(DEFAULT_MIX)
+    if args.url and not args.allow_writes and mix.pop('mutate', None) is not None:
+        print("Skipping 'mutate' against a live server (pass --allow-writes to include it)")
+        if not mix:
+            parser.error("nothing left to run without 'mutate'; pass --allow-writes or change --mix")
+    duration = None if args.requests else args.duration
+    workdir = tempfile.mkdtemp(prefix='kg_load_')
+    server = None
+    try:
+        kg = setup_graph(args.file, workdir)
+        workload = Workload(kg, seed=args.seed)
+
+        if args.url:
+            make_client = lambda: HTTPClient(args.url)
+        elif args.mode == 'wsgi':
+            server, base_url = start_wsgi_server()
+            make_client = lambda: HTTPClient(base_url)
+        else:
+            make_client = InProcessClient
+
+        print(f"Load test: mode={'remote' if args.url else args.mode} file={args.file} "
+              f"workers={args.workers} mix={mix}")
+        result = run_load(make_client, workload, mix, args.workers,
+                          duration=duration, requests=args.requests)
+        rows = summarize(result)
+        print_report(rows, result['elapsed'])
+        if args.json_out:
+            with open(args.json_out, 'w') as f:
+                json.dump({'elapsed': result['elapsed'], 'endpoints': rows}, f, indent=2)
+    finally:
+        if server is not None:
+            server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Lightweight in-process metrics for the Knowledge Graph web interface
+
+Provides counters, gauges and histograms with label support, plus
+callback-based collectors for values that are read on demand (graph size,
+cache statistics, ...). Everything can be rendered in the Prometheus text
+exposition format.
+
+No external dependencies; every metric family is guarded by its own lock.
+"""
+
+import math
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Default latency buckets in seconds (1ms .. 10s)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((labels or {}).items()))
+
+
+class _Metric:
+    """Base class: a named metric family with per-label-set values."""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, help_text: str, lock: threading.Lock):
+        self.name = name
+        self.help = help_text
+        self._lock = lock
+        self._values = {}
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing value."""
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1.0, labels: Optional[Dict[str, str]] = None):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    kind = 'gauge'
+
+    def set(self, value: float, labels: Optional[Dict[str, str]] = None):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def inc(self, amount: float = 1.0, labels: Optional[Dict[str, str]] = None):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, labels: Optional[Dict[str, str]] = None):
+        self.inc(-amount, labels)
+
+    def get(self, labels: Optional[Dict[str, str]] = None) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Cumulative bucketed distribution of observed values."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, lock: threading.Lock,
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, lock)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, labels: Optional[Dict[str, str]] = None):
+        key = _label_key(labels)
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # [per-bucket counts (+Inf last), sum, count]
+                entry = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._values[key] = entry
+            entry[0][idx] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            items = sorted((k, ([*v[0]], v[1], v[2])) for k, v in self._values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                labels = key + (('le', _format_value(float(bound))),)
+                lines.append(f"{self.name}_bucket{_format_labels(labels)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+# A collector returns (name, kind, help, [(labels_dict, value), ...]) families
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]]]
+
+
+class MetricsRegistry:
+    """Holds metric families and on-demand collectors."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Collector] = []
+        self._caches: Dict[str, 'CacheStats'] = {}
+
+    def _get_or_create(self, cls, name: str, help_text: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, help_text, threading.Lock(), **kwargs)
+                self._metrics[name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._get_or_create(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self._get_or_create(Gauge, name, help_text)
+
+    def histogram(self, name: str, help_text: str,
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, buckets=buckets)
+
+    def cache(self, name: str) -> 'CacheStats':
+        """Get (or create) the hit/miss statistics for a named cache."""
+        with self._lock:
+            stats = self._caches.get(name)
+            if stats is None:
+                stats = CacheStats()
+                self._caches[name] = stats
+            return stats
+
+    def register_collector(self, collector: Collector):
+        """Register a callback evaluated at scrape time."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+            collectors = list(self._collectors)
+            caches = sorted(self._caches.items())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        if caches:
+            for suffix, kind, help_text, getter in (
+                ('hits_total', 'counter', 'Cache hits', lambda c: c.hits),
+                ('misses_total', 'counter', 'Cache misses', lambda c: c.misses),
+                ('hit_ratio', 'gauge', 'Cache hit ratio since start', lambda c: c.hit_rate),
+            ):
+                lines.append(f"# HELP kg_cache_{suffix} {help_text}")
+                lines.append(f"# TYPE kg_cache_{suffix} {kind}")
+                for name, stats in caches:
+                    lines.append(f'kg_cache_{suffix}{{cache="{_escape(name)}"}} {_format_value(getter(stats))}')
+        for collector in collectors:
+            try:
+                families = list(collector())
+            except Exception:
+                continue
+            for name, kind, help_text, samples in families:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(_label_key(labels))} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+class CacheStats:
+    """Hit/miss counters for an in-process cache."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def miss(self):
+        with self._lock:
+            self.misses += 1
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
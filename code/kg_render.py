@@ -0,0 +1,64 @@
+"""
+Render a knowledge graph JSON file to a PNG
+
+kg_web_interface runs this in a child process for every static image, so the
+matplotlib layout and savefig (seconds of CPU on large graphs) never run in a
+web worker. Under gevent a render thread would only be a greenlet and would
+stall every request and event stream until the image was written.
+
+Run with:
+    python kg_render.py data/wave_kg.json data/wave_kg_visualization.png
+"""
+
+import argparse
+import os
+import sys
+
+from classes.class_scientific_kg import ScientificKnowledgeGraph
+
+
+def render_png(kg: ScientificKnowledgeGraph, image_path: str, dpi: int = 150):
+    """
+    Draw the whole graph and write it to `image_path`.
+
+    The image is written to a temporary file first and moved into place, so a
+    reader never sees a half-written PNG.
+    """
+    from classes.kg_visualization import use_headless_backend
+    use_headless_backend()
+    import matplotlib.pyplot as plt
+
+    os.makedirs(os.path.dirname(os.path.abspath(image_path)), exist_ok=True)
+    partial_path = f'{image_path}.{os.getpid()}.tmp.png'
+    try:
+        kg.visualize(concept="", radius=2)
+        plt.savefig(partial_path, dpi=dpi, bbox_inches='tight')
+        os.replace(partial_path, image_path)
+    finally:
+        plt.close('all')
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a knowledge graph JSON file to a PNG")
+    parser.add_argument('graph', help="Graph JSON file (as written by save_to_json)")
+    parser.add_argument('output', help="PNG file to write")
+    parser.add_argument('--dpi', type=int, default=150, help="Image resolution")
+    args = parser.parse_args()
+
+    kg = ScientificKnowledgeGraph()
+    kg.load_from_json(args.graph)
+    if kg.graph.number_of_nodes() == 0:
+        print("Warning: Graph has no nodes, skipping visualization")
+        return
+    try:
+        render_png(kg, args.output, dpi=args.dpi)
+    except Exception as e:
+        print(f"Error generating visualization: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"✓ Saved visualization to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Cache of encoded API responses, valid for one graph version.
+
+Read endpoints whose output depends only on the graph (graph export, stats,
+the first pages of the triple list) store their encoded body here together
+with a gzip-compressed copy made once at store time. Until the next mutation
+a request costs a dictionary lookup; conditional requests carrying the ETag
+get a 304 without a body.
+
+Entries are tagged with a version token (change-feed id + graph version), so
+an edit or a file switch makes every entry stale without explicit
+invalidation.
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+# Bodies smaller than this are not worth compressing
+GZIP_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+
+
+class CachedResponse:
+    """An encoded response body with its precompressed variant."""
+
+    def __init__(self, body: bytes, mimetype: str, token: str):
+        self.body = body
+        self.mimetype = mimetype
+        self.token = token
+        self.gzip_body = gzip.compress(body, GZIP_LEVEL, mtime=0) if len(body) >= GZIP_MIN_BYTES else None
+        self.etag = hashlib.blake2b(body, digest_size=12).hexdigest()
+
+
+class ResponseCache:
+    """LRU map of endpoint keys to CachedResponse, valid for a single version token."""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[tuple, CachedResponse]' = OrderedDict()
+        self._token: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: tuple, token: str) -> Optional[CachedResponse]:
+        with self._lock:
+            if token != self._token:
+                return None
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple, token: str, body: bytes, mimetype: str) -> CachedResponse:
+        entry = CachedResponse(body, mimetype, token)
+        with self._lock:
+            if token != self._token:
+                self._entries.clear()
+                self._token = token
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._token = None
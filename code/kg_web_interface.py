@@ -6,26 +6,32 @@ Run with: python kg_web_interface.py
 Then visit: http://localhost:5000
 """
 
-# Set matplotlib backend before importing pyplot (required for server environments)
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend (no GUI required)
-
-# Suppress matplotlib warnings (3D projection, etc. - we don't use 3D plotting)
-import warnings
-warnings.filterwarnings('ignore', category=UserWarning, module='matplotlib')
-
-from flask import Flask, render_template_string, request, jsonify, send_from_directory
+# matplotlib is never imported here: PNGs are drawn by kg_render.py in a child
+# process (see _save_visualization), so web workers never pay for it.
+from flask import Flask, render_template_string, request, jsonify, send_from_directory, g
 try:
     from flask_cors import CORS
     CORS_AVAILABLE = True
 except ImportError:
     CORS_AVAILABLE = False
-from phase1_kg_starter import build_example_wave_kg
 from classes.class_scientific_kg import ScientificKnowledgeGraph
+from classes.kg_tracing import QueryProfiler, tracing
+from kg_metrics import MetricsRegistry, PROMETHEUS_CONTENT_TYPE
+from kg_events import EventBroker, SSE_CONTENT_TYPE, format_event
+from classes import kg_wire, kg_export
+from kg_response_cache import ResponseCache
+from kg_compression import gzip_response, is_hashed_asset, precompressed_path, IMMUTABLE_CACHE_CONTROL
 import json
+import mimetypes
 import os
 import glob
-import matplotlib.pyplot as plt
+import functools
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
 
 # Configure Flask to serve React build
 frontend_dist = os.path.join(os.path.dirname(__file__), 'frontend', 'dist')
@@ -46,6 +52,100 @@ else:
 kg = None
 # Track the currently loaded JSON file
 current_file = None
+# Held while the graph is mutated, and for the whole of a /api/batch request so
+# every operation in the batch sees the same version of the graph
+graph_lock = threading.RLock()
+# Server-sent events to connected browsers (see /api/events)
+events = EventBroker()
+# Encoded bodies of hot read endpoints for the current graph version
+response_cache = ResponseCache()
+# /api/triples pages up to this number are served from the response cache
+CACHED_TRIPLE_PAGES = 3
+# Upper bound on k for /api/path?mode=confidence (each extra path costs a Yen round)
+MAX_CONFIDENT_PATHS = 20
+# Upper bound on the number of concepts returned by /api/rpq
+MAX_RPQ_RESULTS = 10000
+# Upper bound on max_communities for /api/graph?mode=overview
+MAX_OVERVIEW_COMMUNITIES = 1000
+
+# ============================================================================
+# Metrics
+# ============================================================================
+
+metrics = MetricsRegistry()
+REQUEST_LATENCY = metrics.histogram('kg_http_request_duration_seconds',
+                                    'HTTP request latency by route and method')
+REQUESTS_TOTAL = metrics.counter('kg_http_requests_total',
+                                 'HTTP requests by route, method and status code')
+REQUEST_ERRORS = metrics.counter('kg_http_request_errors_total',
+                                 'HTTP requests that failed with a 5xx status or an exception')
+REQUESTS_IN_FLIGHT = metrics.gauge('kg_http_requests_in_flight',
+                                   'HTTP requests currently being processed')
+RENDER_LATENCY = metrics.histogram('kg_render_duration_seconds',
+                                   'Time spent rendering the PNG visualization',
+                                   buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+RENDER_QUEUE_DEPTH = metrics.gauge('kg_render_queue_depth',
+                                   'Visualization renders waiting or in progress')
+RENDER_QUEUE_DEPTH.set(0)
+
+
+def _collect_graph_metrics():
+    """Graph-level gauges, read at scrape time."""
+    if kg is None:
+        return []
+    return [
+        ('kg_graph_nodes', 'gauge', 'Number of concepts in the active graph',
+         [({}, kg.graph.number_of_nodes())]),
+        ('kg_graph_edges', 'gauge', 'Number of triples in the active graph',
+         [({}, kg.graph.number_of_edges())]),
+        ('kg_graph_relation_types', 'gauge', 'Number of distinct relation types',
+         [({}, len(kg.relation_types))]),
+        ('kg_graph_version', 'gauge', 'Mutation counter of the active graph',
+         [({}, kg.version)]),
+        ('kg_event_subscribers', 'gauge', 'Connected /api/events streams',
+         [({}, len(events))]),
+    ]
+
+
+metrics.register_collector(_collect_graph_metrics)
+
+
+@app.before_request
+def _start_request_timer():
+    g.request_start = time.perf_counter()
+    g.response_status = None
+    REQUESTS_IN_FLIGHT.inc()
+
+
+@app.after_request
+def _record_response_status(response):
+    g.response_status = response.status_code
+    return response
+
+
+@app.after_request
+def _compress_api_response(response):
+    """Gzip larger API responses for clients that accept it."""
+    if request.path.startswith('/api/'):
+        gzip_response(response, request.accept_encodings)
+    return response
+
+
+@app.teardown_request
+def _record_request_metrics(exc):
+    start = g.pop('request_start', None)
+    if start is None:
+        return
+    REQUESTS_IN_FLIGHT.dec()
+    status = g.pop('response_status', None)
+    if exc is not None or status is None:
+        status = 500
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    labels = {'route': route, 'method': request.method}
+    REQUEST_LATENCY.observe(time.perf_counter() - start, labels)
+    REQUESTS_TOTAL.inc(labels={**labels, 'status': str(status)})
+    if status >= 500:
+        REQUEST_ERRORS.inc(labels=labels)
 
 # HTML Template with embedded CSS and JavaScript
 HTML_TEMPLATE = """
@@ -1269,32 +1369,169 @@ HTML_TEMPLATE = """
 </html>
 """
 
+def profiled(view):
+    """Attach the graph's execution profile to a JSON response when ?profile=1 is passed."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.args.get('profile', '').lower() not in ('1', 'true', 'yes'):
+            return view(*args, **kwargs)
+        profiler = QueryProfiler()
+        with tracing(profiler):
+            rv = view(*args, **kwargs)
+        profiler.stop()
+        response = app.make_response(rv)
+        payload = response.get_json(silent=True)
+        if not isinstance(payload, dict):
+            return response
+        payload['profile'] = profiler.to_dict()
+        profiled_response = jsonify(payload)
+        profiled_response.status_code = response.status_code
+        return profiled_response
+    return wrapper
+
+def _serve_cached(key: tuple, build):
+    """Serve `build()`'s response from the response cache while the graph version is unchanged.
+
+    Only 200 responses are cached. Profiled requests bypass the cache so the
+    profile reflects the actual query work.
+    """
+    if request.args.get('profile', '').lower() in ('1', 'true', 'yes'):
+        return build()
+    with graph_lock:
+        token = f'{kg.changes.id}:{kg.version}'
+        entry = response_cache.get(key, token)
+        if entry is None:
+            metrics.cache('responses').miss()
+            response = app.make_response(build())
+            if response.status_code != 200:
+                return response
+            entry = response_cache.put(key, token, response.get_data(), response.mimetype)
+        else:
+            metrics.cache('responses').hit()
+
+    # The gzip body is a different byte representation, so it gets its own strong ETag.
+    # A conditional request for either encoding of the current content is a 304 that
+    # confirms the copy the client holds (preferring the encoding it would be sent now).
+    use_gzip = entry.gzip_body is not None and 'gzip' in request.accept_encodings
+    etags = (f'{entry.etag}-gz', entry.etag) if use_gzip else (entry.etag, f'{entry.etag}-gz')
+    matched = next((tag for tag in etags if tag in request.if_none_match), None)
+    etag = matched or etags[0]
+    if matched:
+        response = app.response_class(status=304)
+    elif use_gzip:
+        response = app.response_class(entry.gzip_body, mimetype=entry.mimetype)
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = app.response_class(entry.body, mimetype=entry.mimetype)
+    response.set_etag(etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def _graph_response(data: dict):
+    """Encode a D3 export in the wire format requested with ?format=json|compact|msgpack|binary."""
+    fmt = request.args.get('format', 'json').strip() or 'json'
+    if fmt == 'json':
+        return jsonify(data)
+    if fmt not in kg_wire.FORMATS:
+        return jsonify({'error': f"format must be one of {', '.join(kg_wire.FORMATS)}"}), 400
+    compact = kg_wire.to_compact(data)
+    if fmt == 'compact':
+        return jsonify(compact)
+    if fmt == 'msgpack':
+        if not kg_wire.MSGPACK_AVAILABLE:
+            return jsonify({'error': "format=msgpack requires the 'msgpack' package on the server"}), 501
+        return app.response_class(kg_wire.encode_msgpack(compact), mimetype=kg_wire.MSGPACK_CONTENT_TYPE)
+    return app.response_class(kg_wire.encode_binary(compact), mimetype=kg_wire.BINARY_CONTENT_TYPE)
+
+@app.route('/api/metrics')
+def api_metrics():
+    """Expose request and graph metrics in the Prometheus text format."""
+    return app.response_class(metrics.render(), mimetype=None,
+                              headers={'Content-Type': PROMETHEUS_CONTENT_TYPE})
+
 @app.route('/api/stats')
 def get_stats():
     """Get graph statistics."""
-    return jsonify({
+    return _serve_cached(('stats',), lambda: jsonify({
         'nodes': kg.graph.number_of_nodes(),
         'edges': kg.graph.number_of_edges(),
         'relation_types': len(kg.relation_types),
-        'relations': list(kg.relation_types)
-    })
+        'relations': list(kg.relation_types),
+        'version': kg.version,
+        'feed': kg.changes.id
+    }))
+
+@app.route('/api/changes')
+def api_changes():
+    """Mutations since a graph version, for clients patching a local copy.
+
+    Query: since=<version from /api/stats or a previous call>, feed=<feed id>,
+    limit. If the history no longer reaches back that far (or the graph was
+    replaced), the response has resync=true and the client should refetch.
+    """
+    since = request.args.get('since', default=None, type=int)
+    if since is None:
+        return jsonify({'error': 'since must be an integer version'}), 400
+    limit = request.args.get('limit', default=1000, type=int)
+    limit = max(1, min(10000, limit))
+    feed_id = request.args.get('feed', '').strip() or None
+    with graph_lock:
+        changes, more = kg.changes.since(since, kg.version, limit=limit, feed_id=feed_id)
+        version = kg.version
+        current_feed = kg.changes.id
+    if changes is None:
+        return jsonify({'resync': True, 'version': version, 'feed': current_feed, 'changes': []})
+    latest = changes[-1]['version'] if more else version
+    return jsonify({'resync': False, 'version': latest, 'feed': current_feed,
+                    'changes': changes, 'more': more})
 
 @app.route('/api/graph')
+@profiled
 def api_graph():
-    """Return the current graph in a D3-friendly format."""
-    nodes = []
-    node_set = set()
-    for n in kg.graph.nodes():
-        node_set.add(n)
-        meta = kg.metadata.get(n, {})
-        group = meta.get('type', 'concept')
-        nodes.append({'id': n, 'group': group})
-    links = []
-    for u, v, d in kg.graph.edges(data=True):
-        links.append({'source': u, 'target': v, 'relation': d.get('relation', '')})
-    return jsonify({'nodes': nodes, 'links': links})
+    """Return the current graph in a D3-friendly format.
+
+    mode=overview collapses communities into super-nodes; expand=0,3 shows
+    the listed communities as individual concepts and max_communities=N
+    (default 50) merges all but the N largest into one "other" node. budget=N returns a sample
+    of at most N nodes with counts of what was omitted. format=compact|msgpack|binary
+    selects a dictionary-encoded wire format (see classes/kg_wire.py).
+    """
+    mode = request.args.get('mode', 'full').strip()
+    if mode == 'overview':
+        try:
+            method = request.args.get('method', 'louvain').strip() or 'louvain'
+            expand_str = request.args.get('expand', '').strip()
+            try:
+                expand = [int(c) for c in expand_str.split(',') if c.strip()]
+            except ValueError:
+                return jsonify({'error': 'expand must be a comma-separated list of community ids'}), 400
+            max_communities = request.args.get('max_communities', default=None, type=int)
+            if max_communities is not None and not 1 <= max_communities <= MAX_OVERVIEW_COMMUNITIES:
+                return jsonify({'error': f'max_communities must be between 1 and {MAX_OVERVIEW_COMMUNITIES}'}), 400
+            if request.args.get('format', 'json') != 'json':
+                return jsonify({'error': 'overview mode only supports format=json'}), 400
+            return jsonify(kg.export_overview(expand=expand, method=method, max_communities=max_communities))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    if mode != 'full':
+        return jsonify({'error': "mode must be 'full' or 'overview'"}), 400
+    fmt = request.args.get('format', 'json')
+    budget = request.args.get('budget', '').strip()
+    if budget:
+        try:
+            budget = int(budget)
+        except ValueError:
+            return jsonify({'error': 'budget must be an integer'}), 400
+        if budget < 1:
+            return jsonify({'error': 'budget must be at least 1'}), 400
+        return _serve_cached(('graph', budget, fmt), lambda: _graph_response(kg.export_sample(budget)))
+    return _serve_cached(('graph', None, fmt), lambda: _graph_response(kg.export_subgraph()))
 
 @app.route('/api/triples')
+@profiled
 def api_triples():
     """Return triples with pagination and optional relation filter."""
     try:
@@ -1303,27 +1540,54 @@ def api_triples():
         page_size = request.args.get('page_size', default=20, type=int)
         page = max(1, page)
         page_size = max(5, min(200, page_size))
-        triples = []
-        for u, v, data in kg.graph.edges(data=True):
-            rel = data.get('relation', '')
-            if relation and rel != relation:
-                continue
-            triples.append({
-                'subject': u,
-                'predicate': rel,
-                'object': v,
-                'confidence': data.get('confidence', 1.0),
-                'source': data.get('source', 'manual')
-            })
-        total = len(triples)
-        start = (page - 1) * page_size
-        end = start + page_size
-        page_items = triples[start:end]
-        return jsonify({'triples': page_items, 'total': total, 'page': page, 'page_size': page_size})
+        include_inferred = request.args.get('include_inferred', '').lower() in ('1', 'true', 'yes')
+        
+        def build():
+            page_items, total = kg.get_triples(relation=relation or None,
+                                               offset=(page - 1) * page_size,
+                                               limit=page_size,
+                                               include_derived=include_inferred)
+            return jsonify({'triples': page_items, 'total': total, 'page': page, 'page_size': page_size})
+        
+        if page <= CACHED_TRIPLE_PAGES:
+            return _serve_cached(('triples', relation, page, page_size, include_inferred), build)
+        return build()
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/export')
+def api_export():
+    """Stream all triples as format=ndjson|ntriples|csv, optionally filtered by relation and source.
+
+    The export is produced while it is being sent: subjects are processed in
+    batches, each read under the graph lock, so memory stays flat however
+    large the graph is and edits are only held up for one batch at a time.
+    """
+    fmt = request.args.get('format', 'ndjson').strip() or 'ndjson'
+    if fmt not in kg_export.FORMATS:
+        return jsonify({'error': f"format must be one of {', '.join(kg_export.FORMATS)}"}), 400
+    relation = request.args.get('relation', '').strip() or None
+    source = request.args.get('source', '').strip() or None
+    base = request.args.get('base', '').strip() or kg_export.DEFAULT_BASE_IRI
+    mimetype, extension = kg_export.FORMATS[fmt]
+
+    with graph_lock:
+        graph = kg
+        subjects = list(graph.graph.nodes())
+
+    def triples(batch_size=1000):
+        for i in range(0, len(subjects), batch_size):
+            with graph_lock:
+                batch = list(graph.iter_triples(relation=relation, source=source,
+                                                subjects=subjects[i:i + batch_size]))
+            yield from batch
+
+    name = os.path.splitext(os.path.basename(current_file))[0] if current_file else 'kg'
+    return app.response_class(kg_export.serialize(triples(), fmt, base=base), mimetype=mimetype,
+                              headers={'Content-Disposition': f'attachment; filename="{name}.{extension}"'})
+
 @app.route('/api/loops')
+@profiled
 def api_loops():
     """Find loops in the current graph."""
     try:
@@ -1335,6 +1599,7 @@ def api_loops():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/subgraph')
+@profiled
 def api_subgraph():
     """Return a D3-friendly subgraph based on center/radius and relation filters."""
     try:
@@ -1342,18 +1607,25 @@ def api_subgraph():
         radius = request.args.get('radius', default=2, type=int)
         relations_str = request.args.get('relations', default='', type=str)
         direction = request.args.get('direction', default='both', type=str)
+        max_nodes = request.args.get('max_nodes', default=None, type=int)
         relations = None
         if relations_str:
             relations = set([r.strip() for r in relations_str.split(',') if r.strip()])
+        if center and center not in kg.graph:
+            return jsonify({'error': f'Concept "{center}" not found'}), 404
         data = kg.export_subgraph(center=center if center else None,
                                   radius=radius,
                                   relations=relations,
-                                  direction=direction)
-        return jsonify(data)
+                                  direction=direction,
+                                  max_nodes=max_nodes)
+        return _graph_response(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/loop_similarities')
+@profiled
 def api_loop_similarities():
     """Compute loop similarities in the current graph."""
     try:
@@ -1393,10 +1665,13 @@ def api_select_file():
     if not os.path.isfile(target):
         return jsonify({'error': f'File not found: {name}'}), 404
     try:
-        kg = ScientificKnowledgeGraph()
-        kg.load_from_json(target)
-        current_file = target
-        _save_visualization()
+        new_kg = ScientificKnowledgeGraph()
+        new_kg.load_from_json(target)
+        with graph_lock:
+            kg = new_kg
+            current_file = target
+        _publish_graph_replaced()
+        _schedule_render()
         return jsonify({'ok': True})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1427,9 +1702,11 @@ def api_create_file():
         new_kg.save_to_json(target)
         
         # Load it as the current file
-        kg = new_kg
-        current_file = target
-        _save_visualization()
+        with graph_lock:
+            kg = new_kg
+            current_file = target
+        _publish_graph_replaced()
+        _schedule_render()
         
         return jsonify({'ok': True, 'filename': filename})
     except Exception as e:
@@ -1465,11 +1742,14 @@ def api_rename_file():
         
         # Update current_file if it was the renamed file
         if current_file == old_path:
-            current_file = new_path
             # Reload the graph
-            kg = ScientificKnowledgeGraph()
-            kg.load_from_json(new_path)
-            _save_visualization()
+            new_kg = ScientificKnowledgeGraph()
+            new_kg.load_from_json(new_path)
+            with graph_lock:
+                kg = new_kg
+                current_file = new_path
+            _publish_graph_replaced()
+            _schedule_render()
         
         return jsonify({'ok': True, 'filename': new_name})
     except Exception as e:
@@ -1496,14 +1776,17 @@ def api_delete_file():
         
         # If this was the current file, clear it
         if current_file == target:
-            kg = ScientificKnowledgeGraph()
-            current_file = None
+            with graph_lock:
+                kg = ScientificKnowledgeGraph()
+                current_file = None
+            _publish_graph_replaced()
         
         return jsonify({'ok': True})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/neighbors')
+@profiled
 def api_neighbors():
     """Find neighbors of a concept."""
     concept = request.args.get('concept', '').strip()
@@ -1524,6 +1807,7 @@ def api_neighbors():
     return jsonify({'neighbors': neighbors})
 
 @app.route('/api/prerequisites')
+@profiled
 def api_prerequisites():
     """Find prerequisites for a concept."""
     concept = request.args.get('concept', '').strip()
@@ -1545,6 +1829,7 @@ def api_prerequisites():
     return jsonify({'prerequisites': prerequisites})
 
 @app.route('/api/path')
+@profiled
 def api_path():
     """Find path between two concepts."""
     start = request.args.get('start', '').strip()
@@ -1559,11 +1844,228 @@ def api_path():
     if end not in kg.graph.nodes():
         return jsonify({'error': f'End concept "{end}" not found'}), 404
     
-    path = kg.find_path(start, end)
+    mode = request.args.get('mode', default='shortest', type=str)
+    if mode == 'shortest':
+        path = kg.find_path(start, end)
+        return jsonify({'path': path})
+    if mode != 'confidence':
+        return jsonify({'error': f'Unknown mode "{mode}" (use shortest or confidence)'}), 400
     
-    return jsonify({'path': path})
+    try:
+        k = request.args.get('k', default=1, type=int)
+        max_hops = request.args.get('max_hops', default=None, type=int)
+        relations_str = request.args.get('relations', default='', type=str)
+        relations = None
+        if relations_str:
+            relations = set([r.strip() for r in relations_str.split(',') if r.strip()])
+        return jsonify(_confident_paths(kg, start, end, k, relations, max_hops))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+def _confident_paths(graph, start, end, k, relations, max_hops):
+    """Response body of a mode=confidence path query."""
+    if k > MAX_CONFIDENT_PATHS:
+        raise ValueError(f'k must be at most {MAX_CONFIDENT_PATHS}')
+    paths = graph.find_most_confident_paths(start, end, k=k, relations=relations, max_hops=max_hops)
+    return {
+        'path': paths[0]['path'] if paths else None,
+        'confidence': paths[0]['confidence'] if paths else None,
+        'paths': paths,
+    }
+
+@app.route('/api/query', methods=['GET', 'POST'])
+@profiled
+def api_query():
+    """Answer a basic graph pattern query, e.g. q=?x is_a wave . ?x prerequisite_of ?y"""
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        query = data.get('query') or data.get('patterns')
+        limit = data.get('limit', 100)
+        select = data.get('select') or None
+        inferred = bool(data.get('inferred'))
+    else:
+        query = request.args.get('q', '').strip()
+        limit = request.args.get('limit', default=100, type=int)
+        select_str = request.args.get('select', default='', type=str)
+        select = [v.strip() for v in select_str.split(',') if v.strip()] or None
+        inferred = request.args.get('inferred', '').lower() in ('1', 'true', 'yes')
+    if not query:
+        return jsonify({'error': 'Query required'}), 400
+    try:
+        limit = max(1, min(10000, int(limit))) if limit is not None else None
+        result = kg.query(query, limit=limit, select=select, include_derived=inferred)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({**result, 'count': len(result['results'])})
+
+@app.route('/api/rpq', methods=['GET', 'POST'])
+@profiled
+def api_rpq():
+    """
+    Regular path query, e.g. path=prerequisite_of%2B/is_a*&source=wave (add target= for a yes/no match).
+
+    Prefer POST with a JSON body: in a query string a literal '+' decodes to a
+    space, which the expression syntax reads as a sequence, so GET requests
+    must send the `+` operator as %2B. A raw '+' in a GET path is rejected.
+    """
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+    else:
+        raw_path = [value for key, _, value in (pair.partition(b'=') for pair in request.query_string.split(b'&'))
+                    if key == b'path']
+        if any(b'+' in value for value in raw_path):
+            return jsonify({'error': "A '+' in the query string decodes to a space; encode the path "
+                                     "operator as %2B (and spaces as %20), or POST the expression as JSON"}), 400
+        data = request.args.to_dict()
+    try:
+        return jsonify(_regular_path_query(kg, data))
+    except BatchOperationError as e:
+        return jsonify({'error': str(e)}), e.status
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+
+
+def _regular_path_query(graph, params):
+    """Shared by /api/rpq and the 'rpq' batch operation."""
+    expression = str(params.get('path') or '').strip()
+    if not expression:
+        raise BatchOperationError('Path expression required')
+    source = _require_concept(graph, params.get('source'), 'Source concept')
+    inferred = str(params.get('inferred', '')).lower() in ('1', 'true', 'yes')
+    if params.get('target'):
+        target = _require_concept(graph, params.get('target'), 'Target concept')
+        found = graph.regular_path_match(expression, source, target, include_derived=inferred)
+        return {'path_expression': expression, 'source': source, 'target': target,
+                'match': found is not None, 'witness': found}
+    limit = max(1, min(MAX_RPQ_RESULTS, int(params.get('limit', 1000))))
+    result = graph.regular_path_query(expression, source, limit=limit, include_derived=inferred)
+    return {'path_expression': expression, 'source': source, **result, 'count': len(result['results'])}
+
+@app.route('/api/inferred')
+@profiled
+def api_inferred():
+    """List triples derived by the rule engine, optionally filtered by subject/relation/object."""
+    subject = request.args.get('subject', '').strip() or None
+    relation = request.args.get('relation', '').strip() or None
+    obj = request.args.get('object', '').strip() or None
+    triples = kg.get_inferred_triples(subject, relation, obj)
+    return jsonify({'triples': triples, 'total': len(triples)})
+
+@app.route('/api/taxonomy')
+@profiled
+def api_taxonomy():
+    """Descendants/ancestors of a concept in the is_a hierarchy, plus an optional subsumption check."""
+    concept = request.args.get('concept', '').strip()
+    ancestor = request.args.get('ancestor', '').strip()
+    relation = request.args.get('relation', 'is_a').strip() or 'is_a'
+    if not concept:
+        return jsonify({'error': 'Concept name required'}), 400
+    if concept not in kg.graph.nodes():
+        return jsonify({'error': f'Concept "{concept}" not found in graph'}), 404
+    result = {
+        'concept': concept,
+        'relation': relation,
+        'descendants': kg.get_descendants(concept, relation=relation),
+        'ancestors': sorted(kg.get_ancestors(concept, relation=relation)),
+    }
+    if ancestor:
+        result['ancestor'] = ancestor
+        result['is_subconcept'] = kg.is_subconcept(concept, ancestor, relation=relation)
+    return jsonify(result)
+
+@app.route('/api/lca', methods=['GET', 'POST'])
+@profiled
+def api_lca():
+    """Lowest common ancestors in the is_a hierarchy for one pair (GET a=&b=) or many (POST pairs)."""
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        pairs = data.get('pairs') or []
+        relation = data.get('relation') or 'is_a'
+        if not isinstance(relation, str):
+            return jsonify({'error': 'relation must be a string'}), 400
+        relation = relation.strip() or 'is_a'
+        if not isinstance(pairs, list) or not all(isinstance(p, (list, tuple)) and len(p) == 2 for p in pairs):
+            return jsonify({'error': 'pairs must be a list of [a, b] pairs'}), 400
+        pairs = [(str(a), str(b)) for a, b in pairs]
+        results = []
+        for (a, b), lca in zip(pairs, kg.lowest_common_ancestors_batch(pairs, relation=relation)):
+            missing = [name for name in (a, b) if name not in kg.graph]
+            if missing:
+                results.append({'a': a, 'b': b, 'lca': None, 'missing': missing,
+                                'error': f'Concept "{missing[0]}" not found in graph'})
+            else:
+                results.append({'a': a, 'b': b, 'lca': lca})
+        return jsonify({'relation': relation, 'results': results})
+    a = request.args.get('a', '').strip()
+    b = request.args.get('b', '').strip()
+    relation = request.args.get('relation', 'is_a').strip() or 'is_a'
+    if not a or not b:
+        return jsonify({'error': 'Both a and b concepts required'}), 400
+    for name in (a, b):
+        if name not in kg.graph.nodes():
+            return jsonify({'error': f'Concept "{name}" not found in graph'}), 404
+    return jsonify({'a': a, 'b': b, 'relation': relation,
+                    'lca': kg.lowest_common_ancestors(a, b, relation=relation)})
+
+@app.route('/api/communities')
+@profiled
+def api_communities():
+    """List detected communities (id, label, size); members=1 includes member concepts."""
+    try:
+        method = request.args.get('method', 'louvain').strip() or 'louvain'
+        include_members = request.args.get('members', '').lower() in ('1', 'true', 'yes')
+        partition = kg.communities(method)
+        return jsonify({
+            'method': method,
+            'modularity': round(partition.modularity, 6),
+            'communities': partition.summary(include_members=include_members)
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/analytics/centrality')
+@profiled
+def api_centrality():
+    """Top-k concepts by centrality (metric=pagerank|degree|hits_hub|hits_authority|betweenness)."""
+    try:
+        metric = request.args.get('metric', 'pagerank').strip() or 'pagerank'
+        relation = request.args.get('relation', '').strip() or None
+        try:
+            top = int(request.args.get('top', 10))
+        except ValueError:
+            return jsonify({'error': 'top must be an integer'}), 400
+        if top < 1:
+            return jsonify({'error': 'top must be at least 1'}), 400
+
+        analytics = kg.analytics()
+        misses_before = analytics.cache_misses
+        results = kg.top_central_concepts(metric, k=top, relation=relation)
+        cached = analytics.cache_misses == misses_before
+        if cached:
+            metrics.cache('centrality').hit()
+        else:
+            metrics.cache('centrality').miss()
+
+        return jsonify({
+            'metric': metric,
+            'relation': relation,
+            'top': top,
+            'version': kg.version,
+            'cached': cached,
+            'results': results
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 @app.route('/api/concept')
+@profiled
 def api_concept():
     """Get detailed information about a concept."""
     name = request.args.get('name', '').strip()
@@ -1585,6 +2087,187 @@ def api_concept():
         'incoming': incoming
     })
 
+@app.route('/api/concepts', methods=['GET', 'POST'])
+@profiled
+def api_concepts():
+    """Describe many concepts in one call (GET names=a,b,c or POST {"names": [...]}).
+
+    With radius=N the response also carries the combined N-hop neighborhood of
+    the selection, computed as a single multi-source BFS.
+    """
+    try:
+        if request.method == 'POST':
+            data = request.get_json(silent=True) or {}
+            names = data.get('names') or []
+            radius = data.get('radius')
+            if not isinstance(names, list):
+                return jsonify({'error': 'names must be a list of concept names'}), 400
+            names = [str(n).strip() for n in names if str(n).strip()]
+        else:
+            names = [n.strip() for n in request.args.get('names', '').split(',') if n.strip()]
+            radius = request.args.get('radius', default=None, type=int)
+        if not names:
+            return jsonify({'error': 'At least one concept name required'}), 400
+
+        concepts, missing = kg.describe_concepts(names)
+        result = {'concepts': concepts, 'missing': missing}
+        if radius is not None:
+            try:
+                radius = int(radius)
+            except (TypeError, ValueError):
+                return jsonify({'error': 'radius must be an integer'}), 400
+            found = [c['name'] for c in concepts]
+            result['neighborhood'] = sorted(kg.get_concept_neighborhood(found, radius)) if found else []
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# ============================================================================
+# Batched operations
+# ============================================================================
+
+MAX_BATCH_OPERATIONS = 100
+
+
+class BatchOperationError(Exception):
+    """An operation in a batch failed; carries the HTTP status the single endpoint would use."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _require_concept(graph, name, label='Concept'):
+    if name is not None and not isinstance(name, str):
+        raise BatchOperationError(f'{label} must be a string')
+    name = (name or '').strip()
+    if not name:
+        raise BatchOperationError(f'{label} name required')
+    if name not in graph.graph:
+        raise BatchOperationError(f'{label} "{name}" not found', 404)
+    return name
+
+
+def _optional_string(op, field):
+    """Stripped string field of a batch operation, or None if absent or blank."""
+    value = op.get(field)
+    if value is not None and not isinstance(value, str):
+        raise BatchOperationError(f'{field} must be a string')
+    return (value or '').strip() or None
+
+
+def _batch_neighbors(graph, op):
+    concept = _require_concept(graph, op.get('concept'))
+    relation = _optional_string(op, 'relation')
+    direction = op.get('direction', 'both')
+    if direction not in ('in', 'out', 'both'):
+        raise BatchOperationError("direction must be 'in', 'out' or 'both'")
+    return {'neighbors': graph.get_neighbors(concept, relation=relation, direction=direction)}
+
+
+def _batch_path(graph, op):
+    start = _require_concept(graph, op.get('start'), 'Start concept')
+    end = _require_concept(graph, op.get('end'), 'End concept')
+    if op.get('mode', 'shortest') == 'confidence':
+        relations = op.get('relations')
+        if isinstance(relations, str):
+            relations = [r.strip() for r in relations.split(',') if r.strip()]
+        max_hops = op.get('max_hops')
+        return _confident_paths(graph, start, end, int(op.get('k', 1)),
+                                set(relations) if relations else None,
+                                int(max_hops) if max_hops is not None else None)
+    return {'path': graph.find_path(start, end, max_length=int(op.get('max_length', 5)))}
+
+
+def _batch_prerequisites(graph, op):
+    concept = _require_concept(graph, op.get('concept'))
+    depth = op.get('depth', 3)
+    return {'prerequisites': graph.get_prerequisites(concept, depth=int(depth) if depth is not None else None)}
+
+
+def _batch_subgraph(graph, op):
+    center = _optional_string(op, 'center')
+    if center is not None:
+        _require_concept(graph, center)
+    relations = op.get('relations')
+    if isinstance(relations, str):
+        relations = [r.strip() for r in relations.split(',') if r.strip()]
+    max_nodes = op.get('max_nodes')
+    return graph.export_subgraph(center=center, radius=int(op.get('radius', 2)),
+                                 relations=set(relations) if relations else None,
+                                 direction=op.get('direction', 'both'),
+                                 max_nodes=int(max_nodes) if max_nodes is not None else None)
+
+
+def _batch_triples(graph, op):
+    page = max(1, int(op.get('page', 1)))
+    page_size = max(5, min(200, int(op.get('page_size', 20))))
+    items, total = graph.get_triples(relation=_optional_string(op, 'relation'),
+                                     offset=(page - 1) * page_size, limit=page_size,
+                                     include_derived=bool(op.get('include_inferred')))
+    return {'triples': items, 'total': total, 'page': page, 'page_size': page_size}
+
+
+def _batch_concepts(graph, op):
+    names = op.get('names') or []
+    if isinstance(names, str):
+        names = names.split(',')
+    concepts, missing = graph.describe_concepts([str(n).strip() for n in names if str(n).strip()])
+    return {'concepts': concepts, 'missing': missing}
+
+
+BATCH_OPERATIONS = {
+    'neighbors': _batch_neighbors,
+    'path': _batch_path,
+    'prerequisites': _batch_prerequisites,
+    'subgraph': _batch_subgraph,
+    'triples': _batch_triples,
+    'concepts': _batch_concepts,
+    'rpq': _regular_path_query,
+}
+
+
+@app.route('/api/batch', methods=['POST'])
+@profiled
+def api_batch():
+    """Run several read operations against one graph version in a single request.
+
+    Body: {"operations": [{"op": "neighbors", "concept": "wave"},
+                          {"op": "path", "start": "a", "end": "b"}, ...]}
+    Results come back in order as {"ok": true, "result": ...} or
+    {"ok": false, "status": 404, "error": ...}; identical operations are
+    computed once.
+    """
+    data = request.get_json(silent=True) or {}
+    operations = data.get('operations')
+    if not isinstance(operations, list) or not all(isinstance(op, dict) for op in operations):
+        return jsonify({'error': 'operations must be a list of objects'}), 400
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return jsonify({'error': f'At most {MAX_BATCH_OPERATIONS} operations per batch'}), 400
+    try:
+        with graph_lock:
+            graph = kg
+            memo = {}
+            results = []
+            for op in operations:
+                handler = BATCH_OPERATIONS.get(op.get('op')) if isinstance(op.get('op'), str) else None
+                if handler is None:
+                    results.append({'ok': False, 'status': 400,
+                                    'error': f"Unknown op '{op.get('op')}' (choose from {', '.join(BATCH_OPERATIONS)})"})
+                    continue
+                key = json.dumps(op, sort_keys=True, default=str)
+                if key not in memo:
+                    try:
+                        memo[key] = {'ok': True, 'result': handler(graph, op)}
+                    except BatchOperationError as e:
+                        memo[key] = {'ok': False, 'status': e.status, 'error': str(e)}
+                    except (TypeError, ValueError, AttributeError) as e:
+                        memo[key] = {'ok': False, 'status': 400, 'error': str(e)}
+                results.append(memo[key])
+            return jsonify({'version': graph.version, 'results': results})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/add_triple', methods=['POST'])
 def api_add_triple():
     """Add a triple to the current KG and persist to the selected file."""
@@ -1598,10 +2281,15 @@ def api_add_triple():
         o = (data.get('object') or '').strip()
         if not s or not p or not o:
             return jsonify({'error': 'subject, predicate, and object are required'}), 400
-        kg.add_triple(s, p, o)
-        if current_file:
-            kg.save_to_json(current_file)
-        _save_visualization()
+        with graph_lock:
+            graph = kg
+            before = graph.version
+            graph.add_triple(s, p, o)
+            if current_file:
+                graph.save_to_json(current_file)
+            changes, _ = graph.changes.since(before, graph.version)
+        _publish_changes(graph, changes)
+        _schedule_render()
         return jsonify({'ok': True})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1619,15 +2307,15 @@ def api_remove_triple():
         o = (data.get('object') or '').strip()
         if not s or not p or not o:
             return jsonify({'error': 'subject, predicate, and object are required'}), 400
-        # Remove matching edges between s and o with relation p
-        if kg.graph.has_edge(s, o):
-            edges = list(kg.graph.get_edge_data(s, o).items())
-            for key, edata in edges:
-                if edata.get('relation') == p:
-                    kg.graph.remove_edge(s, o, key=key)
-        if current_file:
-            kg.save_to_json(current_file)
-        _save_visualization()
+        with graph_lock:
+            graph = kg
+            before = graph.version
+            graph.remove_triple(s, p, o)
+            if current_file:
+                graph.save_to_json(current_file)
+            changes, _ = graph.changes.since(before, graph.version)
+        _publish_changes(graph, changes)
+        _schedule_render()
         return jsonify({'ok': True})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1646,31 +2334,75 @@ def api_update_metadata():
         examples = data.get('examples') or []
         if not node:
             return jsonify({'error': 'node is required'}), 400
-        if node not in kg.graph.nodes():
-            # If metadata is set for a non-existent node, create isolated node
-            kg.graph.add_node(node)
-        kg.add_node_metadata(node, node_type=node_type, description=description, examples=examples)
-        if current_file:
-            kg.save_to_json(current_file)
-        _save_visualization()
-        return jsonify({'ok': True, 'metadata': kg.metadata.get(node, {})})
+        with graph_lock:
+            graph = kg
+            before = graph.version
+            if node not in graph.graph.nodes():
+                # If metadata is set for a non-existent node, create isolated node
+                graph.graph.add_node(node)
+            graph.add_node_metadata(node, node_type=node_type, description=description, examples=examples)
+            if current_file:
+                graph.save_to_json(current_file)
+            changes, _ = graph.changes.since(before, graph.version)
+            metadata = dict(graph.metadata.get(node, {}))
+        _publish_changes(graph, changes)
+        _schedule_render()
+        return jsonify({'ok': True, 'metadata': metadata})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/events')
+def api_events():
+    """Stream graph mutations, file switches and finished renders as server-sent events.
+
+    A 'hello' event carries the current version and feed id. Event ids are
+    '<feed id>:<version>'. A reconnecting browser sends Last-Event-ID
+    automatically; the changes it missed are replayed before the hello, or a
+    'resync' event is sent if they are no longer in the change feed or the
+    id belongs to another graph (e.g. after a file switch).
+    """
+    subscription = events.subscribe()
+    with graph_lock:
+        graph = kg
+        last_event_id = request.headers.get('Last-Event-ID', '').strip()
+        if last_event_id:
+            feed_id, _, version = last_event_id.rpartition(':')
+            missed, more = None, False
+            if feed_id and version.isdigit():
+                missed, more = graph.changes.since(int(version), graph.version,
+                                                   limit=events.max_pending - 2, feed_id=feed_id)
+            if missed is None or more:
+                subscription.put(format_event('resync', {'reason': 'history unavailable'}))
+            else:
+                for change in missed:
+                    subscription.put(format_event(_CHANGE_EVENTS.get(change['op'], change['op']),
+                                                  change, _event_id(graph, change['version'])))
+        subscription.put(format_event('hello', {
+            'version': graph.version,
+            'feed': graph.changes.id,
+            'file': os.path.basename(current_file) if current_file else None
+        }, _event_id(graph, graph.version)))
+    return app.response_class(events.stream(subscription), mimetype=SSE_CONTENT_TYPE,
+                              headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/api/image')
 def api_image():
-    """Serve (and if needed regenerate) the visualization for the current KG."""
+    """Serve the visualization for the current KG, waiting for a queued re-render first.
+
+    Renders only ever run on the render worker; if one is still running after
+    RENDER_WAIT_SECONDS the response is 202 with Retry-After.
+    """
     from flask import send_file
     if kg is None:
         return "Graph not initialized", 500
-    image_path = _get_image_path()
+    with graph_lock:
+        image_path = _get_image_path()
     if not os.path.exists(image_path):
-        try:
-            _save_visualization()
-        except Exception:
-            return "Image generation failed", 500
+        _schedule_render()
+    if not _wait_for_render(image_path, RENDER_WAIT_SECONDS):
+        return "Image is being rendered", 202, {'Retry-After': '2'}
     if os.path.exists(image_path):
-        return send_file(image_path, mimetype='image/png')
+        return send_file(image_path, mimetype='image/png', max_age=0)
     return "Image not found", 404
 
 # ============================================================================
@@ -1680,11 +2412,31 @@ def api_image():
 # Serve static assets from React build (JS, CSS, etc.)
 @app.route('/assets/<path:filename>')
 def serve_static_assets(filename):
-    """Serve static assets from the React build."""
+    """Serve static assets from the React build (precompressed when the client accepts gzip)."""
     assets_dir = os.path.join(frontend_dist, 'assets')
-    if os.path.exists(assets_dir):
-        return send_from_directory(assets_dir, filename)
-    return "Asset not found", 404
+    if not os.path.exists(assets_dir):
+        return "Asset not found", 404
+    return _send_frontend_file(assets_dir, filename, immutable=is_hashed_asset(filename))
+
+def _send_frontend_file(directory, filename, immutable=False):
+    """Send a build file, using its .gz sibling if possible; immutable files are cached for a year."""
+    gz_path = None
+    if 'gzip' in request.accept_encodings:
+        path = os.path.realpath(os.path.join(directory, filename))
+        if path.startswith(os.path.realpath(directory) + os.sep):
+            gz_path = precompressed_path(path)
+    if gz_path is not None:
+        response = send_from_directory(directory, os.path.relpath(gz_path, directory),
+                                       mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = send_from_directory(directory, filename)
+    response.vary.add('Accept-Encoding')
+    if immutable:
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    else:
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 # Serve the React app index
 @app.route('/')
@@ -1692,7 +2444,7 @@ def index():
     """Serve the React app index.html."""
     react_index = os.path.join(frontend_dist, 'index.html')
     if os.path.exists(react_index):
-        return send_from_directory(frontend_dist, 'index.html')
+        return _send_frontend_file(frontend_dist, 'index.html')
     # Fallback to original HTML template if build doesn't exist
     return render_template_string(HTML_TEMPLATE)
 
@@ -1708,43 +2460,172 @@ def serve_react_app(path):
     
     react_index = os.path.join(frontend_dist, 'index.html')
     if os.path.exists(react_index):
-        return send_from_directory(frontend_dist, 'index.html')
+        return _send_frontend_file(frontend_dist, 'index.html')
     return render_template_string(HTML_TEMPLATE)
 
-def _get_image_path():
-    base_dir = os.path.dirname(current_file) if current_file else os.path.dirname(__file__)
-    base_name = os.path.splitext(os.path.basename(current_file) if current_file else 'wave_kg')[0]
+def _get_image_path(dataset_path=None):
+    dataset_path = dataset_path if dataset_path is not None else current_file
+    base_dir = os.path.dirname(dataset_path) if dataset_path else os.path.dirname(__file__)
+    base_name = os.path.splitext(os.path.basename(dataset_path) if dataset_path else 'wave_kg')[0]
     return os.path.join(base_dir, f"{base_name}_visualization.png")
 
-def _save_visualization():
-    """Save a visualization image for the current KG to the dataset-specific file."""
-    if kg is None:
+def _save_visualization(graph=None, image_path=None):
+    """Save a visualization image for the current KG (or `graph`) to the dataset-specific file (or `image_path`).
+
+    matplotlib runs in a kg_render.py child process: the layout takes seconds
+    of CPU, and in a gevent worker it would otherwise block the event loop and
+    with it every request and /api/events stream. Waiting on the child yields.
+    """
+    graph = graph if graph is not None else kg
+    if graph is None:
         return
+    image_path = image_path or _get_image_path()
     
+    RENDER_QUEUE_DEPTH.inc()
+    start = time.perf_counter()
+    # One render at a time: each child holds a full copy of the graph
+    _render_lock.acquire()
+    snapshot_path = None
     try:
         # Check if graph has any nodes
-        if kg.graph.number_of_nodes() == 0:
+        if graph.graph.number_of_nodes() == 0:
             print("Warning: Graph has no nodes, skipping visualization")
             return
         
-        image_path = _get_image_path()
-        os.makedirs(os.path.dirname(image_path), exist_ok=True)
-        
-        # Generate visualization
-        kg.visualize(concept="", radius=2)
-        plt.savefig(image_path, dpi=150, bbox_inches='tight')
-        plt.close()
-        
-        print(f"✓ Saved visualization to {image_path}")
+        with tempfile.NamedTemporaryFile('w', suffix='.json', prefix='kg-render-', delete=False) as f:
+            snapshot_path = f.name
+        graph.save_to_json(snapshot_path)
+        result = subprocess.run([sys.executable, RENDER_SCRIPT, snapshot_path, image_path],
+                                capture_output=True, text=True, timeout=RENDER_TIMEOUT_SECONDS)
+        if result.returncode != 0:
+            print(f"Error generating visualization: {result.stderr.strip() or result.stdout.strip()}")
+        else:
+            print(f"✓ Saved visualization to {image_path}")
     except Exception as e:
         print(f"Error generating visualization: {e}")
         import traceback
         traceback.print_exc()
-        # Ensure matplotlib figure is closed even on error
+    finally:
+        if snapshot_path and os.path.exists(snapshot_path):
+            os.remove(snapshot_path)
+        _render_lock.release()
+        RENDER_QUEUE_DEPTH.dec()
+        RENDER_LATENCY.observe(time.perf_counter() - start)
+
+# ============================================================================
+# Change notifications and background rendering
+# ============================================================================
+
+_CHANGE_EVENTS = {
+    'add_triple': 'triple_added',
+    'remove_triple': 'triple_removed',
+    'update_metadata': 'metadata_updated',
+}
+
+
+def _event_id(graph, version):
+    """SSE event id '<feed id>:<version>'; versions alone collide after a file switch."""
+    return f'{graph.changes.id}:{version}'
+
+
+def _publish_changes(graph, changes):
+    """
+    Push changes recorded by `graph` to /api/events subscribers.
+
+    Callers read `changes` from graph.changes while holding graph_lock (the
+    feed is appended to by other requests) and publish after releasing it.
+    """
+    for change in changes or ():
+        events.publish(_CHANGE_EVENTS.get(change['op'], change['op']), change,
+                       _event_id(graph, change['version']))
+
+
+def _publish_graph_replaced():
+    events.publish('graph_replaced', {
+        'file': os.path.basename(current_file) if current_file else None,
+        'version': kg.version,
+        'feed': kg.changes.id
+    }, _event_id(kg, kg.version))
+
+
+_render_lock = threading.Lock()
+# Queued renders, image path -> (graph, dataset path); guarded by _render_state
+_pending_renders = OrderedDict()
+_rendering_path = None
+_render_state = threading.Condition()
+_render_thread = None
+# How long /api/image waits for a queued render before answering 202
+RENDER_WAIT_SECONDS = 30
+# Child process that draws the PNG, and how long it may take before it is killed
+RENDER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'kg_render.py')
+RENDER_TIMEOUT_SECONDS = 300
+
+
+def _render_snapshot(graph):
+    """Copy of what the renderer reads, taken under the graph lock so edits can continue meanwhile."""
+    with graph_lock:
+        snapshot = ScientificKnowledgeGraph()
+        snapshot.graph = graph.graph.copy()
+        snapshot.relation_types = set(graph.relation_types)
+        snapshot.metadata = dict(graph.metadata)
+        snapshot.version = graph.version
+        return snapshot
+
+
+def _render_worker():
+    global _rendering_path
+    while True:
+        with _render_state:
+            while not _pending_renders:
+                _render_state.wait()
+            # Requests for the same image that arrive while we render are coalesced into one pass
+            image_path, (graph, dataset) = _pending_renders.popitem(last=False)
+            _rendering_path = image_path
         try:
-            plt.close('all')
-        except:
-            pass
+            # Skip datasets that were renamed or deleted after the render was queued
+            if dataset is not None and not os.path.exists(dataset):
+                continue
+            snapshot = _render_snapshot(graph)
+            start = time.perf_counter()
+            _save_visualization(snapshot, image_path)
+            with graph_lock:
+                is_current = graph is kg
+            if is_current:
+                events.publish('render_completed', {
+                    'version': snapshot.version,
+                    'image': f'/api/image?v={snapshot.version}',
+                    'duration_ms': round((time.perf_counter() - start) * 1000, 1)
+                }, _event_id(graph, snapshot.version))
+        finally:
+            with _render_state:
+                _rendering_path = None
+                _render_state.notify_all()
+
+
+def _schedule_render():
+    """Re-render the PNG in the background; mutations do not wait for matplotlib.
+
+    The graph and its image path are captured together now, so a render still
+    queued when the user switches files is written for the file it belongs to.
+    """
+    global _render_thread
+    with graph_lock:
+        if kg is None:
+            return
+        graph, dataset, image_path = kg, current_file, _get_image_path()
+    with _render_state:
+        _pending_renders[image_path] = (graph, dataset)
+        if _render_thread is None or not _render_thread.is_alive():
+            _render_thread = threading.Thread(target=_render_worker, name='kg-render', daemon=True)
+            _render_thread.start()
+        _render_state.notify_all()
+
+
+def _wait_for_render(image_path, timeout):
+    """Block until no render of `image_path` is queued or running; False on timeout."""
+    with _render_state:
+        return _render_state.wait_for(
+            lambda: image_path not in _pending_renders and _rendering_path != image_path, timeout)
 
 def main():
     """Initialize and run the web interface."""
@@ -1764,6 +2645,7 @@ def main():
         print("✓ Loaded existing knowledge graph from data/wave_kg.json")
     except FileNotFoundError:
         print("Creating example wave physics knowledge graph...")
+        from phase1_kg_starter import build_example_wave_kg
         kg = build_example_wave_kg()
         default_path = os.path.join(os.path.dirname(__file__), 'data', 'wave_kg.json')
         os.makedirs(os.path.dirname(default_path), exist_ok=True)
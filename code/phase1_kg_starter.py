@@ -13,7 +13,6 @@ import networkx as nx
 import json
 from typing import List, Tuple, Optional, Set
 from collections import defaultdict
-import matplotlib.pyplot as plt
 from classes.class_scientific_kg import ScientificKnowledgeGraph
 # ============= EXAMPLE USAGE: Building a Wave Physics KG =============
 
@@ -169,6 +168,7 @@ if __name__ == "__main__":
     
     # Visualize
     print("\nGenerating visualization...")
+    import matplotlib.pyplot as plt
     kg.visualize(concept="", radius=2)
     plt.savefig("wave_kg_visualization.png", dpi=150, bbox_inches='tight')
     print("Saved visualization to 'wave_kg_visualization.png'")